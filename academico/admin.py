@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Curso, Materia, Matricula, Calificacion, Asistencia
+from .models import Curso, Materia, Matricula, Calificacion, Asistencia, TrabajoReporte
 
 
 @admin.register(Curso)
@@ -35,3 +35,10 @@ class AsistenciaAdmin(admin.ModelAdmin):
     list_display = ("estudiante", "materia", "fecha", "estado")
     search_fields = ("estudiante__username", "materia__nombre")
     list_filter = ("estado", "materia")
+
+
+@admin.register(TrabajoReporte)
+class TrabajoReporteAdmin(admin.ModelAdmin):
+    list_display = ("id", "tipo", "estado", "solicitado_por", "creado", "terminado", "intentos")
+    list_filter = ("estado", "tipo")
+    search_fields = ("solicitado_por__username", "huella")
@@ -6,4 +6,6 @@ class AcademicoConfig(AppConfig):
     name = "academico"
 
     def ready(self):
+        from gestion_academica import sqlite  # noqa: F401
+
         from . import signals  # noqa: F401
@@ -0,0 +1,93 @@
+"""
+Boletines de todo un curso o periodo académico en un solo ZIP.
+
+Los datos se leen por lotes de TAMANO_LOTE estudiantes (dos consultas por
+lote, ver ``reportes.datos_boletines``) y los PDF que no están en la caché de
+``cache_pdf`` se dibujan en un pool de procesos, que solo recibe datos simples
+y no toca la base. Cada PDF se agrega al ZIP y se entrega apenas está listo:
+en memoria nunca hay más que un lote. La web solo descarga así los cursos
+pequeños y sin pool; el resto lo genera ``procesar_reportes``.
+"""
+
+import io
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.utils.text import slugify
+
+from accounts.models import User
+from gestion_academica import metricas
+from . import cache_pdf
+from .exportacion import Canal
+from .models import Matricula
+from .reportes import datos_boletines, dibujar_boletin
+
+TAMANO_LOTE = 200
+
+
+def estudiantes_de(usuario, curso=None, periodo=None):
+    """
+    Ids de los estudiantes matriculados en ``curso`` o en los cursos del
+    periodo visibles para el usuario (todos si ``usuario`` es None).
+    """
+    matriculas = Matricula.objects.all() if usuario is None else Matricula.objects.para_usuario(usuario)
+    if curso is not None:
+        matriculas = matriculas.filter(curso=curso)
+    else:
+        matriculas = matriculas.filter(curso__periodo_academico=periodo)
+    return list(
+        User.objects.filter(role="ESTUDIANTE", pk__in=matriculas.values("estudiante_id"))
+        .order_by("username")
+        .values_list("pk", flat=True)
+    )
+
+
+def nombre_zip(curso=None, periodo=None):
+    return f"boletines_{curso.codigo}.zip" if curso is not None else f"boletines_{slugify(periodo)}.zip"
+
+
+def _dibujar(datos):
+    destino = io.BytesIO()
+    dibujar_boletin(datos, destino)
+    return destino.getvalue()
+
+
+def _pdfs(estudiante_ids, ejecutor):
+    """(nombre, bytes) de cada boletín, en el orden de ``estudiante_ids``."""
+    for inicio in range(0, len(estudiante_ids), TAMANO_LOTE):
+        pendientes = []
+        for datos in datos_boletines(estudiante_ids[inicio : inicio + TAMANO_LOTE]).values():
+            huella = cache_pdf.huella_boletin(datos)
+            try:
+                contenido = cache_pdf.ruta_pdf("boletin", datos["id"], huella).read_bytes()
+            except FileNotFoundError:
+                contenido = None
+            metricas.registrar_cache("pdf", contenido is not None)
+            if contenido is None and ejecutor is not None:
+                contenido = ejecutor.submit(_dibujar, datos)
+            pendientes.append((datos, huella, contenido))
+        for datos, huella, contenido in pendientes:
+            if not isinstance(contenido, bytes):
+                contenido = contenido.result() if contenido is not None else _dibujar(datos)
+                cache_pdf.guardar("boletin", datos["id"], huella, contenido)
+            yield f"boletin_{datos['username']}.pdf", contenido
+
+
+def generar_zip(estudiante_ids, procesos=None):
+    """Genera los bytes del ZIP con el boletín de cada estudiante, a medida que se consumen."""
+    procesos = settings.BOLETINES_PROCESOS if procesos is None else procesos
+    # django.setup() prepara los procesos aunque se creen con spawn en vez de fork
+    ejecutor = ProcessPoolExecutor(procesos, initializer=django.setup) if procesos > 1 else None
+    canal = Canal()
+    try:
+        with zipfile.ZipFile(canal, "w", compression=zipfile.ZIP_DEFLATED) as archivo:
+            for nombre, contenido in _pdfs(estudiante_ids, ejecutor):
+                archivo.writestr(nombre, contenido)
+                yield canal.vaciar()
+        yield canal.vaciar()
+    finally:
+        if ejecutor is not None:
+            ejecutor.shutdown(cancel_futures=True)
+    cache_pdf.limpiar()
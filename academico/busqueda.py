@@ -0,0 +1,200 @@
+"""
+Índice de texto completo para el buscador.
+
+En SQLite se usan dos tablas FTS5 (estudiantes y cursos) cuyo rowid es el id
+del objeto; los signals las mantienen al día y ``reconstruir_busqueda`` las
+vuelve a llenar. Cada palabra buscada se trata como prefijo y los resultados
+se ordenan por bm25 (por id si superan LIMITE_CONTEO). Con otros motores se
+recurre a ``icontains``.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from accounts.models import PerfilEstudiante, User
+from .models import Curso
+from .paginacion import LIMITE_CONTEO, Pagina
+
+TABLA_ESTUDIANTES = "busqueda_estudiantes"
+TABLA_CURSOS = "busqueda_cursos"
+# Peso de cada columna en bm25: (nombre, códigos)
+PESOS = (1.0, 2.0)
+
+_CREAR = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS {tabla} USING fts5("
+    "nombre, codigo, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+
+
+def disponible():
+    return connection.vendor == "sqlite"
+
+
+def crear_tablas(cursor):
+    for tabla in (TABLA_ESTUDIANTES, TABLA_CURSOS):
+        cursor.execute(_CREAR.format(tabla=tabla))
+
+
+def _sql_estudiantes(filtro=""):
+    usuario = User._meta.db_table
+    perfil = PerfilEstudiante._meta.db_table
+    return (
+        f"INSERT INTO {TABLA_ESTUDIANTES} (rowid, nombre, codigo) "
+        f"SELECT u.id, u.first_name || ' ' || u.last_name, u.username || ' ' || COALESCE(p.codigo_estudiante, '') "
+        f"FROM {usuario} u LEFT JOIN {perfil} p ON p.user_id = u.id "
+        f"WHERE u.role = 'ESTUDIANTE'{filtro}"
+    )
+
+
+def _sql_cursos(filtro=""):
+    return (
+        f"INSERT INTO {TABLA_CURSOS} (rowid, nombre, codigo) "
+        f"SELECT id, nombre, codigo FROM {Curso._meta.db_table} WHERE 1 = 1{filtro}"
+    )
+
+
+def _marcadores(ids):
+    return ", ".join(["%s"] * len(ids))
+
+
+def reconstruir():
+    """Vuelve a llenar ambas tablas desde cero. Devuelve (estudiantes, cursos)."""
+    with connection.cursor() as cursor:
+        crear_tablas(cursor)
+        totales = []
+        for tabla, sql in ((TABLA_ESTUDIANTES, _sql_estudiantes()), (TABLA_CURSOS, _sql_cursos())):
+            cursor.execute(f"DELETE FROM {tabla}")
+            cursor.execute(sql)
+            totales.append(cursor.rowcount)
+            cursor.execute(f"INSERT INTO {tabla} ({tabla}) VALUES ('optimize')")
+    return tuple(totales)
+
+
+def indexar_estudiantes(ids):
+    """Actualiza las filas de los usuarios dados; los que no son estudiantes salen del índice."""
+    ids = list(ids)
+    if not ids or not disponible():
+        return
+    with connection.cursor() as cursor:
+        for inicio in range(0, len(ids), 500):
+            bloque = ids[inicio : inicio + 500]
+            cursor.execute(f"DELETE FROM {TABLA_ESTUDIANTES} WHERE rowid IN ({_marcadores(bloque)})", bloque)
+            cursor.execute(_sql_estudiantes(f" AND u.id IN ({_marcadores(bloque)})"), bloque)
+
+
+def quitar_estudiante(usuario_id):
+    if disponible():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABLA_ESTUDIANTES} WHERE rowid = %s", [usuario_id])
+
+
+def indexar_curso(curso_id):
+    if disponible():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABLA_CURSOS} WHERE rowid = %s", [curso_id])
+            cursor.execute(_sql_cursos(" AND id = %s"), [curso_id])
+
+
+def quitar_curso(curso_id):
+    if disponible():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABLA_CURSOS} WHERE rowid = %s", [curso_id])
+
+
+def _consulta_fts(texto):
+    """Convierte el texto en una consulta FTS5 de prefijos unidos con AND, o None si está vacío."""
+    palabras = re.findall(r"\w+", texto)
+    if not palabras:
+        return None
+    return " ".join(f'"{palabra}"*' for palabra in palabras)
+
+
+def estudiantes_visibles(usuario):
+    if usuario.role == "ADMIN":
+        return None
+    if usuario.role == "DOCENTE":
+        return User.objects.filter(matriculas__curso__docente_responsable=usuario)
+    return User.objects.filter(pk=usuario.pk)
+
+
+def _pagina_fts(tabla, consulta, alcance, pagina, por_pagina):
+    """Ids ordenados por relevancia de la página pedida y total acotado de coincidencias."""
+    where, params = f"{tabla} MATCH %s", [consulta]
+    if alcance is not None:
+        # Con "+" SQLite no entrega el IN a FTS5 como búsquedas por rowid (que
+        # repetirían el MATCH por cada id): el alcance se materializa una vez y
+        # cada coincidencia se comprueba contra él
+        subconsulta, subparams = alcance.values("pk").query.sql_with_params()
+        where += f" AND +rowid IN ({subconsulta})"
+        params.extend(subparams)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM (SELECT 1 FROM {tabla} WHERE {where} LIMIT %s)", params + [LIMITE_CONTEO + 1])
+        total = cursor.fetchone()[0]
+        if total > LIMITE_CONTEO:
+            # bm25 puntúa todas las coincidencias; con una búsqueda tan amplia se
+            # recorre el índice en orden de id y LIMIT corta en la página pedida
+            orden, orden_params = "rowid", []
+        else:
+            orden, orden_params = f"bm25({tabla}, %s, %s), rowid", list(PESOS)
+        cursor.execute(
+            f"SELECT rowid FROM {tabla} WHERE {where} ORDER BY {orden} LIMIT %s OFFSET %s",
+            params + orden_params + [por_pagina + 1, (pagina - 1) * por_pagina],
+        )
+        ids = [fila[0] for fila in cursor.fetchall()]
+    return ids, total
+
+
+def _pagina_orm(queryset, pagina, por_pagina):
+    total = queryset.order_by()[: LIMITE_CONTEO + 1].count()
+    inicio = (pagina - 1) * por_pagina
+    ids = list(queryset.order_by("pk").values_list("pk", flat=True)[inicio : inicio + por_pagina + 1])
+    return ids, total
+
+
+def _armar(objetos_por_id, ids, total, pagina, por_pagina):
+    hay_mas = len(ids) > por_pagina
+    objetos = [objetos_por_id[pk] for pk in ids[:por_pagina] if pk in objetos_por_id]
+    return Pagina(
+        objetos,
+        pagina + 1 if hay_mas else None,
+        pagina - 1 if pagina > 1 else None,
+        por_pagina,
+        min(total, LIMITE_CONTEO),
+        total <= LIMITE_CONTEO,
+    )
+
+
+def buscar_estudiantes(usuario, texto, pagina=1, por_pagina=25):
+    alcance = estudiantes_visibles(usuario)
+    if disponible():
+        consulta = _consulta_fts(texto)
+        ids, total = _pagina_fts(TABLA_ESTUDIANTES, consulta, alcance, pagina, por_pagina) if consulta else ([], 0)
+    else:
+        queryset = User.objects.filter(role="ESTUDIANTE").filter(
+            Q(username__icontains=texto)
+            | Q(first_name__icontains=texto)
+            | Q(last_name__icontains=texto)
+            | Q(perfil_estudiante__codigo_estudiante__icontains=texto)
+        )
+        if alcance is not None:
+            queryset = queryset.filter(pk__in=alcance.values("pk"))
+        ids, total = _pagina_orm(queryset, pagina, por_pagina)
+    encontrados = User.objects.select_related("perfil_estudiante").in_bulk(ids[:por_pagina])
+    return _armar(encontrados, ids, total, pagina, por_pagina)
+
+
+def buscar_cursos(usuario, texto, pagina=1, por_pagina=25):
+    alcance = Curso.objects.para_usuario(usuario)
+    if usuario.role == "ADMIN":
+        alcance = None
+    if disponible():
+        consulta = _consulta_fts(texto)
+        ids, total = _pagina_fts(TABLA_CURSOS, consulta, alcance, pagina, por_pagina) if consulta else ([], 0)
+    else:
+        queryset = (alcance if alcance is not None else Curso.objects.all()).filter(
+            Q(nombre__icontains=texto) | Q(codigo__icontains=texto)
+        )
+        ids, total = _pagina_orm(queryset, pagina, por_pagina)
+    return _armar(Curso.objects.in_bulk(ids[:por_pagina]), ids, total, pagina, por_pagina)
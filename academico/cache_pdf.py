@@ -0,0 +1,169 @@
+"""
+Caché en disco de boletines y actas PDF.
+
+Cada PDF se guarda en MEDIA_ROOT/pdf_cache/<tipo>/<id>/<huella>.pdf, donde la
+huella es un hash de los datos que el PDF muestra (calificaciones, definitivas y nombres;
+en el acta, las definitivas por estudiante y materia): si nada cambió, la huella coincide y se sirve el archivo sin volver a
+generarlo. La misma huella es el ETag, así que un navegador con la versión
+vigente recibe 304. Los signals de Calificacion borran la carpeta del
+estudiante y del curso afectados, y cuando la caché supera PDF_CACHE_MAX_MB se
+eliminan los archivos usados hace más tiempo. Recorrer la caché cuesta un stat
+por archivo, así que tras generar un PDF la limpieza corre a lo sumo una vez
+cada PDF_CACHE_LIMPIEZA_S segundos.
+"""
+
+import contextlib
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
+
+from gestion_academica import metricas
+
+CARPETA = "pdf_cache"
+# Cambiarla cuando cambie el diseño de los PDF invalida toda la caché
+VERSION_FORMATO = "4"
+# Tras una limpieza la caché queda en esta fracción del máximo
+FRACCION_LIMPIEZA = 0.9
+# Su fecha de modificación marca la última limpieza, compartida entre workers
+MARCA_LIMPIEZA = ".ultima_limpieza"
+
+
+def _raiz():
+    return Path(settings.MEDIA_ROOT) / CARPETA
+
+
+def _carpeta(tipo, objeto_id):
+    return _raiz() / tipo / str(objeto_id)
+
+
+def _huella(partes, filas):
+    resumen = hashlib.sha256(VERSION_FORMATO.encode())
+    for valor in partes:
+        resumen.update(repr(valor).encode())
+    for fila in filas:
+        resumen.update(repr(fila).encode())
+    return resumen.hexdigest()[:32]
+
+
+def huella_boletin(datos):
+    """Huella del boletín a partir de ``reportes.datos_boletines``, con sus notas y definitivas."""
+    return _huella([datos["cabecera"], datos["definitivas"]], datos["filas"])
+
+
+def huella_acta(datos):
+    """Huella del acta a partir de ``reportes.datos_acta``: ya agrega por estudiante y materia."""
+    return _huella([datos["curso"], datos["estudiantes"], datos["materias"]], sorted(datos["notas"].items()))
+
+
+def invalidar(tipo, objeto_id):
+    shutil.rmtree(_carpeta(tipo, objeto_id), ignore_errors=True)
+
+
+def invalidar_calificaciones(estudiante_ids, curso_ids):
+    for estudiante_id in set(estudiante_ids):
+        invalidar("boletin", estudiante_id)
+    for curso_id in set(curso_ids):
+        invalidar("acta", curso_id)
+
+
+def limpiar(maximo=None):
+    """Borra los PDF menos usados hasta quedar bajo el máximo. Devuelve cuántos borró."""
+    maximo = settings.PDF_CACHE_MAX_MB * 1024 * 1024 if maximo is None else maximo
+    archivos = []
+    for ruta in _raiz().glob("*/*/*.pdf"):
+        try:
+            estado = ruta.stat()
+        except FileNotFoundError:
+            continue
+        archivos.append((estado.st_mtime, estado.st_size, ruta))
+    total = sum(tamano for _, tamano, _ in archivos)
+    if total <= maximo:
+        return 0
+    borrados = 0
+    for _, tamano, ruta in sorted(archivos):
+        if total <= maximo * FRACCION_LIMPIEZA:
+            break
+        ruta.unlink(missing_ok=True)
+        total -= tamano
+        borrados += 1
+    return borrados
+
+
+def limpiar_si_toca():
+    """``limpiar`` si pasaron PDF_CACHE_LIMPIEZA_S segundos desde la última; devuelve cuántos borró."""
+    marca = _raiz() / MARCA_LIMPIEZA
+    try:
+        if time.time() - marca.stat().st_mtime < settings.PDF_CACHE_LIMPIEZA_S:
+            return 0
+    except FileNotFoundError:
+        marca.parent.mkdir(parents=True, exist_ok=True)
+    # Se marca antes de recorrer: los demás workers no repiten la limpieza mientras tanto
+    marca.touch()
+    return limpiar()
+
+
+def ruta_pdf(tipo, objeto_id, huella):
+    return _carpeta(tipo, objeto_id) / f"{huella}.pdf"
+
+
+def guardar(tipo, objeto_id, huella, contenido):
+    """Guarda un PDF ya generado en memoria, como los del lote de boletines."""
+    _guardar(ruta_pdf(tipo, objeto_id, huella), lambda destino: destino.write(contenido))
+
+
+def _guardar(ruta, escribir):
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(dir=ruta.parent, suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as destino:
+            escribir(destino)
+        # Reemplazo atómico: otra petición nunca ve un PDF a medio escribir
+        os.replace(temporal, ruta)
+    except BaseException:
+        Path(temporal).unlink(missing_ok=True)
+        raise
+
+
+def respuesta(request, tipo, objeto_id, huella, escribir, nombre_descarga):
+    """
+    Sirve el PDF de la huella dada, generándolo con ``escribir(destino)`` solo
+    si no está en caché. Responde 304 si el cliente ya tiene esa versión.
+    """
+    etag = quote_etag(huella)
+    encabezados = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    etags_cliente = parse_etags(request.headers.get("If-None-Match", ""))
+    if etag in etags_cliente or "*" in etags_cliente:
+        metricas.registrar_cache("pdf", True)
+        respuesta_304 = HttpResponseNotModified()
+        for clave, valor in encabezados.items():
+            respuesta_304[clave] = valor
+        return respuesta_304
+
+    ruta = ruta_pdf(tipo, objeto_id, huella)
+    try:
+        archivo = ruta.open("rb")
+    except FileNotFoundError:
+        archivo = None
+    if archivo is not None:
+        metricas.registrar_cache("pdf", True)
+        # La fecha de modificación marca el último uso para la limpieza LRU
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(ruta)
+    else:
+        metricas.registrar_cache("pdf", False)
+        with metricas.medir_reporte(tipo, "pdf"):
+            _guardar(ruta, escribir)
+        # Abierto antes de limpiar: aunque la limpieza lo borre, la descarga sigue
+        archivo = ruta.open("rb")
+        limpiar_si_toca()
+    response = FileResponse(archivo, as_attachment=True, filename=nombre_descarga, content_type="application/pdf")
+    for clave, valor in encabezados.items():
+        response[clave] = valor
+    return response
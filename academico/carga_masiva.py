@@ -0,0 +1,85 @@
+"""
+Registro masivo de calificaciones y asistencias en una sola transacción.
+
+bulk_create y bulk_update no emiten signals, así que aquí se hace una vez por
+lote lo que los signals hacen por fila: resúmenes, versión de datos, correos y
+caché de PDF.
+"""
+
+from django.db import transaction
+
+from . import cache_pdf, correos, resumenes, versiones
+from .models import Asistencia, Calificacion
+
+
+def guardar_calificaciones(materia, tipo_evaluacion, fecha, estudiantes, notas, usuario):
+    """
+    Crea o actualiza la calificación (materia, tipo, fecha) de cada estudiante.
+
+    ``estudiantes`` es un dict id -> User de los matriculados y ``notas`` un
+    dict id -> (nota, observaciones). Devuelve (creadas, actualizadas).
+    """
+    creado_por = usuario if usuario.role == "DOCENTE" else None
+    with transaction.atomic():
+        existentes = {
+            cal.estudiante_id: cal
+            for cal in Calificacion.objects.filter(
+                materia=materia, tipo_evaluacion=tipo_evaluacion, fecha=fecha, estudiante_id__in=list(notas)
+            )
+        }
+        nuevas, actualizadas = [], []
+        for estudiante_id, (nota, observaciones) in notas.items():
+            calificacion = existentes.get(estudiante_id)
+            if calificacion is None:
+                nuevas.append(
+                    Calificacion(
+                        estudiante=estudiantes[estudiante_id],
+                        materia=materia,
+                        nota=nota,
+                        tipo_evaluacion=tipo_evaluacion,
+                        fecha=fecha,
+                        observaciones=observaciones,
+                        creado_por=creado_por,
+                    )
+                )
+            elif calificacion.nota != nota or calificacion.observaciones != observaciones:
+                calificacion.nota = nota
+                calificacion.observaciones = observaciones
+                calificacion.estudiante = estudiantes[estudiante_id]
+                calificacion.materia = materia
+                actualizadas.append(calificacion)
+        if not nuevas and not actualizadas:
+            return 0, 0
+        Calificacion.objects.bulk_create(nuevas)
+        Calificacion.objects.bulk_update(actualizadas, ["nota", "observaciones"])
+        resumenes.recalcular_grupo(materia.pk, tipo_evaluacion)
+        versiones.incrementar("calificaciones")
+        versiones.incrementar_notas([materia.curso_id])
+        correos.notificar_calificaciones(nuevas + actualizadas)
+        cache_pdf.invalidar_calificaciones([cal.estudiante_id for cal in nuevas + actualizadas], [materia.curso_id])
+    return len(nuevas), len(actualizadas)
+
+
+def guardar_asistencias(materia, fecha, registros):
+    """
+    Registra la asistencia de la clase (materia, fecha). ``registros`` es un
+    dict estudiante_id -> (estado, observaciones). Las filas que ya existen se
+    actualizan en el mismo INSERT ... ON CONFLICT sobre la restricción única
+    (estudiante, materia, fecha). Devuelve el número de filas escritas.
+    """
+    asistencias = [
+        Asistencia(estudiante_id=estudiante_id, materia=materia, fecha=fecha, estado=estado, observaciones=observaciones)
+        for estudiante_id, (estado, observaciones) in registros.items()
+    ]
+    if not asistencias:
+        return 0
+    with transaction.atomic():
+        Asistencia.objects.bulk_create(
+            asistencias,
+            update_conflicts=True,
+            unique_fields=["estudiante", "materia", "fecha"],
+            update_fields=["estado", "observaciones"],
+        )
+        resumenes.recalcular_mes(materia.pk, fecha)
+        versiones.incrementar("asistencias")
+    return len(asistencias)
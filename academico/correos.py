@@ -0,0 +1,138 @@
+"""
+Bandeja de salida de correos.
+
+Los signals solo insertan un CorreoPendiente; el comando ``enviar_correos``
+los envía por lotes sobre una única conexión SMTP, con reintentos y espera
+exponencial entre ellos.
+"""
+
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F
+from django.utils import timezone
+
+from gestion_academica import metricas
+from .models import CorreoPendiente
+
+logger = logging.getLogger(__name__)
+
+MAX_INTENTOS = 5
+ESPERA_BASE = timedelta(minutes=1)
+# Tiempo tras el cual un lote reclamado por un proceso caído vuelve a la cola.
+BLOQUEO = timedelta(minutes=10)
+
+
+def encolar(destinatario, asunto, cuerpo):
+    return CorreoPendiente.objects.create(destinatario=destinatario, asunto=asunto, cuerpo=cuerpo)
+
+
+def correo_calificacion_final(calificacion):
+    """CorreoPendiente sin guardar para una calificación FINAL, o None si no aplica."""
+    estudiante = calificacion.estudiante
+    if calificacion.tipo_evaluacion != "FINAL" or not estudiante.email:
+        return None
+    cuerpo = (
+        f"Hola {estudiante.get_full_name() or estudiante.username},\n\n"
+        f"Se registró/actualizó tu calificación final en {calificacion.materia.nombre}.\n"
+        f"Nota: {calificacion.nota}\n"
+        f"Fecha: {calificacion.fecha}\n"
+        f"Observaciones: {calificacion.observaciones or 'N/A'}\n\n"
+        "Por favor, revisa la plataforma para más detalles."
+    )
+    return CorreoPendiente(destinatario=estudiante.email, asunto="Nueva calificación final registrada", cuerpo=cuerpo)
+
+
+def notificar_calificaciones(calificaciones):
+    """Encola en un solo INSERT los correos de un lote de calificaciones."""
+    pendientes = [correo for correo in map(correo_calificacion_final, calificaciones) if correo]
+    creados = CorreoPendiente.objects.bulk_create(pendientes)
+    metricas.registrar_correos("encolado", len(creados))
+    return creados
+
+
+def reclamar_lote(tamano):
+    """Marca hasta ``tamano`` correos vencidos como ENVIANDO y los devuelve."""
+    ahora = timezone.now()
+    # Lotes de un proceso caído: vuelven a la cola salvo que ya agotaran sus intentos
+    abandonados = CorreoPendiente.objects.filter(estado="ENVIANDO", proximo_intento__lt=ahora)
+    agotados = abandonados.filter(intentos__gte=MAX_INTENTOS).update(
+        estado="FALLIDO", ultimo_error="El envío se interrumpió sin respuesta."
+    )
+    metricas.registrar_correos("fallido", agotados)
+    abandonados.update(estado="PENDIENTE")
+    ids = list(
+        CorreoPendiente.objects.filter(estado="PENDIENTE", proximo_intento__lte=ahora)
+        .order_by("proximo_intento")
+        .values_list("pk", flat=True)[:tamano]
+    )
+    if not ids:
+        return []
+    lote = uuid.uuid4().hex
+    CorreoPendiente.objects.filter(pk__in=ids, estado="PENDIENTE").update(
+        estado="ENVIANDO", lote=lote, proximo_intento=ahora + BLOQUEO, intentos=F("intentos") + 1
+    )
+    return list(CorreoPendiente.objects.filter(lote=lote, estado="ENVIANDO"))
+
+
+def _registrar_fallo(correo, error):
+    correo.ultimo_error = f"{type(error).__name__}: {error}"
+    if correo.intentos >= MAX_INTENTOS:
+        correo.estado = "FALLIDO"
+        metricas.registrar_correos("fallido")
+    else:
+        correo.estado = "PENDIENTE"
+        correo.proximo_intento = timezone.now() + ESPERA_BASE * (2 ** (correo.intentos - 1))
+    correo.save(update_fields=["estado", "proximo_intento", "ultimo_error"])
+
+
+def _sin_conexion(correos, error):
+    """Sin conexión SMTP: los correos que faltaban cuentan el intento y esperan como cualquier fallo."""
+    logger.warning("No se pudo abrir la conexión SMTP: %s", error)
+    for correo in correos:
+        metricas.registrar_correos("error")
+        _registrar_fallo(correo, error)
+    return len(correos)
+
+
+def enviar_lote(correos, conexion=None):
+    """
+    Envía ``correos`` reutilizando una sola conexión. Devuelve (enviados,
+    fallidos). Un error reabre la conexión para el siguiente mensaje; si no se
+    puede abrir, el resto del lote se reprograma.
+    """
+    conexion = conexion or get_connection()
+    correos = list(correos)
+    enviados, fallidos = [], 0
+    try:
+        try:
+            conexion.open()
+        except Exception as exc:
+            return 0, _sin_conexion(correos, exc)
+        for indice, correo in enumerate(correos):
+            mensaje = EmailMessage(
+                correo.asunto, correo.cuerpo, settings.DEFAULT_FROM_EMAIL, [correo.destinatario], connection=conexion
+            )
+            try:
+                conexion.send_messages([mensaje])
+            except Exception as exc:
+                logger.warning("No se pudo enviar el correo %s: %s", correo.pk, exc)
+                metricas.registrar_correos("error")
+                _registrar_fallo(correo, exc)
+                fallidos += 1
+                conexion.close()
+                try:
+                    conexion.open()
+                except Exception as exc_apertura:
+                    fallidos += _sin_conexion(correos[indice + 1 :], exc_apertura)
+                    break
+                continue
+            enviados.append(correo.pk)
+    finally:
+        conexion.close()
+        CorreoPendiente.objects.filter(pk__in=enviados).update(estado="ENVIADO", enviado=timezone.now(), ultimo_error="")
+        metricas.registrar_correos("enviado", len(enviados))
+    return len(enviados), fallidos
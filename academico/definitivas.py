@@ -0,0 +1,94 @@
+"""
+Notas definitivas ponderadas por tipo de evaluación.
+
+Cada tipo (parcial, final, tarea, quiz) pesa el porcentaje configurado en la
+materia o, si la materia no lo define, en su curso. La definitiva de un
+estudiante en una materia es la suma de peso x promedio de cada tipo dividida
+por la suma de los pesos de los tipos en los que tiene notas, de modo que una
+materia en curso ya tiene una definitiva parcial. Todo sale de una sola
+consulta con agregación condicional (un AVG filtrado por tipo) agrupada por
+estudiante y materia.
+
+Las definitivas de cada curso se guardan en la caché de Django con la versión
+``versiones.dominio_notas(curso)``, que aumenta cuando cambia una nota o un
+peso del curso (ver academico/signals.py y carga_masiva.py).
+"""
+
+from django.core.cache import cache
+from django.db.models import Avg, Case, ExpressionWrapper, F, FloatField, Q, Value, When
+from django.db.models.functions import Coalesce, NullIf
+
+from gestion_academica import metricas
+from . import versiones
+from .models import Calificacion, Materia
+
+TIPOS = [tipo for tipo, _ in Calificacion.TIPO_EVALUACION]
+CAMPOS_PESO = {tipo: f"peso_{tipo.lower()}" for tipo in TIPOS}
+DURACION_CACHE = 60 * 60
+
+
+def peso(tipo, ruta_materia="materia__"):
+    """Peso efectivo del tipo: el de la materia o, si está vacío, el del curso."""
+    campo = CAMPOS_PESO[tipo]
+    return Coalesce(F(f"{ruta_materia}{campo}"), F(f"{ruta_materia}curso__{campo}"))
+
+
+def pesos_materias(materias):
+    """Anota en ``materias`` el peso efectivo de cada tipo (peso_efectivo_parcial...)."""
+    return materias.annotate(**{f"peso_efectivo_{tipo.lower()}": peso(tipo, "") for tipo in TIPOS})
+
+
+def definitivas(calificaciones):
+    """
+    Filas (estudiante_id, materia_id, materia, promedios por tipo en el orden de
+    TIPOS, definitiva) de ``calificaciones``. Los promedios de un tipo sin notas
+    y la definitiva sin ningún tipo ponderado son None.
+    """
+    promedios = {
+        f"promedio_{tipo.lower()}": Avg("nota", filter=Q(tipo_evaluacion=tipo), output_field=FloatField())
+        for tipo in TIPOS
+    }
+    numerador = Value(0.0)
+    denominador = Value(0)
+    for tipo, alias in zip(TIPOS, promedios):
+        numerador += Coalesce(F(alias) * peso(tipo), Value(0.0), output_field=FloatField())
+        denominador += Case(When(**{f"{alias}__isnull": False}, then=peso(tipo)), default=Value(0))
+    filas = (
+        calificaciones.order_by()
+        .values("estudiante_id", "materia_id", "materia__nombre")
+        .annotate(**promedios)
+        .annotate(definitiva=ExpressionWrapper(numerador / NullIf(denominador, 0), output_field=FloatField()))
+        .values_list("estudiante_id", "materia_id", "materia__nombre", *promedios, "definitiva")
+    )
+    return [(fila[0], fila[1], fila[2], fila[3:-1], fila[-1]) for fila in filas]
+
+
+def definitivas_cursos(curso_ids):
+    """
+    ``definitivas`` de cada curso ({curso_id: filas}), desde la caché mientras
+    no cambie la versión de sus notas. Los cursos que falten se calculan juntos.
+    """
+    dominios = {curso_id: versiones.dominio_notas(curso_id) for curso_id in set(curso_ids)}
+    if not dominios:
+        return {}
+    actuales = versiones.versiones(list(dominios.values()))
+    claves = {curso_id: f"definitivas:{curso_id}:{actuales[dominio]}" for curso_id, dominio in dominios.items()}
+    guardadas = cache.get_many(claves.values())
+    resultado = {}
+    for curso_id, clave in claves.items():
+        metricas.registrar_cache("definitivas", clave in guardadas)
+        if clave in guardadas:
+            resultado[curso_id] = guardadas[clave]
+    faltantes = [curso_id for curso_id in claves if curso_id not in resultado]
+    if faltantes:
+        curso_de = dict(Materia.objects.filter(curso_id__in=faltantes).values_list("pk", "curso_id"))
+        nuevas = {curso_id: [] for curso_id in faltantes}
+        for fila in definitivas(Calificacion.objects.filter(materia__curso_id__in=faltantes)):
+            nuevas[curso_de[fila[1]]].append(fila)
+        cache.set_many({claves[curso_id]: filas for curso_id, filas in nuevas.items()}, DURACION_CACHE)
+        resultado.update(nuevas)
+    return resultado
+
+
+def definitivas_curso(curso_id):
+    return definitivas_cursos([curso_id])[curso_id]
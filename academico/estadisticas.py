@@ -0,0 +1,136 @@
+"""
+Estadísticas de notas (media, mediana, desviación, percentiles, aprobación e
+histograma) por materia, curso y tipo de evaluación.
+
+Las notas visibles para el usuario se leen en una sola consulta (agrupadas por
+materia, tipo y valor, con su cantidad) como arreglos de NumPy, y cada agrupación se calcula sin recorrer filas en Python: se ordena por
+(grupo, nota), los límites de cada grupo salen de ``np.diff`` y las sumas de
+``np.add.reduceat``; los percentiles se interpolan sobre las notas ya
+ordenadas y el histograma es un ``np.bincount`` de (grupo, intervalo).
+"""
+
+import numpy as np
+from django.db.models import Count
+
+from .models import Calificacion, Curso, Materia
+
+NOTA_APROBATORIA = 3.0
+NOTA_MAXIMA = 5.0
+ANCHO_INTERVALO = 0.5
+PERCENTILES = (10, 25, 75, 90)
+INTERVALOS = int(NOTA_MAXIMA / ANCHO_INTERVALO)
+
+
+def _arreglos(calificaciones):
+    # Las notas tienen pocos valores distintos: la base devuelve cada combinación
+    # (materia, tipo, nota) con su cantidad, leída del índice que las cubre, y
+    # np.repeat la vuelve a expandir
+    filas = list(
+        calificaciones.order_by()
+        .values("materia_id", "tipo_evaluacion", "nota")
+        .annotate(cantidad=Count("pk"))
+        .values_list("materia_id", "tipo_evaluacion", "nota", "cantidad")
+    )
+    if not filas:
+        return None
+    materias, tipos, notas, cantidades = zip(*filas)
+    datos_materia = {
+        pk: (nombre, curso_id)
+        for pk, nombre, curso_id in Materia.objects.filter(pk__in=set(materias)).values_list("pk", "nombre", "curso_id")
+    }
+    cantidades = np.array(cantidades, dtype=np.int64)
+    nombres_tipo, tipo_indices = np.unique(np.array(tipos), return_inverse=True)
+    return {
+        "materia": np.repeat(np.array(materias, dtype=np.int64), cantidades),
+        "curso": np.repeat(np.array([datos_materia[m][1] for m in materias], dtype=np.int64), cantidades),
+        "tipo": np.repeat(tipo_indices.astype(np.int64), cantidades),
+        "nota": np.repeat(np.array(notas, dtype=np.float64), cantidades),
+        "nombres_tipo": nombres_tipo,
+        "nombres_materia": {pk: nombre for pk, (nombre, _) in datos_materia.items()},
+    }
+
+
+def _agrupar(claves, notas):
+    """Estadísticas de ``notas`` para cada valor distinto de ``claves``, calculadas en bloque."""
+    orden = np.lexsort((notas, claves))
+    claves, notas = claves[orden], notas[orden]
+    inicios = np.concatenate(([0], np.flatnonzero(np.diff(claves)) + 1))
+    cantidades = np.diff(np.append(inicios, len(notas)))
+    sumas = np.add.reduceat(notas, inicios)
+    medias = sumas / cantidades
+    varianzas = np.add.reduceat(notas * notas, inicios) / cantidades - medias * medias
+    aprobadas = np.add.reduceat((notas >= NOTA_APROBATORIA).astype(np.int64), inicios)
+
+    def percentil(porcentaje):
+        # Interpolación lineal, igual que np.percentile, en todos los grupos a la vez
+        posicion = inicios + (cantidades - 1) * porcentaje / 100
+        abajo = np.floor(posicion).astype(np.int64)
+        arriba = np.ceil(posicion).astype(np.int64)
+        return notas[abajo] + (notas[arriba] - notas[abajo]) * (posicion - abajo)
+
+    grupo = np.repeat(np.arange(len(inicios)), cantidades)
+    intervalo = np.minimum((notas / ANCHO_INTERVALO).astype(np.int64), INTERVALOS - 1)
+    histogramas = np.bincount(grupo * INTERVALOS + intervalo, minlength=len(inicios) * INTERVALOS)
+    return {
+        "clave": claves[inicios],
+        "cantidad": cantidades,
+        "media": medias,
+        "mediana": percentil(50),
+        # Desviación poblacional; el max() absorbe el redondeo de la resta
+        "desviacion": np.sqrt(np.maximum(varianzas, 0)),
+        "minimo": notas[inicios],
+        "maximo": notas[inicios + cantidades - 1],
+        "percentiles": {p: percentil(p) for p in PERCENTILES},
+        "aprobacion": aprobadas / cantidades,
+        "histograma": histogramas.reshape(len(inicios), INTERVALOS),
+    }
+
+
+def _filas(resultado, nombres, ids=None):
+    filas = []
+    for i, clave in enumerate(resultado["clave"].tolist()):
+        filas.append(
+            {
+                "id": ids[clave] if ids else clave,
+                "nombre": nombres.get(clave, str(clave)),
+                "cantidad": int(resultado["cantidad"][i]),
+                "media": round(float(resultado["media"][i]), 2),
+                "mediana": round(float(resultado["mediana"][i]), 2),
+                "desviacion": round(float(resultado["desviacion"][i]), 2),
+                "minimo": round(float(resultado["minimo"][i]), 2),
+                "maximo": round(float(resultado["maximo"][i]), 2),
+                "percentiles": {f"p{p}": round(float(valores[i]), 2) for p, valores in resultado["percentiles"].items()},
+                "aprobacion": round(float(resultado["aprobacion"][i]) * 100, 1),
+                "histograma": resultado["histograma"][i].tolist(),
+            }
+        )
+    return filas
+
+
+def intervalos_histograma():
+    return [f"{i * ANCHO_INTERVALO:.1f}–{(i + 1) * ANCHO_INTERVALO:.1f}" for i in range(INTERVALOS)]
+
+
+def estadisticas(calificaciones):
+    """
+    Estadísticas de ``calificaciones`` (ya filtradas según el rol) por materia,
+    por curso y por tipo de evaluación. La aprobación es el porcentaje de notas
+    >= NOTA_APROBATORIA y el histograma cuenta notas en intervalos de
+    ANCHO_INTERVALO (el último incluye la nota máxima).
+    """
+    datos = _arreglos(calificaciones)
+    resultado = {"intervalos": intervalos_histograma(), "materias": [], "cursos": [], "tipos": []}
+    if datos is None:
+        return resultado
+    por_materia = _agrupar(datos["materia"], datos["nota"])
+    por_curso = _agrupar(datos["curso"], datos["nota"])
+    por_tipo = _agrupar(datos["tipo"], datos["nota"])
+    # Los tipos se agrupan por su índice en np.unique; el id que se muestra es el código
+    codigos_tipo = [str(tipo) for tipo in datos["nombres_tipo"]]
+    etiquetas_tipo = dict(Calificacion.TIPO_EVALUACION)
+    nombres_tipo = {i: etiquetas_tipo.get(tipo, tipo) for i, tipo in enumerate(codigos_tipo)}
+    nombres_curso = dict(Curso.objects.filter(pk__in=por_curso["clave"].tolist()).values_list("pk", "nombre"))
+    resultado["materias"] = _filas(por_materia, datos["nombres_materia"])
+    resultado["cursos"] = _filas(por_curso, nombres_curso)
+    resultado["tipos"] = _filas(por_tipo, nombres_tipo, codigos_tipo)
+    return resultado
@@ -0,0 +1,246 @@
+"""
+Exportaciones en streaming (XLSX, CSV y JSON Lines).
+
+El libro XLSX se escribe como un ZIP sobre un destino no posicionable: cada
+fila se comprime y se entrega al cliente por bloques, sin construir el archivo
+completo en memoria ni en disco. CSV y JSON Lines se agrupan en bloques del
+mismo tamaño y pueden comprimirse con gzip al vuelo.
+"""
+
+import csv
+import json
+import re
+import zipfile
+import zlib
+from xml.sax.saxutils import escape
+
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+
+from gestion_academica import metricas
+
+CONTENT_TYPE_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+FORMATOS = {
+    "xlsx": ("xlsx", CONTENT_TYPE_XLSX),
+    "csv": ("csv", "text/csv; charset=utf-8"),
+    "jsonl": ("jsonl", "application/x-ndjson; charset=utf-8"),
+}
+TAMANO_BLOQUE = 64 * 1024
+TAMANO_CURSOR = 2000
+
+_CARACTERES_INVALIDOS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_PARTES_FIJAS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+        'Target="styles.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/styles.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+        "</styleSheet>"
+    ),
+}
+
+_LIBRO = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{hoja}" sheetId="1" r:id="rId1"/></sheets>'
+    "</workbook>"
+)
+
+_INICIO_HOJA = (
+    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_FIN_HOJA = b"</sheetData></worksheet>"
+
+
+class Canal:
+    """Destino de escritura sin seek/tell: zipfile escribe en modo streaming."""
+
+    def __init__(self):
+        self._partes = []
+        self.tamano = 0
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        self.tamano += len(datos)
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        datos = b"".join(self._partes)
+        self._partes.clear()
+        self.tamano = 0
+        return datos
+
+
+def _columna(indice):
+    letras = ""
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def _celda(referencia, valor):
+    if valor is None or valor == "":
+        return ""
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return f'<c r="{referencia}"><v>{valor}</v></c>'
+    texto = escape(_CARACTERES_INVALIDOS.sub("", str(valor)))
+    return f'<c r="{referencia}" t="inlineStr"><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+def _fila(numero, columnas, valores):
+    celdas = "".join(_celda(f"{col}{numero}", valor) for col, valor in zip(columnas, valores))
+    return f'<row r="{numero}">{celdas}</row>'.encode()
+
+
+def generar_xlsx(encabezados, filas, hoja="Datos"):
+    """
+    Genera los bytes de un libro de una hoja con ``encabezados`` y las tuplas
+    de ``filas``, a medida que se consumen.
+    """
+    columnas = [_columna(i) for i in range(len(encabezados))]
+    canal = Canal()
+    with zipfile.ZipFile(canal, "w", compression=zipfile.ZIP_DEFLATED) as libro:
+        for nombre, contenido in _PARTES_FIJAS.items():
+            libro.writestr(nombre, contenido)
+        libro.writestr("xl/workbook.xml", _LIBRO.format(hoja=escape(hoja)))
+        yield canal.vaciar()
+        with libro.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as destino:
+            destino.write(_INICIO_HOJA)
+            destino.write(_fila(1, columnas, encabezados))
+            for numero, valores in enumerate(filas, start=2):
+                destino.write(_fila(numero, columnas, valores))
+                if canal.tamano >= TAMANO_BLOQUE:
+                    yield canal.vaciar()
+            destino.write(_FIN_HOJA)
+    yield canal.vaciar()
+
+
+class _Linea:
+    """Destino de csv.writer que devuelve la línea escrita."""
+
+    def write(self, valor):
+        return valor
+
+
+def generar_csv(encabezados, filas):
+    escritor = csv.writer(_Linea())
+    partes = [escritor.writerow(encabezados)]
+    tamano = len(partes[0])
+    for valores in filas:
+        linea = escritor.writerow(valores)
+        partes.append(linea)
+        tamano += len(linea)
+        if tamano >= TAMANO_BLOQUE:
+            yield "".join(partes).encode()
+            partes, tamano = [], 0
+    yield "".join(partes).encode()
+
+
+def generar_jsonl(claves, filas):
+    partes, tamano = [], 0
+    for valores in filas:
+        linea = json.dumps(dict(zip(claves, valores)), ensure_ascii=False, default=str) + "\n"
+        partes.append(linea)
+        tamano += len(linea)
+        if tamano >= TAMANO_BLOQUE:
+            yield "".join(partes).encode()
+            partes, tamano = [], 0
+    yield "".join(partes).encode()
+
+
+def comprimir_gzip(bloques):
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for bloque in bloques:
+        comprimido = compresor.compress(bloque)
+        if comprimido:
+            yield comprimido
+    yield compresor.flush()
+
+
+def generar(formato, columnas, filas, hoja="Datos", gzip=False):
+    """
+    Bytes de la exportación en ``formato``. ``columnas`` es una lista de
+    (clave, encabezado): JSON Lines usa las claves y los demás formatos los
+    encabezados. Con ``gzip`` los formatos de texto se comprimen al vuelo.
+    """
+    claves = [clave for clave, _ in columnas]
+    encabezados = [encabezado for _, encabezado in columnas]
+    if formato == "xlsx":
+        return generar_xlsx(encabezados, filas, hoja)
+    if formato == "csv":
+        contenido = generar_csv(encabezados, filas)
+    else:
+        contenido = generar_jsonl(claves, filas)
+    return comprimir_gzip(contenido) if gzip else contenido
+
+
+def nombre_y_tipo(nombre_base, formato, gzip=False):
+    extension, content_type = FORMATOS[formato]
+    nombre_archivo = f"{nombre_base}.{extension}"
+    if formato != "xlsx" and gzip:
+        return f"{nombre_archivo}.gz", "application/gzip"
+    return nombre_archivo, content_type
+
+
+def respuesta_exportacion(request, nombre_base, columnas, filas, hoja="Datos"):
+    """
+    Respuesta en el formato pedido con ``?format=xlsx|csv|jsonl`` (xlsx por
+    defecto) y ``?gzip=1`` para comprimir los formatos de texto.
+    """
+    formato = request.GET.get("format", "xlsx")
+    if formato not in FORMATOS:
+        return HttpResponseBadRequest("Formato no soportado. Usa xlsx, csv o jsonl.")
+    gzip = request.GET.get("gzip") == "1"
+    nombre_archivo, content_type = nombre_y_tipo(nombre_base, formato, gzip)
+    bloques = metricas.medir_iterable(generar(formato, columnas, filas, hoja, gzip), hoja.lower(), formato)
+    response = StreamingHttpResponse(bloques, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{nombre_archivo}"'
+    return response
+
+
+def nombre_completo(nombre, apellido):
+    """Equivalente a User.get_full_name() sobre columnas ya leídas."""
+    return f"{nombre or ''} {apellido or ''}".strip()
@@ -1,31 +1,75 @@
 from django import forms
 from django.core.exceptions import ValidationError
+from django.utils import timezone
+from accounts.models import User
 from .models import Curso, Materia, Matricula, Calificacion, Asistencia
 
 
+def validar_nota(nota):
+    if nota < 0 or nota > 5:
+        raise ValidationError("La nota debe estar entre 0.0 y 5.0.")
+    return nota
+
+
+CAMPOS_PESO = ["peso_parcial", "peso_final", "peso_tarea", "peso_quiz"]
+
+
+def _widget_peso():
+    return forms.NumberInput(attrs={"class": "form-control", "min": 0, "max": 100})
+
+
+def validar_pesos(cleaned, opcionales=False):
+    """Los pesos por tipo de evaluación deben sumar 100; en la materia pueden quedar todos vacíos."""
+    pesos = [cleaned.get(campo) for campo in CAMPOS_PESO]
+    if opcionales and all(peso is None for peso in pesos):
+        return
+    if any(peso is None for peso in pesos):
+        raise ValidationError("Indique todos los pesos o deje todos vacíos para usar los del curso.")
+    if sum(pesos) != 100:
+        raise ValidationError("Los pesos de parcial, final, tarea y quiz deben sumar 100.")
+
+
 class CursoForm(forms.ModelForm):
     class Meta:
         model = Curso
-        fields = ["nombre", "codigo", "periodo_academico", "docente_responsable"]
+        fields = ["nombre", "codigo", "periodo_academico", "docente_responsable", *CAMPOS_PESO]
         widgets = {
             "nombre": forms.TextInput(attrs={"class": "form-control"}),
             "codigo": forms.TextInput(attrs={"class": "form-control"}),
             "periodo_academico": forms.TextInput(attrs={"class": "form-control"}),
             "docente_responsable": forms.Select(attrs={"class": "form-select"}),
+            **{campo: _widget_peso() for campo in CAMPOS_PESO},
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # limit_choices_to genera un EXISTS correlacionado que recorre toda la
+        # tabla de usuarios; el filtro directo usa el índice de role
+        self.fields["docente_responsable"].queryset = User.objects.filter(role="DOCENTE")
+
+    def clean(self):
+        cleaned = super().clean()
+        validar_pesos(cleaned)
+        return cleaned
+
 
 class MateriaForm(forms.ModelForm):
     class Meta:
         model = Materia
-        fields = ["nombre", "codigo", "curso", "intensidad_horaria"]
+        fields = ["nombre", "codigo", "curso", "intensidad_horaria", *CAMPOS_PESO]
         widgets = {
             "nombre": forms.TextInput(attrs={"class": "form-control"}),
             "codigo": forms.TextInput(attrs={"class": "form-control"}),
             "curso": forms.Select(attrs={"class": "form-select"}),
             "intensidad_horaria": forms.NumberInput(attrs={"class": "form-control", "min": 1, "max": 20}),
+            **{campo: _widget_peso() for campo in CAMPOS_PESO},
         }
 
+    def clean(self):
+        cleaned = super().clean()
+        validar_pesos(cleaned, opcionales=True)
+        return cleaned
+
 
 class MatriculaForm(forms.ModelForm):
     class Meta:
@@ -61,11 +105,34 @@ class CalificacionForm(forms.ModelForm):
             "observaciones": forms.Textarea(attrs={"class": "form-control", "rows": 2}),
         }
 
+    def clean_nota(self):
+        return validar_nota(self.cleaned_data["nota"])
+
+
+class PlanillaCalificacionesForm(forms.Form):
+    materia = forms.ModelChoiceField(queryset=Materia.objects.none(), widget=forms.Select(attrs={"class": "form-select"}))
+    tipo_evaluacion = forms.ChoiceField(
+        choices=Calificacion.TIPO_EVALUACION, widget=forms.Select(attrs={"class": "form-select"})
+    )
+    fecha = forms.DateField(initial=timezone.localdate, widget=forms.DateInput(attrs={"class": "form-control", "type": "date"}))
+
+
+class NotaEstudianteForm(forms.Form):
+    estudiante = forms.IntegerField(widget=forms.HiddenInput)
+    nota = forms.DecimalField(
+        required=False,
+        max_digits=3,
+        decimal_places=2,
+        widget=forms.NumberInput(attrs={"class": "form-control", "step": "0.1", "min": 0, "max": 5}),
+    )
+    observaciones = forms.CharField(required=False, widget=forms.TextInput(attrs={"class": "form-control"}))
+
     def clean_nota(self):
         nota = self.cleaned_data["nota"]
-        if nota < 0 or nota > 5:
-            raise ValidationError("La nota debe estar entre 0.0 y 5.0.")
-        return nota
+        return nota if nota is None else validar_nota(nota)
+
+
+NotaEstudianteFormSet = forms.formset_factory(NotaEstudianteForm, extra=0)
 
 
 class AsistenciaForm(forms.ModelForm):
@@ -92,6 +159,22 @@ class AsistenciaForm(forms.ModelForm):
         return cleaned
 
 
+class PlanillaAsistenciaForm(forms.Form):
+    materia = forms.ModelChoiceField(queryset=Materia.objects.none(), widget=forms.Select(attrs={"class": "form-select"}))
+    fecha = forms.DateField(initial=timezone.localdate, widget=forms.DateInput(attrs={"class": "form-control", "type": "date"}))
+
+
+class AsistenciaEstudianteForm(forms.Form):
+    estudiante = forms.IntegerField(widget=forms.HiddenInput)
+    estado = forms.ChoiceField(
+        choices=Asistencia.ESTADOS, initial="PRESENTE", widget=forms.Select(attrs={"class": "form-select"})
+    )
+    observaciones = forms.CharField(required=False, widget=forms.TextInput(attrs={"class": "form-control"}))
+
+
+AsistenciaEstudianteFormSet = forms.formset_factory(AsistenciaEstudianteForm, extra=0)
+
+
 class BuscadorForm(forms.Form):
     query = forms.CharField(
         label="Buscar por estudiante o curso",
@@ -0,0 +1,54 @@
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+
+
+class Command(BaseCommand):
+    help = (
+        "Actualiza la réplica de lectura local (REPLICA_SQLITE) con una copia consistente de la base SQLite: "
+        "la copia se hace con la API de respaldo de SQLite, que no bloquea las escrituras en WAL, y reemplaza "
+        "a la anterior de forma atómica."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--intervalo", type=float, help="Repetir cada tantos segundos en lugar de copiar una sola vez."
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("La réplica local es una copia de la base SQLite.")
+        if not settings.REPLICA_SQLITE:
+            raise CommandError("Define REPLICA_SQLITE con la ruta del archivo de la réplica.")
+        destino = Path(settings.REPLICA_SQLITE).resolve()
+        while True:
+            close_old_connections()
+            self._copiar(destino)
+            if options["intervalo"] is None:
+                break
+            time.sleep(options["intervalo"])
+
+    def _copiar(self, destino):
+        inicio = time.perf_counter()
+        temporal = destino.with_name(f".{destino.name}.tmp")
+        temporal.unlink(missing_ok=True)
+        connection.ensure_connection()
+        copia = sqlite3.connect(temporal)
+        try:
+            # En un solo paso: la copia lee una instantánea y no se reinicia si otros escriben
+            connection.connection.backup(copia)
+            # La réplica se abre en solo lectura, que no admite WAL: vuelve al diario clásico
+            copia.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            copia.close()
+        # Las conexiones abiertas siguen con la copia anterior hasta cerrarse
+        os.replace(temporal, destino)
+        megas = destino.stat().st_size / (1024 * 1024)
+        self.stdout.write(
+            self.style.SUCCESS(f"Réplica actualizada en {destino} ({megas:.1f} MB, {time.perf_counter() - inicio:.2f} s).")
+        )
@@ -0,0 +1,43 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from academico import correos
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Envía por lotes los correos pendientes de la bandeja de salida."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=100, help="Correos por conexión SMTP.")
+        parser.add_argument("--una-vez", action="store_true", help="Vaciar la bandeja y terminar.")
+        parser.add_argument("--intervalo", type=float, default=10.0, help="Segundos de espera con la bandeja vacía.")
+
+    def handle(self, *args, **options):
+        total_enviados = total_fallidos = 0
+        while True:
+            close_old_connections()
+            try:
+                lote = correos.reclamar_lote(options["lote"])
+                enviados, fallidos = correos.enviar_lote(lote) if lote else (0, 0)
+            except Exception as exc:
+                # Un fallo inesperado (la base, el backend) no detiene el envío: se reintenta tras esperar
+                if options["una_vez"]:
+                    raise CommandError(f"Error al enviar los correos: {exc}") from exc
+                logger.exception("Error al enviar los correos")
+                self.stderr.write(f"Error al enviar los correos: {exc}")
+                time.sleep(options["intervalo"])
+                continue
+            if not lote:
+                if options["una_vez"]:
+                    break
+                time.sleep(options["intervalo"])
+                continue
+            total_enviados += enviados
+            total_fallidos += fallidos
+            self.stdout.write(f"Lote: {enviados} enviados, {fallidos} con error.")
+        self.stdout.write(self.style.SUCCESS(f"{total_enviados} correos enviados, {total_fallidos} con error."))
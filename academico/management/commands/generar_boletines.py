@@ -0,0 +1,44 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.text import slugify
+
+from academico.boletines_lote import estudiantes_de, generar_zip
+from academico.models import Curso
+
+
+class Command(BaseCommand):
+    help = "Genera en un ZIP el boletín PDF de cada estudiante de un curso o de un periodo académico."
+
+    def add_arguments(self, parser):
+        grupo = parser.add_mutually_exclusive_group(required=True)
+        grupo.add_argument("--curso", help="Código del curso.")
+        grupo.add_argument("--periodo", help="Periodo académico, por ejemplo 2024-1.")
+        parser.add_argument("--salida", help="Archivo ZIP (boletines_<curso o periodo>.zip por defecto).")
+        parser.add_argument(
+            "--procesos", type=int, default=os.cpu_count() or 1, help="Procesos que dibujan los PDF."
+        )
+
+    def handle(self, *args, **options):
+        if options["curso"]:
+            curso = Curso.objects.filter(codigo=options["curso"]).first()
+            if curso is None:
+                raise CommandError(f"No existe el curso {options['curso']}.")
+            estudiantes = estudiantes_de(None, curso=curso)
+            salida = options["salida"] or f"boletines_{curso.codigo}.zip"
+        else:
+            estudiantes = estudiantes_de(None, periodo=options["periodo"])
+            salida = options["salida"] or f"boletines_{slugify(options['periodo'])}.zip"
+        if not estudiantes:
+            raise CommandError("No hay estudiantes matriculados.")
+
+        inicio = time.perf_counter()
+        with open(salida, "wb") as archivo:
+            for bloque in generar_zip(estudiantes, max(1, options["procesos"])):
+                archivo.write(bloque)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(estudiantes)} boletines en {salida} ({time.perf_counter() - inicio:.1f} s)."
+            )
+        )
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+
+MODOS_CHECKPOINT = ("PASSIVE", "FULL", "RESTART", "TRUNCATE")
+
+
+class Command(BaseCommand):
+    help = (
+        "Mantenimiento periódico de SQLite en WAL: copia el WAL a la base (checkpoint) para que no crezca "
+        "sin límite y ejecuta PRAGMA optimize para refrescar las estadísticas del planificador."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--modo",
+            choices=MODOS_CHECKPOINT,
+            default="TRUNCATE",
+            help="Modo de wal_checkpoint; TRUNCATE (por defecto) además deja el archivo WAL vacío.",
+        )
+        parser.add_argument(
+            "--intervalo", type=float, help="Repetir cada tantos segundos en lugar de ejecutar una sola vez."
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("El mantenimiento es propio de SQLite.")
+        while True:
+            close_old_connections()
+            self._mantener(options["modo"])
+            if options["intervalo"] is None:
+                break
+            time.sleep(options["intervalo"])
+
+    def _mantener(self, modo):
+        inicio = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            if cursor.fetchone()[0].lower() != "wal":
+                self.stdout.write(self.style.WARNING("La base no está en modo WAL; solo se ejecuta PRAGMA optimize."))
+            else:
+                cursor.execute(f"PRAGMA wal_checkpoint({modo})")
+                ocupada, paginas_wal, copiadas = cursor.fetchone()
+                if ocupada:
+                    # Una lectura o escritura larga impidió terminar; se copia lo posible y se reintenta la próxima vez
+                    self.stdout.write(
+                        self.style.WARNING(f"Checkpoint {modo} incompleto: {copiadas} de {paginas_wal} páginas copiadas.")
+                    )
+                else:
+                    self.stdout.write(f"Checkpoint {modo}: {copiadas} de {paginas_wal} páginas copiadas.")
+            cursor.execute("PRAGMA optimize")
+        self.stdout.write(self.style.SUCCESS(f"Mantenimiento terminado en {time.perf_counter() - inicio:.2f} s."))
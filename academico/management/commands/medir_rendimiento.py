@@ -0,0 +1,136 @@
+import json
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from academico import rendimiento
+
+# Máximo de consultas SQL por petición en el peor de los roles. La sesión y el
+# usuario salen de la caché sin consultar: una vista que solo valida el rol hace
+# cero. Una vista nueva sin entrada usa el valor por defecto.
+PRESUPUESTO_POR_DEFECTO = 3
+PRESUPUESTOS = {
+    "dashboard_admin": 6,
+    "dashboard_docente": 9,
+    "dashboard_estudiante": 6,
+    "buscar": 6,
+    "reporte_boletin_pdf": 6,
+    "calificacion_masiva": 5,
+    "asistencia_masiva": 5,
+    "calificacion_editar": 4,
+    "asistencia_editar": 4,
+    "reporte_boletin_propio": 4,
+    "reporte_boletines_zip": 5,
+    "reporte_acta_curso_pdf": 4,
+    "reporte_trabajo_estado": 4,
+    "panel_promedios": 4,
+    "panel_estadisticas": 5,
+    "curso_definitivas": 4,
+    "estudiantes_riesgo": 6,
+}
+PERCENTILES = (50, 90, 95, 99)
+# Al comparar se informan los cambios de p50 mayores a este porcentaje
+UMBRAL_CAMBIO = 25
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea una base de prueba con datos sintéticos, visita cada ruta de academico y accounts con cada rol "
+        "y mide latencia (percentiles) y consultas SQL frente a un presupuesto por vista. Puede guardar el "
+        "resultado en JSON y compararlo con una medición anterior."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--estudiantes", type=int, default=400, help="Estudiantes a sembrar (400 por defecto).")
+        parser.add_argument("--repeticiones", type=int, default=10, help="Peticiones medidas por vista y rol.")
+        parser.add_argument("--salida", help="Archivo JSON donde guardar el reporte.")
+        parser.add_argument("--comparar", help="Reporte JSON anterior para mostrar las diferencias.")
+
+    def handle(self, *args, **options):
+        repeticiones = max(1, options["repeticiones"])
+        with rendimiento.base_temporal():
+            inicio = time.perf_counter()
+            datos = rendimiento.sembrar(options["estudiantes"])
+            self.stdout.write(f"Datos sembrados en {time.perf_counter() - inicio:.1f} s.")
+            resultados = self._medir(datos, repeticiones)
+
+        reporte = {
+            "fecha": timezone.now().isoformat(),
+            "django": django.get_version(),
+            "estudiantes": options["estudiantes"],
+            "repeticiones": repeticiones,
+            "vistas": resultados,
+        }
+        if options["salida"]:
+            with open(options["salida"], "w", encoding="utf-8") as archivo:
+                json.dump(reporte, archivo, ensure_ascii=False, indent=2)
+            self.stdout.write(f"Reporte guardado en {options['salida']}.")
+        if options["comparar"]:
+            self._comparar(options["comparar"], resultados)
+
+        excedidas = [r for r in resultados if r["consultas"] > r["presupuesto"]]
+        for resultado in excedidas:
+            self.stdout.write(
+                self.style.ERROR(
+                    f"{resultado['vista']} ({resultado['rol']}): {resultado['consultas']} consultas, "
+                    f"presupuesto {resultado['presupuesto']}"
+                )
+            )
+        if excedidas:
+            raise CommandError(f"{len(excedidas)} vistas superan su presupuesto de consultas.")
+        self.stdout.write(self.style.SUCCESS(f"{len(resultados)} mediciones dentro del presupuesto."))
+
+    def _medir(self, datos, repeticiones):
+        clientes = rendimiento.clientes(datos)
+        resultados = []
+        for modulo in ("academico.urls", "accounts.urls"):
+            for nombre, url in rendimiento.rutas(datos, modulo):
+                for rol, cliente in clientes.items():
+                    # La primera petición llena cachés y no se mide
+                    rendimiento.pedir(cliente, url)
+                    tiempos, consultas = [], 0
+                    for _ in range(repeticiones):
+                        inicio = time.perf_counter()
+                        respuesta, capturadas = rendimiento.pedir(cliente, url)
+                        tiempos.append((time.perf_counter() - inicio) * 1000)
+                        consultas = max(consultas, len(capturadas))
+                    tiempos.sort()
+                    resultado = {
+                        "vista": nombre,
+                        "rol": rol,
+                        "url": url,
+                        "estado": respuesta.status_code,
+                        "consultas": consultas,
+                        "presupuesto": PRESUPUESTOS.get(nombre, PRESUPUESTO_POR_DEFECTO),
+                        "ms": {f"p{p}": round(rendimiento.percentil(tiempos, p), 2) for p in PERCENTILES},
+                    }
+                    resultado["ms"]["max"] = round(tiempos[-1], 2)
+                    resultados.append(resultado)
+                    self.stdout.write(
+                        f"{resultado['estado']} {rol:<10} {nombre:<32} {consultas:>3} consultas "
+                        f"p50 {resultado['ms']['p50']:>8.2f} ms  p95 {resultado['ms']['p95']:>8.2f} ms"
+                    )
+        return resultados
+
+    def _comparar(self, ruta, resultados):
+        try:
+            with open(ruta, encoding="utf-8") as archivo:
+                anterior = {(r["vista"], r["rol"]): r for r in json.load(archivo)["vistas"]}
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f"No se pudo leer el reporte anterior: {exc}")
+        self.stdout.write(f"\nDiferencias con {ruta} (consultas, p50):")
+        for resultado in resultados:
+            previo = anterior.get((resultado["vista"], resultado["rol"]))
+            if previo is None:
+                self.stdout.write(f"  {resultado['vista']} ({resultado['rol']}): nueva")
+                continue
+            delta_consultas = resultado["consultas"] - previo["consultas"]
+            p50, p50_previo = resultado["ms"]["p50"], previo["ms"]["p50"]
+            cambio = (p50 - p50_previo) / p50_previo * 100 if p50_previo else 0
+            if delta_consultas or abs(cambio) >= UMBRAL_CAMBIO:
+                self.stdout.write(
+                    f"  {resultado['vista']} ({resultado['rol']}): {delta_consultas:+d} consultas, "
+                    f"p50 {p50_previo:.2f} -> {p50:.2f} ms ({cambio:+.0f}%)"
+                )
@@ -0,0 +1,70 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from academico import trabajos
+
+
+class Command(BaseCommand):
+    help = "Procesa la cola de trabajos de reportes (PDF y exportaciones) en segundo plano."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--procesos", type=int, default=1, help="Número de procesos worker a lanzar.")
+        parser.add_argument("--una-vez", action="store_true", help="Vaciar la cola y terminar.")
+        parser.add_argument("--intervalo", type=float, default=2.0, help="Segundos de espera con la cola vacía.")
+        parser.add_argument(
+            "--timeout", type=int, default=30, help="Minutos tras los que un trabajo en proceso se reintenta."
+        )
+
+    def handle(self, *args, **options):
+        if options["procesos"] > 1:
+            return self._lanzar_procesos(options)
+        self._detener = False
+        signal.signal(signal.SIGTERM, self._senal_detener)
+        nombre = f"{socket.gethostname()}:{os.getpid()}"
+        procesados = 0
+        while not self._detener:
+            close_old_connections()
+            trabajos.liberar_bloqueados(options["timeout"])
+            trabajo = trabajos.reclamar(nombre)
+            if trabajo is None:
+                if options["una_vez"]:
+                    break
+                time.sleep(options["intervalo"])
+                continue
+            trabajos.procesar(trabajo)
+            procesados += 1
+            self.stdout.write(f"[{nombre}] {trabajo} procesado.")
+        self.stdout.write(self.style.SUCCESS(f"[{nombre}] {procesados} trabajos procesados."))
+
+    def _senal_detener(self, signum, frame):
+        # Terminar el trabajo en curso antes de salir
+        self._detener = True
+
+    def _lanzar_procesos(self, options):
+        comando = [
+            sys.executable,
+            sys.argv[0],
+            "procesar_reportes",
+            "--intervalo",
+            str(options["intervalo"]),
+            "--timeout",
+            str(options["timeout"]),
+        ]
+        if options["una_vez"]:
+            comando.append("--una-vez")
+        procesos = [subprocess.Popen(comando) for _ in range(options["procesos"])]
+        try:
+            for proceso in procesos:
+                proceso.wait()
+        except KeyboardInterrupt:
+            for proceso in procesos:
+                proceso.terminate()
+            for proceso in procesos:
+                proceso.wait()
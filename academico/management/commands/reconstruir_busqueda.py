@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from academico import busqueda
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de texto completo del buscador (estudiantes y cursos)."
+
+    def handle(self, *args, **options):
+        if not busqueda.disponible():
+            raise CommandError("El índice FTS5 solo existe en SQLite; con otros motores el buscador no lo necesita.")
+        estudiantes, cursos = busqueda.reconstruir()
+        self.stdout.write(self.style.SUCCESS(f"Índice reconstruido: {estudiantes} estudiantes y {cursos} cursos."))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from academico.resumenes import reconstruir, reconstruir_asistencias
+
+
+class Command(BaseCommand):
+    help = "Reconstruye desde cero los resúmenes de calificaciones y de asistencia mensual."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--solo", choices=["calificaciones", "asistencias"], help="Reconstruir solo uno de los resúmenes."
+        )
+
+    def handle(self, *args, **options):
+        if options["solo"] != "asistencias":
+            total = reconstruir()
+            self.stdout.write(self.style.SUCCESS(f"Resúmenes de calificaciones reconstruidos: {total} filas."))
+        if options["solo"] != "calificaciones":
+            total = reconstruir_asistencias()
+            self.stdout.write(self.style.SUCCESS(f"Resúmenes de asistencia reconstruidos: {total} filas."))
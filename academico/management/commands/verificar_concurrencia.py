@@ -0,0 +1,116 @@
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.test.utils import override_settings
+
+from academico import rendimiento
+from academico.models import Calificacion, Materia
+from academico.resumenes import anotar_promedios
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea una base de prueba en archivo y la somete a lecturas y guardados de calificaciones simultáneos "
+        "desde varios hilos (una conexión cada uno, como los workers de gunicorn). Falla si alguna operación "
+        'termina con "database is locked" u otro error de SQLite.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hilos", type=int, default=8, help="Conexiones simultáneas (8 por defecto).")
+        parser.add_argument("--operaciones", type=int, default=200, help="Operaciones por hilo (200 por defecto).")
+        parser.add_argument(
+            "--escrituras", type=float, default=0.3, help="Fracción de operaciones que guardan una nota (0.3)."
+        )
+        parser.add_argument("--estudiantes", type=int, default=200, help="Estudiantes a sembrar (200 por defecto).")
+        parser.add_argument(
+            "--sin-perfil",
+            action="store_true",
+            help="Desactivar el perfil de producción (WAL, BEGIN IMMEDIATE...) para comparar.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("La verificación es propia de SQLite.")
+        opciones_db = connection.settings_dict["OPTIONS"]
+        modo_original = opciones_db.get("transaction_mode")
+        ajustes = {}
+        if options["sin_perfil"]:
+            ajustes["SQLITE_PERFIL_PRODUCCION"] = False
+            opciones_db.pop("transaction_mode", None)
+        try:
+            # Los guardados borran PDF en caché: que sea en una carpeta temporal
+            with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media, **ajustes):
+                with rendimiento.base_temporal(en_archivo=True):
+                    rendimiento.sembrar(options["estudiantes"])
+                    tiempos, errores, duracion = self._cargar(options)
+        finally:
+            if modo_original is not None:
+                opciones_db["transaction_mode"] = modo_original
+
+        total = sum(len(valores) for valores in tiempos.values()) + sum(errores.values())
+        self.stdout.write(f"{total} operaciones en {duracion:.2f} s ({total / duracion:.0f} por segundo).")
+        for tipo, valores in tiempos.items():
+            valores.sort()
+            if valores:
+                self.stdout.write(
+                    f"{tipo:<10} {len(valores):>6} correctas  p50 {rendimiento.percentil(valores, 50):>8.2f} ms  "
+                    f"p95 {rendimiento.percentil(valores, 95):>8.2f} ms  max {valores[-1]:>8.2f} ms"
+                )
+        for mensaje, cantidad in errores.most_common():
+            self.stdout.write(self.style.ERROR(f"{cantidad} x {mensaje}"))
+        if errores:
+            raise CommandError(f"{sum(errores.values())} operaciones fallaron con carga concurrente.")
+        self.stdout.write(self.style.SUCCESS("Carga mixta sin errores de bloqueo."))
+
+    def _cargar(self, options):
+        calificaciones = list(Calificacion.objects.values_list("pk", flat=True))
+        materias = list(Materia.objects.values_list("pk", flat=True))
+        # Cada hilo abre su propia conexión al archivo
+        connection.close()
+        tiempos = {"lectura": [], "escritura": []}
+        errores = Counter()
+        candado = threading.Lock()
+        barrera = threading.Barrier(options["hilos"])
+
+        def trabajar(semilla):
+            aleatorio = random.Random(semilla)
+            propios, fallos = {"lectura": [], "escritura": []}, Counter()
+            barrera.wait()
+            try:
+                for _ in range(options["operaciones"]):
+                    tipo = "escritura" if aleatorio.random() < options["escrituras"] else "lectura"
+                    inicio = time.perf_counter()
+                    try:
+                        if tipo == "escritura":
+                            # Lee y luego escribe en la misma transacción, con los signals de resúmenes y versiones
+                            calificacion = Calificacion.objects.get(pk=aleatorio.choice(calificaciones))
+                            calificacion.nota = Decimal(aleatorio.randint(0, 50)) / 10
+                            calificacion.save()
+                        else:
+                            materia = aleatorio.choice(materias)
+                            list(Calificacion.objects.filter(materia_id=materia).values_list("estudiante_id", "nota"))
+                            list(anotar_promedios(Materia.objects.filter(pk=materia)))
+                    except OperationalError as error:
+                        fallos[f"{tipo}: {error}"] += 1
+                    else:
+                        propios[tipo].append((time.perf_counter() - inicio) * 1000)
+            finally:
+                connection.close()
+            with candado:
+                for clave, valores in propios.items():
+                    tiempos[clave].extend(valores)
+                errores.update(fallos)
+
+        hilos = [threading.Thread(target=trabajar, args=(semilla,)) for semilla in range(options["hilos"])]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        return tiempos, errores, time.perf_counter() - inicio
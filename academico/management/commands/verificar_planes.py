@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from academico import rendimiento
+
+# Recorridos completos aceptados, con el motivo: {(vista, rol, tabla): "motivo"}
+PERMITIDOS = {}
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea una base de prueba con datos sintéticos, visita cada vista de academico con cada rol y "
+        "revisa con EXPLAIN QUERY PLAN que ninguna consulta recorra completas las tablas grandes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--estudiantes", type=int, default=400, help="Estudiantes a sembrar (400 por defecto).")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("La verificación interpreta los planes de SQLite.")
+        self.verbosity = options["verbosity"]
+        with rendimiento.base_temporal():
+            violaciones, revisadas = self._verificar(options["estudiantes"])
+
+        for vista, rol, tabla, sql in violaciones:
+            self.stdout.write(self.style.ERROR(f"{vista} ({rol}) recorre {tabla}:"))
+            self.stdout.write(f"    {sql}")
+        if violaciones:
+            raise CommandError(f"{len(violaciones)} consultas recorren tablas completas.")
+        self.stdout.write(self.style.SUCCESS(f"{revisadas} consultas revisadas sin recorridos completos."))
+
+    def _verificar(self, estudiantes):
+        datos = rendimiento.sembrar(estudiantes)
+        clientes = rendimiento.clientes(datos)
+        violaciones, revisadas, vistas = [], 0, set()
+        for nombre, url in rendimiento.rutas(datos):
+            for rol, cliente in clientes.items():
+                respuesta, consultas = rendimiento.pedir(cliente, url)
+                if self.verbosity >= 1:
+                    self.stdout.write(f"{respuesta.status_code} {rol:<10} {nombre} ({len(consultas)} consultas)")
+                for consulta in consultas:
+                    sql = consulta["sql"]
+                    if (nombre, sql) in vistas:
+                        continue
+                    vistas.add((nombre, sql))
+                    revisadas += 1
+                    detalles = rendimiento.plan(sql)
+                    if self.verbosity >= 2 and detalles:
+                        self.stdout.write(f"    {sql}")
+                        for detalle in detalles:
+                            self.stdout.write(f"      {detalle}")
+                    for tabla in rendimiento.escaneos_completos(sql, detalles):
+                        if (nombre, rol, tabla) not in PERMITIDOS:
+                            violaciones.append((nombre, rol, tabla, sql))
+        return violaciones, revisadas
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+
+
+def poblar_resumenes(apps, schema_editor):
+    Calificacion = apps.get_model("academico", "Calificacion")
+    ResumenCalificacion = apps.get_model("academico", "ResumenCalificacion")
+    agregados = {"suma": Sum("nota"), "cantidad": Count("id"), "minimo": Min("nota"), "maximo": Max("nota")}
+    for campos in (("materia_id", "estudiante_id", "tipo_evaluacion"), ("materia_id", "tipo_evaluacion")):
+        filas = Calificacion.objects.order_by().values(*campos).annotate(**agregados)
+        ResumenCalificacion.objects.bulk_create((ResumenCalificacion(**fila) for fila in filas.iterator()), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academico', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenCalificacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo_evaluacion', models.CharField(choices=[('PARCIAL', 'Parcial'), ('FINAL', 'Final'), ('TAREA', 'Tarea'), ('QUIZ', 'Quiz')], max_length=20)),
+                ('suma', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cantidad', models.PositiveIntegerField(default=0)),
+                ('minimo', models.DecimalField(decimal_places=2, max_digits=3)),
+                ('maximo', models.DecimalField(decimal_places=2, max_digits=3)),
+                ('estudiante', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_calificacion', to=settings.AUTH_USER_MODEL)),
+                ('materia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes', to='academico.materia')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('materia', 'estudiante', 'tipo_evaluacion'), name='resumen_unico_por_estudiante'), models.UniqueConstraint(condition=models.Q(('estudiante__isnull', True)), fields=('materia', 'tipo_evaluacion'), name='resumen_unico_por_materia')],
+            },
+        ),
+        migrations.RunPython(poblar_resumenes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+
+
+def poblar_resumenes_asistencia(apps, schema_editor):
+    Asistencia = apps.get_model("academico", "Asistencia")
+    ResumenAsistenciaMensual = apps.get_model("academico", "ResumenAsistenciaMensual")
+    campos = {"PRESENTE": "presentes", "AUSENTE": "ausentes", "TARDE": "tardes", "JUSTIFICADO": "justificados"}
+    filas = (
+        Asistencia.objects.order_by()
+        .annotate(mes=TruncMonth("fecha"))
+        .values("materia_id", "mes")
+        .annotate(**{campo: Count("id", filter=Q(estado=estado)) for estado, campo in campos.items()})
+    )
+    ResumenAsistenciaMensual.objects.bulk_create(
+        (ResumenAsistenciaMensual(**fila) for fila in filas.iterator()), batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academico', '0003_resumen_calificacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenAsistenciaMensual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(help_text='Primer día del mes.')),
+                ('presentes', models.PositiveIntegerField(default=0)),
+                ('ausentes', models.PositiveIntegerField(default=0)),
+                ('tardes', models.PositiveIntegerField(default=0)),
+                ('justificados', models.PositiveIntegerField(default=0)),
+                ('materia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_asistencia', to='academico.materia')),
+            ],
+            options={
+                'ordering': ['mes'],
+                'unique_together': {('materia', 'mes')},
+            },
+        ),
+        migrations.RunPython(poblar_resumenes_asistencia, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academico', '0004_resumen_asistencia_mensual'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionDatos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dominio', models.CharField(max_length=30, unique=True)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrabajoReporte',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('BOLETIN_PDF', 'Boletín PDF'), ('ACTA_PDF', 'Acta de curso PDF'), ('ESTUDIANTES', 'Estudiantes por curso'), ('CALIFICACIONES', 'Calificaciones'), ('ASISTENCIAS', 'Asistencias')], max_length=20)),
+                ('parametros', models.JSONField(blank=True, default=dict)),
+                ('alcance', models.CharField(blank=True, help_text='Rol e id cuando el contenido depende del usuario.', max_length=40)),
+                ('huella', models.CharField(db_index=True, max_length=64)),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('EN_PROCESO', 'En proceso'), ('COMPLETADO', 'Completado'), ('ERROR', 'Error')], default='PENDIENTE', max_length=20)),
+                ('archivo', models.FileField(blank=True, upload_to='reportes/')),
+                ('nombre_descarga', models.CharField(blank=True, max_length=150)),
+                ('error', models.TextField(blank=True)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('trabajador', models.CharField(blank=True, max_length=100)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('iniciado', models.DateTimeField(blank=True, null=True)),
+                ('terminado', models.DateTimeField(blank=True, null=True)),
+                ('solicitado_por', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trabajos_reporte', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-creado'],
+                'indexes': [models.Index(fields=['estado', 'creado'], name='academico_t_estado_a18072_idx')],
+            },
+        ),
+    ]
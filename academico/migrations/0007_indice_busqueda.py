@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:05
+
+from django.db import migrations
+
+CREAR = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS {tabla} USING fts5("
+    "nombre, codigo, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+
+
+def crear_indice(apps, schema_editor):
+    # FTS5 solo existe en SQLite; con otros motores el buscador usa icontains
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for tabla in ("busqueda_estudiantes", "busqueda_cursos"):
+            cursor.execute(CREAR.format(tabla=tabla))
+        cursor.execute(
+            "INSERT INTO busqueda_estudiantes (rowid, nombre, codigo) "
+            "SELECT u.id, u.first_name || ' ' || u.last_name, u.username || ' ' || COALESCE(p.codigo_estudiante, '') "
+            "FROM accounts_user u LEFT JOIN accounts_perfilestudiante p ON p.user_id = u.id "
+            "WHERE u.role = 'ESTUDIANTE'"
+        )
+        cursor.execute("INSERT INTO busqueda_cursos (rowid, nombre, codigo) SELECT id, nombre, codigo FROM academico_curso")
+
+
+def borrar_indice(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for tabla in ("busqueda_estudiantes", "busqueda_cursos"):
+            cursor.execute(f"DROP TABLE IF EXISTS {tabla}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academico', '0006_correo_pendiente'),
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, borrar_indice),
+    ]
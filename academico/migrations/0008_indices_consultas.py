@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academico', '0007_indice_busqueda'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='curso',
+            name='periodo_academico',
+            field=models.CharField(db_index=True, max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='asistencia',
+            index=models.Index(fields=['materia', 'fecha'], name='academico_a_materia_e9bf52_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asistencia',
+            index=models.Index(fields=['materia', 'estado'], name='academico_a_materia_4dd9a5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asistencia',
+            index=models.Index(fields=['-fecha', 'id'], name='academico_a_fecha_dad684_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='calificacion',
+            index=models.Index(fields=['estudiante', 'fecha'], name='academico_c_estudia_895086_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='calificacion',
+            index=models.Index(fields=['-fecha', 'id'], name='academico_c_fecha_f83bf2_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academico', '0008_indices_consultas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='calificacion',
+            index=models.Index(fields=['materia', 'tipo_evaluacion', 'nota'], name='academico_c_materia_ac8232_idx'),
+        ),
+    ]
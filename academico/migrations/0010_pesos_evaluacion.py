@@ -0,0 +1,54 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:29
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academico', '0009_indice_estadisticas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='curso',
+            name='peso_final',
+            field=models.PositiveSmallIntegerField(default=40, validators=[django.core.validators.MaxValueValidator(100)]),
+        ),
+        migrations.AddField(
+            model_name='curso',
+            name='peso_parcial',
+            field=models.PositiveSmallIntegerField(default=30, validators=[django.core.validators.MaxValueValidator(100)]),
+        ),
+        migrations.AddField(
+            model_name='curso',
+            name='peso_quiz',
+            field=models.PositiveSmallIntegerField(default=10, validators=[django.core.validators.MaxValueValidator(100)]),
+        ),
+        migrations.AddField(
+            model_name='curso',
+            name='peso_tarea',
+            field=models.PositiveSmallIntegerField(default=20, validators=[django.core.validators.MaxValueValidator(100)]),
+        ),
+        migrations.AddField(
+            model_name='materia',
+            name='peso_final',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, validators=[django.core.validators.MaxValueValidator(100)]),
+        ),
+        migrations.AddField(
+            model_name='materia',
+            name='peso_parcial',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, validators=[django.core.validators.MaxValueValidator(100)]),
+        ),
+        migrations.AddField(
+            model_name='materia',
+            name='peso_quiz',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, validators=[django.core.validators.MaxValueValidator(100)]),
+        ),
+        migrations.AddField(
+            model_name='materia',
+            name='peso_tarea',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, validators=[django.core.validators.MaxValueValidator(100)]),
+        ),
+    ]
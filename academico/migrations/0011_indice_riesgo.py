@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academico', '0010_pesos_evaluacion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asistencia',
+            index=models.Index(fields=['materia', 'estudiante', 'estado'], name='academico_a_materia_2aa069_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academico', '0011_indice_riesgo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trabajoreporte',
+            name='resumen',
+            field=models.JSONField(blank=True, default=dict, help_text='Resultado a mostrar, p. ej. conteos de importación.'),
+        ),
+        migrations.AlterField(
+            model_name='trabajoreporte',
+            name='tipo',
+            field=models.CharField(choices=[('BOLETIN_PDF', 'Boletín PDF'), ('ACTA_PDF', 'Acta de curso PDF'), ('ESTUDIANTES', 'Estudiantes por curso'), ('CALIFICACIONES', 'Calificaciones'), ('ASISTENCIAS', 'Asistencias'), ('IMPORTAR_USUARIOS', 'Importación de usuarios')], max_length=20),
+        ),
+    ]
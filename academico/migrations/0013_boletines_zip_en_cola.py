@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academico', '0012_importacion_en_cola'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='trabajoreporte',
+            name='tipo',
+            field=models.CharField(choices=[('BOLETIN_PDF', 'Boletín PDF'), ('ACTA_PDF', 'Acta de curso PDF'), ('ESTUDIANTES', 'Estudiantes por curso'), ('CALIFICACIONES', 'Calificaciones'), ('ASISTENCIAS', 'Asistencias'), ('IMPORTAR_USUARIOS', 'Importación de usuarios'), ('BOLETINES_ZIP', 'Boletines de un curso o periodo (ZIP)')], max_length=20),
+        ),
+    ]
@@ -1,16 +1,87 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import BooleanField, Exists, ExpressionWrapper, OuterRef, Q, Value
 from django.utils import timezone
 from accounts.models import User
 
 
+class AlcanceQuerySet(models.QuerySet):
+    """
+    Registros según el rol: ADMIN ve todo, DOCENTE lo de los cursos que dirige
+    y ESTUDIANTE lo propio o lo de los cursos en que está matriculado.
+    """
+
+    def condicion(self, user):
+        """Q que limita al usuario, o None si ve todos los registros."""
+        raise NotImplementedError
+
+    def para_usuario(self, user):
+        condicion = self.condicion(user)
+        return self if condicion is None else self.filter(condicion)
+
+    def con_permiso(self, user, ademas=None):
+        """Anota ``permitido`` para distinguir en la misma consulta inexistente (404) de ajeno (403)."""
+        condicion = self.condicion(user)
+        if condicion is None:
+            return self.annotate(permitido=Value(True))
+        if ademas is not None:
+            condicion |= ademas
+        return self.annotate(permitido=ExpressionWrapper(condicion, output_field=BooleanField()))
+
+
+def _matriculado(user, campo_curso):
+    return Q(Exists(Matricula.objects.filter(estudiante=user, curso=OuterRef(campo_curso))))
+
+
+class CursoQuerySet(AlcanceQuerySet):
+    def condicion(self, user):
+        if user.role == "ADMIN":
+            return None
+        if user.role == "DOCENTE":
+            return Q(docente_responsable=user)
+        return _matriculado(user, "pk")
+
+
+class MateriaQuerySet(AlcanceQuerySet):
+    def condicion(self, user):
+        if user.role == "ADMIN":
+            return None
+        if user.role == "DOCENTE":
+            return Q(curso__docente_responsable=user)
+        return _matriculado(user, "curso")
+
+
+class RegistroEstudianteQuerySet(AlcanceQuerySet):
+    """Matrículas, calificaciones y asistencias: el estudiante solo ve las suyas."""
+
+    ruta_curso = "materia__curso"
+
+    def condicion(self, user):
+        if user.role == "ADMIN":
+            return None
+        if user.role == "DOCENTE":
+            return Q(**{f"{self.ruta_curso}__docente_responsable": user})
+        return Q(estudiante=user)
+
+
+class MatriculaQuerySet(RegistroEstudianteQuerySet):
+    ruta_curso = "curso"
+
+
 class Curso(models.Model):
     nombre = models.CharField(max_length=120)
     codigo = models.CharField(max_length=20, unique=True)
-    periodo_academico = models.CharField(max_length=50)
+    periodo_academico = models.CharField(max_length=50, db_index=True)
     docente_responsable = models.ForeignKey(
         User, on_delete=models.PROTECT, related_name="cursos_asignados", limit_choices_to={"role": "DOCENTE"}
     )
+    # Porcentaje de la nota definitiva por tipo de evaluación; cada materia puede reemplazarlos
+    peso_parcial = models.PositiveSmallIntegerField(default=30, validators=[MaxValueValidator(100)])
+    peso_final = models.PositiveSmallIntegerField(default=40, validators=[MaxValueValidator(100)])
+    peso_tarea = models.PositiveSmallIntegerField(default=20, validators=[MaxValueValidator(100)])
+    peso_quiz = models.PositiveSmallIntegerField(default=10, validators=[MaxValueValidator(100)])
+
+    objects = CursoQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.codigo} - {self.nombre}"
@@ -21,6 +92,13 @@ class Materia(models.Model):
     codigo = models.CharField(max_length=20, unique=True)
     curso = models.ForeignKey(Curso, on_delete=models.CASCADE, related_name="materias")
     intensidad_horaria = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(20)])
+    # Vacíos: se usan los pesos del curso
+    peso_parcial = models.PositiveSmallIntegerField(null=True, blank=True, validators=[MaxValueValidator(100)])
+    peso_final = models.PositiveSmallIntegerField(null=True, blank=True, validators=[MaxValueValidator(100)])
+    peso_tarea = models.PositiveSmallIntegerField(null=True, blank=True, validators=[MaxValueValidator(100)])
+    peso_quiz = models.PositiveSmallIntegerField(null=True, blank=True, validators=[MaxValueValidator(100)])
+
+    objects = MateriaQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.nombre} ({self.curso.codigo})"
@@ -33,6 +111,8 @@ class Matricula(models.Model):
     curso = models.ForeignKey(Curso, on_delete=models.CASCADE, related_name="matriculas")
     fecha_matricula = models.DateField(default=timezone.now)
 
+    objects = MatriculaQuerySet.as_manager()
+
     class Meta:
         unique_together = ("estudiante", "curso")
 
@@ -59,12 +139,30 @@ class Calificacion(models.Model):
         User, on_delete=models.SET_NULL, null=True, blank=True, related_name="calificaciones_creadas", limit_choices_to={"role": "DOCENTE"}
     )
 
+    objects = RegistroEstudianteQuerySet.as_manager()
+
     class Meta:
         ordering = ["-fecha"]
+        indexes = [
+            models.Index(fields=["estudiante", "fecha"]),
+            # Listado general: orden por fecha con el id como desempate
+            models.Index(fields=["-fecha", "id"]),
+            # Estadísticas: cubre el GROUP BY materia, tipo y nota sin leer la tabla
+            models.Index(fields=["materia", "tipo_evaluacion", "nota"]),
+        ]
 
     def __str__(self):
         return f"{self.estudiante} - {self.materia} ({self.nota})"
 
+    def save(self, *args, **kwargs):
+        # Los signals (resúmenes, correo) quedan en la misma transacción
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
 
 class Asistencia(models.Model):
     ESTADOS = (
@@ -81,9 +179,162 @@ class Asistencia(models.Model):
     estado = models.CharField(max_length=20, choices=ESTADOS)
     observaciones = models.TextField(blank=True)
 
+    objects = RegistroEstudianteQuerySet.as_manager()
+
     class Meta:
         unique_together = ("estudiante", "materia", "fecha")
         ordering = ["-fecha"]
+        indexes = [
+            models.Index(fields=["materia", "fecha"]),
+            models.Index(fields=["materia", "estado"]),
+            models.Index(fields=["-fecha", "id"]),
+            # Estudiantes en riesgo: cubre el GROUP BY estudiante y materia con el conteo por estado
+            models.Index(fields=["materia", "estudiante", "estado"]),
+        ]
 
     def __str__(self):
         return f"{self.estudiante} - {self.materia} ({self.estado})"
+
+
+class ResumenCalificacion(models.Model):
+    """
+    Suma, cantidad, mínimo y máximo de notas por materia y tipo de evaluación.
+    Las filas con estudiante nulo acumulan toda la materia; las demás, un
+    estudiante en esa materia. Se mantiene desde academico/signals.py.
+    """
+
+    materia = models.ForeignKey(Materia, on_delete=models.CASCADE, related_name="resumenes")
+    estudiante = models.ForeignKey(
+        User, on_delete=models.CASCADE, null=True, blank=True, related_name="resumenes_calificacion"
+    )
+    tipo_evaluacion = models.CharField(max_length=20, choices=Calificacion.TIPO_EVALUACION)
+    suma = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cantidad = models.PositiveIntegerField(default=0)
+    minimo = models.DecimalField(max_digits=3, decimal_places=2)
+    maximo = models.DecimalField(max_digits=3, decimal_places=2)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["materia", "estudiante", "tipo_evaluacion"], name="resumen_unico_por_estudiante"
+            ),
+            models.UniqueConstraint(
+                fields=["materia", "tipo_evaluacion"],
+                condition=models.Q(estudiante__isnull=True),
+                name="resumen_unico_por_materia",
+            ),
+        ]
+
+    @property
+    def promedio(self):
+        return self.suma / self.cantidad if self.cantidad else None
+
+    def __str__(self):
+        return f"{self.materia} - {self.estudiante or 'Todos'} ({self.tipo_evaluacion})"
+
+
+class ResumenAsistenciaMensual(models.Model):
+    """Conteo de asistencias por materia, mes y estado. Se mantiene desde academico/signals.py."""
+
+    CAMPOS_ESTADO = {
+        "PRESENTE": "presentes",
+        "AUSENTE": "ausentes",
+        "TARDE": "tardes",
+        "JUSTIFICADO": "justificados",
+    }
+
+    materia = models.ForeignKey(Materia, on_delete=models.CASCADE, related_name="resumenes_asistencia")
+    mes = models.DateField(help_text="Primer día del mes.")
+    presentes = models.PositiveIntegerField(default=0)
+    ausentes = models.PositiveIntegerField(default=0)
+    tardes = models.PositiveIntegerField(default=0)
+    justificados = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("materia", "mes")
+        ordering = ["mes"]
+
+    @property
+    def total(self):
+        return self.presentes + self.ausentes + self.tardes + self.justificados
+
+    def __str__(self):
+        return f"{self.materia} - {self.mes:%Y-%m}"
+
+
+class VersionDatos(models.Model):
+    """Contador que aumenta con cada cambio en un dominio de datos (calificaciones, asistencias...)."""
+
+    dominio = models.CharField(max_length=30, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.dominio} v{self.version}"
+
+
+class TrabajoReporte(models.Model):
+    TIPOS = (
+        ("BOLETIN_PDF", "Boletín PDF"),
+        ("ACTA_PDF", "Acta de curso PDF"),
+        ("ESTUDIANTES", "Estudiantes por curso"),
+        ("CALIFICACIONES", "Calificaciones"),
+        ("ASISTENCIAS", "Asistencias"),
+        ("IMPORTAR_USUARIOS", "Importación de usuarios"),
+        ("BOLETINES_ZIP", "Boletines de un curso o periodo (ZIP)"),
+    )
+    ESTADOS = (
+        ("PENDIENTE", "Pendiente"),
+        ("EN_PROCESO", "En proceso"),
+        ("COMPLETADO", "Completado"),
+        ("ERROR", "Error"),
+    )
+    tipo = models.CharField(max_length=20, choices=TIPOS)
+    parametros = models.JSONField(default=dict, blank=True)
+    alcance = models.CharField(max_length=40, blank=True, help_text="Rol e id cuando el contenido depende del usuario.")
+    huella = models.CharField(max_length=64, db_index=True)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default="PENDIENTE")
+    solicitado_por = models.ForeignKey(User, on_delete=models.CASCADE, related_name="trabajos_reporte")
+    archivo = models.FileField(upload_to="reportes/", blank=True)
+    nombre_descarga = models.CharField(max_length=150, blank=True)
+    error = models.TextField(blank=True)
+    resumen = models.JSONField(default=dict, blank=True, help_text="Resultado a mostrar, p. ej. conteos de importación.")
+    intentos = models.PositiveSmallIntegerField(default=0)
+    trabajador = models.CharField(max_length=100, blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    iniciado = models.DateTimeField(null=True, blank=True)
+    terminado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-creado"]
+        indexes = [models.Index(fields=["estado", "creado"])]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} #{self.pk} ({self.estado})"
+
+
+class CorreoPendiente(models.Model):
+    """Bandeja de salida: se escribe junto con el cambio que la origina y la vacía ``enviar_correos``."""
+
+    ESTADOS = (
+        ("PENDIENTE", "Pendiente"),
+        ("ENVIANDO", "Enviando"),
+        ("ENVIADO", "Enviado"),
+        ("FALLIDO", "Fallido"),
+    )
+    destinatario = models.EmailField()
+    asunto = models.CharField(max_length=200)
+    cuerpo = models.TextField()
+    estado = models.CharField(max_length=20, choices=ESTADOS, default="PENDIENTE")
+    intentos = models.PositiveSmallIntegerField(default=0)
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    lote = models.CharField(max_length=32, blank=True)
+    ultimo_error = models.TextField(blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    enviado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["creado"]
+        indexes = [models.Index(fields=["estado", "proximo_intento"])]
+
+    def __str__(self):
+        return f"{self.asunto} -> {self.destinatario} ({self.estado})"
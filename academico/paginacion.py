@@ -0,0 +1,141 @@
+"""
+Paginación por llave (keyset) compartida por los listados.
+
+En lugar de OFFSET/LIMIT y COUNT(*), cada página se pide a partir de los
+valores de la última fila mostrada, por lo que su costo no crece con el tamaño
+de la tabla.
+"""
+
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+
+POR_PAGINA_DEFECTO = 25
+POR_PAGINA_MAXIMO = 100
+# Por encima de este número el total se muestra como "más de N".
+LIMITE_CONTEO = 1000
+
+
+class Pagina:
+    def __init__(self, objetos, siguiente, anterior, por_pagina, total, total_exacto):
+        self.objetos = objetos
+        self.siguiente = siguiente
+        self.anterior = anterior
+        self.por_pagina = por_pagina
+        self.total = total
+        self.total_exacto = total_exacto
+
+    def __iter__(self):
+        return iter(self.objetos)
+
+    def __len__(self):
+        return len(self.objetos)
+
+    @property
+    def tiene_otras_paginas(self):
+        return bool(self.siguiente or self.anterior)
+
+
+def por_pagina_pedida(request):
+    try:
+        valor = int(request.GET.get("por_pagina", POR_PAGINA_DEFECTO))
+    except (TypeError, ValueError):
+        return POR_PAGINA_DEFECTO
+    return max(1, min(valor, POR_PAGINA_MAXIMO))
+
+
+def _codificar(objeto, campos):
+    valores = [str(getattr(objeto, campo.lstrip("-"))) for campo in campos]
+    return base64.urlsafe_b64encode(json.dumps(valores).encode()).decode().rstrip("=")
+
+
+def _decodificar(cursor, modelo, campos):
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        if not isinstance(valores, list) or len(valores) != len(campos):
+            return None
+        return [modelo._meta.get_field(campo.lstrip("-")).to_python(v) for campo, v in zip(campos, valores)]
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def _filtro_llave(campos, valores, hacia_atras=False):
+    """
+    Construye (a > x) OR (a = x AND b > y) ... respetando la dirección de cada
+    campo del orden.
+    """
+    filtro = Q()
+    for i, campo in enumerate(campos):
+        nombre = campo.lstrip("-")
+        descendente = campo.startswith("-") != hacia_atras
+        condicion = Q(**{f"{nombre}__{'lt' if descendente else 'gt'}": valores[i]})
+        for previo, valor in zip(campos[:i], valores[:i]):
+            condicion &= Q(**{previo.lstrip("-"): valor})
+        filtro |= condicion
+    return filtro
+
+
+def _invertir(campos):
+    return [campo[1:] if campo.startswith("-") else f"-{campo}" for campo in campos]
+
+
+def contar_estimado(queryset):
+    """
+    Total aproximado sin recorrer toda la tabla.
+
+    En PostgreSQL una tabla sin filtros usa la estadística del planificador;
+    en los demás casos se cuenta como máximo LIMITE_CONTEO + 1 filas.
+    Devuelve (total, exacto).
+    """
+    conexion = connections[queryset.db]
+    if conexion.vendor == "postgresql" and not queryset.query.where:
+        with conexion.cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [queryset.model._meta.db_table])
+            fila = cursor.fetchone()
+        if fila and fila[0] > LIMITE_CONTEO:
+            return fila[0], False
+    total = queryset.order_by()[: LIMITE_CONTEO + 1].count()
+    if total > LIMITE_CONTEO:
+        return LIMITE_CONTEO, False
+    return total, True
+
+
+def paginar(request, queryset, orden):
+    """
+    Devuelve la página pedida en ``?despues=`` o ``?antes=`` ordenada por
+    ``orden``, que debe terminar en un campo único (normalmente ``id``).
+    """
+    campos = list(orden)
+    por_pagina = por_pagina_pedida(request)
+    total, total_exacto = contar_estimado(queryset)
+
+    despues = request.GET.get("despues")
+    antes = request.GET.get("antes")
+    hacia_atras = False
+    valores = None
+    if despues:
+        valores = _decodificar(despues, queryset.model, campos)
+    elif antes:
+        valores = _decodificar(antes, queryset.model, campos)
+        hacia_atras = valores is not None
+
+    qs = queryset.order_by(*(_invertir(campos) if hacia_atras else campos))
+    if valores is not None:
+        qs = qs.filter(_filtro_llave(campos, valores, hacia_atras))
+    objetos = list(qs[: por_pagina + 1])
+    hay_mas = len(objetos) > por_pagina
+    objetos = objetos[:por_pagina]
+    if hacia_atras:
+        objetos.reverse()
+
+    siguiente = anterior = None
+    if objetos:
+        if hay_mas or hacia_atras:
+            siguiente = _codificar(objetos[-1], campos)
+        if valores is not None and (hay_mas or not hacia_atras):
+            anterior = _codificar(objetos[0], campos)
+    return Pagina(objetos, siguiente, anterior, por_pagina, total, total_exacto)
@@ -0,0 +1,298 @@
+"""
+Herramientas de diagnóstico de rendimiento.
+
+Siembran datos sintéticos en la base actual (pensado para una base de prueba),
+recorren las rutas con cada rol capturando el SQL y revisan los planes de
+consulta de SQLite. Las usan los comandos ``verificar_planes`` y
+``medir_rendimiento``.
+"""
+
+import contextlib
+import datetime
+import logging
+import math
+import os
+import random
+import re
+import shutil
+import tempfile
+
+from django.contrib.auth.hashers import make_password
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+from accounts.models import PerfilDocente, PerfilEstudiante, User
+from . import busqueda, resumenes
+from .models import Asistencia, Calificacion, Curso, Materia, Matricula, TrabajoReporte
+
+ROLES = ("ADMIN", "DOCENTE", "ESTUDIANTE")
+# Vistas que modifican datos con GET o cierran la sesión
+EXCLUIDAS = {"logout", "usuario_toggle_activo"}
+MATERIAS_POR_CURSO = 5
+ESTUDIANTES_POR_CURSO = 40
+FECHAS_ASISTENCIA = 10
+TABLAS_GRANDES = {
+    modelo._meta.db_table
+    for modelo in (User, PerfilEstudiante, Matricula, Calificacion, Asistencia, TrabajoReporte)
+}
+FECHA_BASE = datetime.date(2024, 2, 5)
+
+
+@contextlib.contextmanager
+def base_temporal(en_archivo=False):
+    """
+    Trabaja sobre una base de prueba que se destruye al salir. Es en memoria
+    salvo con ``en_archivo``, necesario para abrirla desde varias conexiones.
+    """
+    # Los 403/404/405 esperados los informa cada comando en su salida
+    logging.getLogger("django.request").disabled = True
+    setup_test_environment()
+    nombre_original = connection.settings_dict["NAME"]
+    nombre_prueba = connection.settings_dict["TEST"]["NAME"]
+    carpeta = tempfile.mkdtemp() if en_archivo else None
+    if carpeta:
+        connection.settings_dict["TEST"]["NAME"] = os.path.join(carpeta, "rendimiento.sqlite3")
+    # Cachés propias en memoria: sus claves llevan ids y versiones que se repiten en cada base nueva,
+    # y los usuarios de prueba no deben llegar a la caché de sesiones compartida con el servidor
+    caches_prueba = override_settings(
+        CACHES={
+            alias: {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": f"rendimiento-{alias}"}
+            for alias in settings.CACHES
+        }
+    )
+    caches_prueba.enable()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    # Las demás bases (la réplica) apuntan a la de prueba, como en el runner de tests
+    espejos = {}
+    for conexion in connections.all():
+        if conexion.alias != connection.alias:
+            conexion.close()
+            espejos[conexion] = dict(conexion.settings_dict)
+            conexion.creation.set_as_test_mirror(connection.settings_dict)
+    for cache in caches.all():
+        cache.clear()
+    try:
+        yield
+    finally:
+        for conexion, original in espejos.items():
+            conexion.close()
+            conexion.settings_dict.update(original)
+        caches_prueba.disable()
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+        connection.settings_dict["TEST"]["NAME"] = nombre_prueba
+        if carpeta:
+            shutil.rmtree(carpeta, ignore_errors=True)
+        teardown_test_environment()
+        logging.getLogger("django.request").disabled = False
+
+
+def sembrar(estudiantes=200, semilla=1):
+    """
+    Crea un admin, los docentes, cursos, materias, matrículas, calificaciones
+    y asistencias proporcionales a ``estudiantes`` con bulk_create, y
+    reconstruye resúmenes e índice de búsqueda. Devuelve un dict con un objeto
+    de cada tipo para armar las URLs.
+    """
+    aleatorio = random.Random(semilla)
+    clave = make_password("clave-rendimiento")
+    total_cursos = max(2, estudiantes // ESTUDIANTES_POR_CURSO)
+
+    admin = User.objects.create(username="rend_admin", password=clave, role="ADMIN", is_staff=True)
+    docentes = User.objects.bulk_create(
+        [User(username=f"rend_docente{i}", password=clave, role="DOCENTE", first_name=f"Docente{i}") for i in range(total_cursos)]
+    )
+    PerfilDocente.objects.bulk_create([PerfilDocente(user=docente) for docente in docentes])
+    alumnos = User.objects.bulk_create(
+        [
+            User(username=f"rend_est{i}", password=clave, role="ESTUDIANTE", first_name=f"Nombre{i % 97}", last_name=f"Apellido{i % 89}")
+            for i in range(estudiantes)
+        ]
+    )
+    PerfilEstudiante.objects.bulk_create(
+        [PerfilEstudiante(user=alumno, codigo_estudiante=f"R{alumno.pk:07d}", programa="Sistemas") for alumno in alumnos]
+    )
+    cursos = Curso.objects.bulk_create(
+        [
+            Curso(nombre=f"Curso {i}", codigo=f"RC{i:04d}", periodo_academico=f"2024-{i % 2 + 1}", docente_responsable=docente)
+            for i, docente in enumerate(docentes)
+        ]
+    )
+    materias = Materia.objects.bulk_create(
+        [
+            Materia(nombre=f"Materia {c.codigo}-{j}", codigo=f"{c.codigo}M{j}", curso=c, intensidad_horaria=aleatorio.randint(2, 6))
+            for c in cursos
+            for j in range(MATERIAS_POR_CURSO)
+        ]
+    )
+    materias_por_curso = {}
+    for materia in materias:
+        materias_por_curso.setdefault(materia.curso_id, []).append(materia)
+    matriculas, calificaciones, asistencias = [], [], []
+    tipos = [tipo for tipo, _ in Calificacion.TIPO_EVALUACION]
+    estados = [estado for estado, _ in Asistencia.ESTADOS]
+    for i, alumno in enumerate(alumnos):
+        curso = cursos[i % len(cursos)]
+        matriculas.append(Matricula(estudiante=alumno, curso=curso))
+        for materia in materias_por_curso[curso.pk]:
+            for k, tipo in enumerate(tipos):
+                calificaciones.append(
+                    Calificacion(
+                        estudiante=alumno,
+                        materia=materia,
+                        nota=aleatorio.randint(0, 50) / 10,
+                        tipo_evaluacion=tipo,
+                        fecha=FECHA_BASE + datetime.timedelta(days=30 * k),
+                        creado_por=curso.docente_responsable,
+                    )
+                )
+            for dia in range(FECHAS_ASISTENCIA):
+                asistencias.append(
+                    Asistencia(
+                        estudiante=alumno,
+                        materia=materia,
+                        fecha=FECHA_BASE + datetime.timedelta(days=7 * dia),
+                        estado=aleatorio.choice(estados),
+                    )
+                )
+    Matricula.objects.bulk_create(matriculas, batch_size=resumenes.TAMANO_LOTE)
+    Calificacion.objects.bulk_create(calificaciones, batch_size=resumenes.TAMANO_LOTE)
+    Asistencia.objects.bulk_create(asistencias, batch_size=resumenes.TAMANO_LOTE)
+    resumenes.reconstruir()
+    resumenes.reconstruir_asistencias()
+    if busqueda.disponible():
+        busqueda.reconstruir()
+    # Con estadísticas el planificador elige como lo haría en producción
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+    curso = cursos[0]
+    estudiante = alumnos[0]
+    materia = materias_por_curso[curso.pk][0]
+    trabajo = TrabajoReporte.objects.create(
+        tipo="BOLETIN_PDF", parametros={"estudiante_id": estudiante.pk}, huella="rendimiento", solicitado_por=estudiante
+    )
+    return {
+        "ADMIN": admin,
+        "DOCENTE": curso.docente_responsable,
+        "ESTUDIANTE": estudiante,
+        "curso": curso,
+        "materia": materia,
+        "matricula": Matricula.objects.get(estudiante=estudiante, curso=curso),
+        "calificacion": Calificacion.objects.filter(estudiante=estudiante, materia=materia).first(),
+        "asistencia": Asistencia.objects.filter(estudiante=estudiante, materia=materia).first(),
+        "trabajo": trabajo,
+        "estudiante": estudiante,
+    }
+
+
+def _patrones(resolver, prefijo=""):
+    for patron in resolver.url_patterns:
+        if isinstance(patron, URLResolver):
+            yield from _patrones(patron, prefijo + str(patron.pattern))
+        elif isinstance(patron, URLPattern) and patron.name:
+            yield patron
+
+
+def _consulta(nombre, datos):
+    """Parámetros GET para que las vistas con filtros ejecuten sus consultas reales."""
+    fecha = FECHA_BASE.isoformat()
+    return {
+        "buscar": "query=nombre1",
+        "calificacion_masiva": f"materia={datos['materia'].pk}&tipo_evaluacion=PARCIAL&fecha={fecha}",
+        "asistencia_masiva": f"materia={datos['materia'].pk}&fecha={fecha}",
+        "exportar_calificaciones_excel": "format=csv",
+        "exportar_asistencias_excel": "format=csv",
+        "exportar_estudiantes_excel": "format=csv",
+        "reporte_boletines_zip": f"curso={datos['curso'].pk}",
+        "panel_promedios": f"curso={datos['curso'].pk}&periodo={datos['curso'].periodo_academico}",
+    }.get(nombre, "")
+
+
+def rutas(datos, modulo="academico.urls"):
+    """(nombre, url) de cada ruta GET de ``modulo`` (o de todo el proyecto si es None)."""
+    resolver = get_resolver(modulo) if modulo else get_resolver()
+    vistas = []
+    for patron in _patrones(resolver):
+        nombre = patron.name
+        if nombre in EXCLUIDAS or nombre.endswith("_eliminar"):
+            continue
+        kwargs = {}
+        for parametro in patron.pattern.converters:
+            if parametro == "estudiante_id":
+                kwargs[parametro] = datos["estudiante"].pk
+            elif parametro == "curso_id":
+                kwargs[parametro] = datos["curso"].pk
+            elif nombre.startswith("usuario"):
+                kwargs[parametro] = datos["estudiante"].pk
+            else:
+                objeto = next(datos[clave] for clave in ("trabajo", "calificacion", "asistencia", "matricula", "materia", "curso") if clave in nombre)
+                kwargs[parametro] = objeto.pk
+        url = reverse(nombre, kwargs=kwargs)
+        consulta = _consulta(nombre, datos)
+        vistas.append((nombre, f"{url}?{consulta}" if consulta else url))
+    return vistas
+
+
+def clientes(datos):
+    resultado = {}
+    for rol in ROLES:
+        # Un error 500 de una vista no debe cortar el recorrido
+        cliente = Client(raise_request_exception=False)
+        cliente.force_login(datos[rol])
+        resultado[rol] = cliente
+    return resultado
+
+
+def percentil(valores, porcentaje):
+    """Percentil por rango más cercano de una lista ya ordenada."""
+    indice = max(0, math.ceil(porcentaje / 100 * len(valores)) - 1)
+    return valores[indice]
+
+
+def pedir(cliente, url):
+    """
+    Hace la petición consumiendo el cuerpo; devuelve (respuesta, consultas
+    capturadas), incluidas las que el router envía a la réplica.
+    """
+    with contextlib.ExitStack() as pila:
+        capturas = [pila.enter_context(CaptureQueriesContext(conexion)) for conexion in connections.all()]
+        respuesta = cliente.get(url)
+        if respuesta.streaming:
+            for _ in respuesta.streaming_content:
+                pass
+    return respuesta, [consulta for captura in capturas for consulta in captura.captured_queries]
+
+
+_ALIAS = re.compile(r'"(\w+)" (U\d+|T\d+)\b')
+_ESCANEO = re.compile(r"^SCAN (\w+)$")
+
+
+def plan(sql):
+    """Líneas de detalle de EXPLAIN QUERY PLAN; vacío si la sentencia no es un SELECT."""
+    if not sql.lstrip().upper().startswith("SELECT"):
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return [fila[3] for fila in cursor.fetchall()]
+
+
+def escaneos_completos(sql, detalles):
+    """Tablas grandes que el plan recorre completas sin índice."""
+    alias = {corto: tabla for tabla, corto in _ALIAS.findall(sql)}
+    tablas = []
+    for detalle in detalles:
+        coincidencia = _ESCANEO.match(detalle)
+        if coincidencia:
+            tabla = alias.get(coincidencia.group(1), coincidencia.group(1))
+            if tabla in TABLAS_GRANDES:
+                tablas.append(tabla)
+    return tablas
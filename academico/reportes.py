@@ -0,0 +1,308 @@
+"""
+Generación de reportes independiente de la petición HTTP.
+
+Las vistas síncronas y el worker de trabajos en segundo plano usan estas
+funciones, que escriben el PDF en cualquier destino tipo archivo o devuelven
+las filas de una exportación.
+"""
+
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import landscape, letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from accounts.models import User
+from .definitivas import TIPOS, definitivas, definitivas_curso, pesos_materias
+from .exportacion import TAMANO_CURSOR, nombre_completo
+from .models import Asistencia, Calificacion, Materia, Matricula
+
+COLUMNAS_ESTUDIANTES = [("usuario", "Usuario"), ("nombre", "Nombre"), ("codigo", "Código"), ("email", "Email")]
+COLUMNAS_CALIFICACIONES = [
+    ("estudiante", "Estudiante"),
+    ("materia", "Materia"),
+    ("curso", "Curso"),
+    ("nota", "Nota"),
+    ("tipo", "Tipo"),
+    ("fecha", "Fecha"),
+]
+COLUMNAS_ASISTENCIAS = [("estudiante", "Estudiante"), ("materia", "Materia"), ("fecha", "Fecha"), ("estado", "Estado")]
+# Acta en carta horizontal: filas de estudiantes y columnas de materias por página, medidas en puntos
+FILAS_POR_PAGINA = 28
+MATERIAS_POR_PAGINA = 6
+MARGEN = 36
+ANCHO_ESTUDIANTE = 190
+ANCHO_CODIGO = 60
+ANCHO_MATERIA = 68
+ALTO_ENCABEZADO = 44
+ALTO_FILA = 14
+
+
+def datos_boletines(estudiante_ids):
+    """
+    Cabecera, calificaciones y definitivas del boletín de varios estudiantes
+    en tres consultas, como datos simples que se pueden enviar a otro proceso.
+    """
+    datos = {}
+    cabeceras = (
+        User.objects.filter(pk__in=estudiante_ids)
+        .order_by("username")
+        .values_list("pk", "username", "first_name", "last_name", "perfil_estudiante__codigo_estudiante")
+    )
+    for pk, username, first_name, last_name, codigo in cabeceras:
+        datos[pk] = {
+            "id": pk,
+            "username": username,
+            "cabecera": (first_name, last_name, codigo),
+            "filas": [],
+            "definitivas": [],
+        }
+    filas = (
+        Calificacion.objects.filter(estudiante_id__in=estudiante_ids)
+        .order_by("estudiante_id", "-fecha", "pk")
+        .values_list("estudiante_id", "pk", "materia__nombre", "tipo_evaluacion", "nota", "fecha")
+    )
+    for estudiante_id, *fila in filas.iterator(chunk_size=TAMANO_CURSOR):
+        datos[estudiante_id]["filas"].append(tuple(fila))
+    notas_definitivas = definitivas(Calificacion.objects.filter(estudiante_id__in=estudiante_ids))
+    # Por nombre de materia y, entre homónimas, por id
+    por_materia = sorted(notas_definitivas, key=lambda fila: (fila[2], fila[1]))
+    for estudiante_id, materia_id, materia, promedios, definitiva in por_materia:
+        datos[estudiante_id]["definitivas"].append((materia, promedios, definitiva))
+    return datos
+
+
+def dibujar_boletin(datos, destino):
+    """Dibuja el boletín a partir de ``datos_boletines`` sin consultar la base."""
+    first_name, last_name, codigo = datos["cabecera"]
+    filas = datos["filas"]
+    notas = [definitiva for _, _, definitiva in datos["definitivas"] if definitiva is not None]
+    promedio_global = sum(notas) / len(notas) if notas else 0
+    tipos = dict(Calificacion.TIPO_EVALUACION)
+
+    doc = SimpleDocTemplate(destino, pagesize=letter)
+    elements = []
+    styles = getSampleStyleSheet()
+    elements.append(Paragraph("Sistema de Gestión Académica - Boletín", styles["Title"]))
+    elements.append(Paragraph(f"Estudiante: {nombre_completo(first_name, last_name)}", styles["Normal"]))
+    elements.append(Paragraph(f"Código: {codigo or 'N/A'}", styles["Normal"]))
+    elements.append(Spacer(1, 12))
+
+    data = [["Materia", "Tipo", "Nota", "Fecha"]]
+    for _, materia, tipo, nota, fecha in filas:
+        data.append([materia, tipos.get(tipo, tipo), float(nota), fecha.strftime("%Y-%m-%d")])
+    table = Table(data, hAlign="LEFT")
+    table.setStyle(TableStyle([("BACKGROUND", (0, 0), (-1, 0), colors.lightblue), ("GRID", (0, 0), (-1, -1), 0.5, colors.grey)]))
+    elements.append(table)
+    elements.append(Spacer(1, 12))
+
+    elements.append(Paragraph("Notas definitivas (promedio ponderado por tipo de evaluación)", styles["Heading3"]))
+    data = [["Materia", *(tipos[tipo] for tipo in TIPOS), "Definitiva"]]
+    for materia, promedios, definitiva in datos["definitivas"]:
+        data.append([materia, *(_nota(promedio) for promedio in promedios), _nota(definitiva)])
+    table = Table(data, hAlign="LEFT")
+    table.setStyle(TableStyle([("BACKGROUND", (0, 0), (-1, 0), colors.lightblue), ("GRID", (0, 0), (-1, -1), 0.5, colors.grey)]))
+    elements.append(table)
+    elements.append(Spacer(1, 12))
+    # Media simple de las definitivas ponderadas, no el promedio de todas las notas sueltas
+    elements.append(
+        Paragraph(f"Promedio general (de las definitivas): {round(promedio_global, 2)}", styles["Heading3"])
+    )
+
+    doc.build(elements)
+
+
+def escribir_boletin_pdf(estudiante, destino):
+    dibujar_boletin(datos_boletines([estudiante.pk])[estudiante.pk], destino)
+
+
+def datos_acta(curso):
+    """
+    Estudiantes matriculados, materias con sus pesos y la nota definitiva de
+    cada par (estudiante, materia), que sale de una sola agregación
+    condicional guardada en caché (``definitivas.definitivas_curso``).
+    """
+    estudiantes = list(
+        Matricula.objects.filter(curso=curso)
+        .order_by("estudiante__last_name", "estudiante__first_name", "estudiante__username")
+        .values_list(
+            "estudiante_id",
+            "estudiante__first_name",
+            "estudiante__last_name",
+            "estudiante__perfil_estudiante__codigo_estudiante",
+        )
+    )
+    materias = list(
+        pesos_materias(Materia.objects.filter(curso=curso))
+        .order_by("nombre", "pk")
+        .values_list("pk", "nombre", *(f"peso_efectivo_{tipo.lower()}" for tipo in TIPOS))
+    )
+    notas = {
+        (estudiante_id, materia_id): definitiva
+        for estudiante_id, materia_id, _, _, definitiva in definitivas_curso(curso.pk)
+        if definitiva is not None
+    }
+    return {
+        "curso": (curso.nombre, curso.codigo, curso.periodo_academico),
+        "estudiantes": estudiantes,
+        "materias": materias,
+        "notas": notas,
+    }
+
+
+def _nota(valor):
+    return "—" if valor is None else f"{valor:.2f}"
+
+
+def _promedio(valores):
+    return _nota(sum(valores) / len(valores) if valores else None)
+
+
+def _pie_de_pagina(canvas, doc):
+    canvas.saveState()
+    canvas.setFont("Helvetica", 8)
+    canvas.drawRightString(doc.pagesize[0] - doc.rightMargin, doc.bottomMargin / 2, f"Página {doc.page}")
+    canvas.restoreState()
+
+
+def dibujar_acta(datos, destino):
+    """
+    Acta con una fila por estudiante y una columna por materia (nota
+    definitiva). Las filas se parten en tablas de FILAS_POR_PAGINA con el encabezado
+    repetido y las materias en grupos de MATERIAS_POR_PAGINA, así cada tabla
+    cabe en una página y reportlab no tiene que dividir una tabla gigante.
+    """
+    nombre, codigo, periodo = datos["curso"]
+    notas = datos["notas"]
+    tipos = dict(Calificacion.TIPO_EVALUACION)
+    styles = getSampleStyleSheet()
+    elements = [
+        Paragraph(f"Acta de curso - {nombre}", styles["Title"]),
+        Paragraph(f"Código: {codigo} · Periodo: {periodo} · Estudiantes: {len(datos['estudiantes'])}", styles["Normal"]),
+        Paragraph(
+            "Notas definitivas ponderadas. Pesos de cada materia en %: "
+            + ", ".join(f"{tipo[0]} = {tipos[tipo]}" for tipo in TIPOS),
+            styles["Normal"],
+        ),
+        Spacer(1, 12),
+    ]
+
+    filas = []
+    por_materia = {materia[0]: [] for materia in datos["materias"]}
+    for estudiante_id, first_name, last_name, codigo_estudiante in datos["estudiantes"]:
+        definitivas_estudiante = []
+        celdas = []
+        for materia_id in por_materia:
+            definitiva = notas.get((estudiante_id, materia_id))
+            if definitiva is not None:
+                definitivas_estudiante.append(definitiva)
+                por_materia[materia_id].append(definitiva)
+            celdas.append(_nota(definitiva))
+        nombre_estudiante = ", ".join(parte for parte in (last_name, first_name) if parte)
+        filas.append([nombre_estudiante, codigo_estudiante or "", *celdas, _promedio(definitivas_estudiante)])
+    filas.append(
+        [
+            "Promedio del curso",
+            "",
+            *(_promedio(valores) for valores in por_materia.values()),
+            _promedio([valor for valores in por_materia.values() for valor in valores]),
+        ]
+    )
+
+    materias = [
+        f"{escape(materia)}<br/><font size=6>"
+        + " ".join(f"{tipo[0]}{peso_tipo}" for tipo, peso_tipo in zip(TIPOS, pesos))
+        + "</font>"
+        for _, materia, *pesos in datos["materias"]
+    ]
+    grupos = [range(i, min(i + MATERIAS_POR_PAGINA, len(materias))) for i in range(0, len(materias), MATERIAS_POR_PAGINA)]
+    estilo_materia = ParagraphStyle("materia", parent=styles["BodyText"], fontSize=7, leading=8)
+    estilo = TableStyle(
+        [
+            ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+            ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+            ("FONTSIZE", (0, 0), (-1, -1), 8),
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+            ("ALIGN", (2, 1), (-1, -1), "RIGHT"),
+            ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.whitesmoke]),
+        ]
+    )
+    for numero, grupo in enumerate(grupos or [range(0)]):
+        encabezado = ["Estudiante", "Código", *(Paragraph(materias[i], estilo_materia) for i in grupo), "Promedio"]
+        # Anchos y altos fijos: reportlab no mide cada celda y la tabla cabe en la página
+        anchos = [ANCHO_ESTUDIANTE, ANCHO_CODIGO, *([ANCHO_MATERIA] * len(grupo)), ANCHO_CODIGO]
+        for inicio in range(0, len(filas), FILAS_POR_PAGINA):
+            if numero or inicio:
+                elements.append(PageBreak())
+            if len(grupos) > 1 and not inicio:
+                elements.append(Paragraph(f"Materias {grupo.start + 1} a {grupo.stop} de {len(materias)}", styles["Heading4"]))
+            bloque = [[fila[0], fila[1], *(fila[2 + i] for i in grupo), fila[-1]] for fila in filas[inicio : inicio + FILAS_POR_PAGINA]]
+            table = Table(
+                [encabezado, *bloque],
+                colWidths=anchos,
+                rowHeights=[ALTO_ENCABEZADO] + [ALTO_FILA] * len(bloque),
+                hAlign="LEFT",
+                repeatRows=1,
+            )
+            table.setStyle(estilo)
+            elements.append(table)
+
+    doc = SimpleDocTemplate(
+        destino, pagesize=landscape(letter), leftMargin=MARGEN, rightMargin=MARGEN, topMargin=MARGEN, bottomMargin=MARGEN
+    )
+    doc.build(elements, onFirstPage=_pie_de_pagina, onLaterPages=_pie_de_pagina)
+
+
+def escribir_acta_pdf(curso, destino):
+    dibujar_acta(datos_acta(curso), destino)
+
+
+def registros_exportables(usuario, filtros, modelo):
+    """Calificaciones o asistencias visibles para el rol, con los filtros curso/materia/desde/hasta."""
+    registros = modelo.objects.para_usuario(usuario)
+    curso_id = filtros.get("curso")
+    materia_id = filtros.get("materia")
+    desde_str = filtros.get("desde")
+    hasta_str = filtros.get("hasta")
+    if curso_id:
+        registros = registros.filter(materia__curso_id=curso_id)
+    if materia_id:
+        registros = registros.filter(materia_id=materia_id)
+    if desde_str:
+        registros = registros.filter(fecha__gte=desde_str)
+    if hasta_str:
+        registros = registros.filter(fecha__lte=hasta_str)
+    return registros
+
+
+def filas_estudiantes(curso):
+    estudiantes = User.objects.filter(matriculas__curso=curso, role="ESTUDIANTE").values_list(
+        "username", "first_name", "last_name", "perfil_estudiante__codigo_estudiante", "email"
+    )
+    for usuario, nombre, apellido, codigo, email in estudiantes.iterator(chunk_size=TAMANO_CURSOR):
+        yield usuario, nombre_completo(nombre, apellido), codigo or "", email
+
+
+def filas_calificaciones(usuario, filtros):
+    tipos = dict(Calificacion.TIPO_EVALUACION)
+    calificaciones = registros_exportables(usuario, filtros, Calificacion).values_list(
+        "estudiante__first_name",
+        "estudiante__last_name",
+        "materia__nombre",
+        "materia__curso__nombre",
+        "nota",
+        "tipo_evaluacion",
+        "fecha",
+    )
+    for nombre, apellido, materia, curso, nota, tipo, fecha in calificaciones.iterator(chunk_size=TAMANO_CURSOR):
+        yield nombre_completo(nombre, apellido), materia, curso, float(nota), tipos.get(tipo, tipo), fecha.strftime("%Y-%m-%d")
+
+
+def filas_asistencias(usuario, filtros):
+    estados = dict(Asistencia.ESTADOS)
+    asistencias = registros_exportables(usuario, filtros, Asistencia).values_list(
+        "estudiante__first_name", "estudiante__last_name", "materia__nombre", "fecha", "estado"
+    )
+    for nombre, apellido, materia, fecha, estado in asistencias.iterator(chunk_size=TAMANO_CURSOR):
+        yield nombre_completo(nombre, apellido), materia, fecha.strftime("%Y-%m-%d"), estados.get(estado, estado)
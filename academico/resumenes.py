@@ -0,0 +1,190 @@
+"""
+Mantenimiento incremental de ResumenCalificacion y ResumenAsistenciaMensual.
+
+Cada calificación suma en dos filas: la del estudiante en la materia y la de
+la materia completa (estudiante nulo), ambas por tipo de evaluación. Cada
+asistencia suma en el contador de su estado para la materia y el mes.
+"""
+
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, F, Max, Min, Q, Sum, Value
+from django.db.models.functions import Greatest, Least, TruncMonth
+
+from .models import Asistencia, Calificacion, ResumenAsistenciaMensual, ResumenCalificacion
+
+TAMANO_LOTE = 1000
+
+
+def _filtros(materia_id, estudiante_id, tipo_evaluacion):
+    base = {"materia_id": materia_id, "tipo_evaluacion": tipo_evaluacion}
+    return [{**base, "estudiante_id": estudiante_id}, {**base, "estudiante__isnull": True}]
+
+
+def sumar(materia_id, estudiante_id, tipo_evaluacion, nota):
+    valor = Value(nota, output_field=DecimalField(max_digits=3, decimal_places=2))
+    for filtro, estudiante in zip(_filtros(materia_id, estudiante_id, tipo_evaluacion), (estudiante_id, None)):
+        cambios = {
+            "suma": F("suma") + valor,
+            "cantidad": F("cantidad") + 1,
+            "minimo": Least("minimo", valor),
+            "maximo": Greatest("maximo", valor),
+        }
+        if ResumenCalificacion.objects.filter(**filtro).update(**cambios):
+            continue
+        try:
+            with transaction.atomic():
+                ResumenCalificacion.objects.create(
+                    materia_id=materia_id,
+                    estudiante_id=estudiante,
+                    tipo_evaluacion=tipo_evaluacion,
+                    suma=nota,
+                    cantidad=1,
+                    minimo=nota,
+                    maximo=nota,
+                )
+        except IntegrityError:
+            # Otra petición creó la fila entre el UPDATE y el INSERT.
+            ResumenCalificacion.objects.filter(**filtro).update(**cambios)
+
+
+def restar(materia_id, estudiante_id, tipo_evaluacion, nota):
+    """
+    Descuenta una nota que ya no está en la tabla de calificaciones. Si era el
+    mínimo o el máximo del grupo, estos se recalculan solo para ese grupo.
+    """
+    for filtro in _filtros(materia_id, estudiante_id, tipo_evaluacion):
+        resumenes = ResumenCalificacion.objects.filter(**filtro)
+        resumenes.update(suma=F("suma") - nota, cantidad=F("cantidad") - 1)
+        resumen = resumenes.first()
+        if resumen is None:
+            continue
+        if resumen.cantidad <= 0:
+            resumen.delete()
+        elif nota <= resumen.minimo or nota >= resumen.maximo:
+            grupo = {k: v for k, v in filtro.items() if k != "estudiante__isnull"}
+            extremos = Calificacion.objects.filter(**grupo).aggregate(minimo=Min("nota"), maximo=Max("nota"))
+            if extremos["minimo"] is not None:
+                resumenes.update(**extremos)
+
+
+def reconstruir():
+    """Regenera todos los resúmenes a partir de las calificaciones."""
+    agregados = {"suma": Sum("nota"), "cantidad": Count("id"), "minimo": Min("nota"), "maximo": Max("nota")}
+    por_estudiante = (
+        Calificacion.objects.order_by()
+        .values("materia_id", "estudiante_id", "tipo_evaluacion")
+        .annotate(**agregados)
+    )
+    por_materia = Calificacion.objects.order_by().values("materia_id", "tipo_evaluacion").annotate(**agregados)
+    total = 0
+    with transaction.atomic():
+        ResumenCalificacion.objects.all().delete()
+        for consulta in (por_estudiante, por_materia):
+            lote = []
+            for fila in consulta.iterator():
+                lote.append(ResumenCalificacion(**fila))
+                if len(lote) >= TAMANO_LOTE:
+                    ResumenCalificacion.objects.bulk_create(lote)
+                    total += len(lote)
+                    lote = []
+            ResumenCalificacion.objects.bulk_create(lote)
+            total += len(lote)
+    return total
+
+
+def recalcular_grupo(materia_id, tipo_evaluacion):
+    """
+    Recalcula las filas de una materia y tipo de evaluación tras cambios
+    masivos (bulk_create/bulk_update no emiten signals).
+    """
+    agregados = {"suma": Sum("nota"), "cantidad": Count("id"), "minimo": Min("nota"), "maximo": Max("nota")}
+    calificaciones = Calificacion.objects.order_by().filter(materia_id=materia_id, tipo_evaluacion=tipo_evaluacion)
+    filas = list(calificaciones.values("materia_id", "estudiante_id", "tipo_evaluacion").annotate(**agregados))
+    filas += list(calificaciones.values("materia_id", "tipo_evaluacion").annotate(**agregados))
+    with transaction.atomic():
+        ResumenCalificacion.objects.filter(materia_id=materia_id, tipo_evaluacion=tipo_evaluacion).delete()
+        ResumenCalificacion.objects.bulk_create([ResumenCalificacion(**fila) for fila in filas], batch_size=TAMANO_LOTE)
+
+
+def anotar_promedios(materias):
+    """
+    Evalúa ``materias`` agregando ``promedio`` (Decimal o None) a cada una a
+    partir de las filas de materia completa, en una sola consulta.
+    """
+    de_materia = Q(resumenes__estudiante__isnull=True)
+    materias = materias.annotate(
+        suma_notas=Sum("resumenes__suma", filter=de_materia),
+        cantidad_notas=Sum("resumenes__cantidad", filter=de_materia),
+    )
+    resultado = list(materias)
+    for materia in resultado:
+        materia.promedio = materia.suma_notas / materia.cantidad_notas if materia.cantidad_notas else None
+    return resultado
+
+
+def contar_asistencia(materia_id, fecha, estado, delta):
+    """Suma ``delta`` (1 o -1) al contador del estado en el mes de ``fecha``."""
+    campo = ResumenAsistenciaMensual.CAMPOS_ESTADO[estado]
+    # El default de fecha es timezone.now: convertir antes de truncar al mes
+    fecha = Asistencia._meta.get_field("fecha").to_python(fecha)
+    filtro = {"materia_id": materia_id, "mes": fecha.replace(day=1)}
+    resumenes = ResumenAsistenciaMensual.objects.filter(**filtro)
+    if resumenes.update(**{campo: F(campo) + delta}):
+        if delta < 0:
+            resumenes.filter(presentes=0, ausentes=0, tardes=0, justificados=0).delete()
+        return
+    if delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            ResumenAsistenciaMensual.objects.create(**filtro, **{campo: delta})
+    except IntegrityError:
+        resumenes.update(**{campo: F(campo) + delta})
+
+
+def reconstruir_asistencias():
+    """Regenera los conteos mensuales de asistencia."""
+    conteos = {
+        campo: Count("id", filter=Q(estado=estado)) for estado, campo in ResumenAsistenciaMensual.CAMPOS_ESTADO.items()
+    }
+    filas = (
+        Asistencia.objects.order_by()
+        .annotate(mes=TruncMonth("fecha"))
+        .values("materia_id", "mes")
+        .annotate(**conteos)
+    )
+    with transaction.atomic():
+        ResumenAsistenciaMensual.objects.all().delete()
+        creados = ResumenAsistenciaMensual.objects.bulk_create(
+            (ResumenAsistenciaMensual(**fila) for fila in filas.iterator()), batch_size=TAMANO_LOTE
+        )
+    return len(creados)
+
+
+def recalcular_mes(materia_id, fecha):
+    """Recalcula el conteo de una materia y mes tras cambios masivos."""
+    mes = fecha.replace(day=1)
+    siguiente = (mes.replace(day=28) + timedelta(days=4)).replace(day=1)
+    conteos = {
+        campo: Count("id", filter=Q(estado=estado)) for estado, campo in ResumenAsistenciaMensual.CAMPOS_ESTADO.items()
+    }
+    totales = Asistencia.objects.filter(materia_id=materia_id, fecha__gte=mes, fecha__lt=siguiente).aggregate(**conteos)
+    with transaction.atomic():
+        ResumenAsistenciaMensual.objects.filter(materia_id=materia_id, mes=mes).delete()
+        if any(totales.values()):
+            ResumenAsistenciaMensual.objects.create(materia_id=materia_id, mes=mes, **totales)
+
+
+def asistencia_mensual(materias):
+    """Presentes y total de asistencias por mes para las materias dadas."""
+    return (
+        ResumenAsistenciaMensual.objects.filter(materia__in=materias)
+        .values("mes")
+        .annotate(
+            total=Sum(F("presentes") + F("ausentes") + F("tardes") + F("justificados")),
+            total_presentes=Sum("presentes"),
+        )
+        .order_by("mes")
+    )
@@ -0,0 +1,122 @@
+"""
+Alerta temprana de estudiantes en riesgo por curso.
+
+Un estudiante está en riesgo en un curso si su promedio (las definitivas de
+sus materias ponderadas por ``intensidad_horaria``) queda por debajo de
+RIESGO_NOTA_MINIMA o si su inasistencia supera RIESGO_INASISTENCIA_MAXIMA por
+ciento. La inasistencia cuenta horas: cada AUSENTE vale la intensidad horaria
+de su materia, sobre las horas de todas las clases registradas.
+
+Las definitivas salen de ``definitivas.definitivas_cursos`` (en caché por
+curso) y las asistencias de una consulta agrupada por estudiante y materia;
+ambas se cruzan en memoria, sin consultas por estudiante.
+"""
+
+from django.conf import settings
+from django.db.models import Count, Q
+
+from .definitivas import definitivas_cursos
+from .models import Asistencia, Matricula
+
+
+class _Acumulado:
+    __slots__ = ("puntos", "horas_con_nota", "horas_ausente", "horas_registradas", "materias_bajas")
+
+    def __init__(self):
+        self.puntos = 0.0
+        self.horas_con_nota = 0
+        self.horas_ausente = 0
+        self.horas_registradas = 0
+        self.materias_bajas = []
+
+
+def estudiantes_en_riesgo(materias, nota_minima=None, inasistencia_maxima=None):
+    """
+    Estudiantes en riesgo en las ``materias`` dadas (ya filtradas según el
+    rol), uno por estudiante y curso, del más comprometido al menos. Cada
+    elemento es un dict con el estudiante, el curso, el promedio, el porcentaje
+    de inasistencia, las materias bajo la nota mínima y los motivos.
+    """
+    nota_minima = settings.RIESGO_NOTA_MINIMA if nota_minima is None else nota_minima
+    inasistencia_maxima = settings.RIESGO_INASISTENCIA_MAXIMA if inasistencia_maxima is None else inasistencia_maxima
+    info = {
+        pk: (nombre, curso_id, curso_nombre, intensidad)
+        for pk, nombre, curso_id, curso_nombre, intensidad in materias.order_by().values_list(
+            "pk", "nombre", "curso_id", "curso__nombre", "intensidad_horaria"
+        )
+    }
+    if not info:
+        return []
+
+    acumulados = {}
+    for filas in definitivas_cursos({curso_id for _, curso_id, _, _ in info.values()}).values():
+        for estudiante_id, materia_id, _, _, definitiva in filas:
+            if materia_id not in info or definitiva is None:
+                continue
+            nombre, curso_id, _, intensidad = info[materia_id]
+            acumulado = acumulados.setdefault((estudiante_id, curso_id), _Acumulado())
+            acumulado.puntos += definitiva * intensidad
+            acumulado.horas_con_nota += intensidad
+            if definitiva < nota_minima:
+                acumulado.materias_bajas.append(nombre)
+
+    asistencias = (
+        Asistencia.objects.filter(materia_id__in=info)
+        .order_by()
+        .values("estudiante_id", "materia_id")
+        .annotate(ausencias=Count("pk", filter=Q(estado="AUSENTE")), registradas=Count("pk"))
+        .values_list("estudiante_id", "materia_id", "ausencias", "registradas")
+    )
+    for estudiante_id, materia_id, ausencias, registradas in asistencias:
+        _, curso_id, _, intensidad = info[materia_id]
+        acumulado = acumulados.setdefault((estudiante_id, curso_id), _Acumulado())
+        acumulado.horas_ausente += ausencias * intensidad
+        acumulado.horas_registradas += registradas * intensidad
+
+    cursos = {curso_id: curso_nombre for _, curso_id, curso_nombre, _ in info.values()}
+    resultado = []
+    for (estudiante_id, curso_id), acumulado in acumulados.items():
+        promedio = acumulado.puntos / acumulado.horas_con_nota if acumulado.horas_con_nota else None
+        inasistencia = (
+            acumulado.horas_ausente * 100 / acumulado.horas_registradas if acumulado.horas_registradas else None
+        )
+        motivos = []
+        if promedio is not None and promedio < nota_minima:
+            motivos.append("Promedio bajo")
+        if inasistencia is not None and inasistencia > inasistencia_maxima:
+            motivos.append("Inasistencia alta")
+        if motivos:
+            resultado.append(
+                {
+                    "estudiante_id": estudiante_id,
+                    "curso_id": curso_id,
+                    "curso": cursos[curso_id],
+                    "promedio": None if promedio is None else round(promedio, 2),
+                    "inasistencia": None if inasistencia is None else round(inasistencia, 1),
+                    "materias_bajas": sorted(acumulado.materias_bajas),
+                    "motivos": motivos,
+                }
+            )
+    resultado.sort(key=_gravedad)
+    return resultado
+
+
+def _gravedad(fila):
+    # Primero quienes tienen ambos motivos, luego el promedio más bajo y la mayor inasistencia
+    promedio = fila["promedio"] if fila["promedio"] is not None else float("inf")
+    return (-len(fila["motivos"]), promedio, -(fila["inasistencia"] or 0))
+
+
+def con_estudiantes(filas):
+    """Agrega username y nombre a ``filas`` con una sola consulta."""
+    # Por las matrículas de los cursos: con muchos estudiantes un IN sobre los
+    # usuarios terminaría recorriendo la tabla completa
+    nombres = {
+        pk: (username, f"{nombre} {apellido}".strip())
+        for pk, username, nombre, apellido in Matricula.objects.filter(
+            curso_id__in={fila["curso_id"] for fila in filas}, estudiante_id__in={fila["estudiante_id"] for fila in filas}
+        ).values_list("estudiante_id", "estudiante__username", "estudiante__first_name", "estudiante__last_name")
+    }
+    for fila in filas:
+        fila["username"], fila["nombre"] = nombres.get(fila["estudiante_id"], ("", ""))
+    return filas
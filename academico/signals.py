@@ -1,28 +1,162 @@
-from django.conf import settings
-from django.core.mail import send_mail
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from .models import Calificacion
+from accounts.models import PerfilEstudiante, User
+from gestion_academica import metricas
+from . import busqueda, cache_pdf, correos, resumenes, versiones
+from .models import Asistencia, Calificacion, Curso, Materia, Matricula
+
+DOMINIO_POR_MODELO = {
+    Calificacion: "calificaciones",
+    Asistencia: "asistencias",
+    Matricula: "matriculas",
+    Curso: "cursos",
+    Materia: "cursos",
+    User: "usuarios",
+    PerfilEstudiante: "usuarios",
+}
+
+
+@receiver(pre_save, sender=Calificacion)
+def recordar_calificacion_previa(sender, instance, raw=False, **kwargs):
+    # Guardar los valores anteriores para poder descontarlos del resumen
+    instance._resumen_previo = None
+    if instance.pk and not raw:
+        instance._resumen_previo = (
+            Calificacion.objects.filter(pk=instance.pk)
+            .values_list("materia_id", "estudiante_id", "tipo_evaluacion", "nota")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Calificacion)
+def actualizar_resumen_calificacion(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    actual = (instance.materia_id, instance.estudiante_id, instance.tipo_evaluacion, instance.nota)
+    previo = getattr(instance, "_resumen_previo", None)
+    if previo == actual:
+        return
+    if previo:
+        resumenes.restar(*previo)
+    resumenes.sumar(*actual)
+
+
+@receiver(post_delete, sender=Calificacion)
+def descontar_resumen_calificacion(sender, instance, **kwargs):
+    resumenes.restar(instance.materia_id, instance.estudiante_id, instance.tipo_evaluacion, instance.nota)
 
 
 @receiver(post_save, sender=Calificacion)
-def notificar_calificacion(sender, instance, created, **kwargs):
-    # Notificar solo calificaciones finales
-    if instance.tipo_evaluacion != "FINAL":
-        return
-    if not instance.estudiante.email:
-        return
-    subject = "Nueva calificación final registrada"
-    message = (
-        f"Hola {instance.estudiante.get_full_name() or instance.estudiante.username},\n\n"
-        f"Se registró/actualizó tu calificación final en {instance.materia.nombre}.\n"
-        f"Nota: {instance.nota}\n"
-        f"Fecha: {instance.fecha}\n"
-        f"Observaciones: {instance.observaciones or 'N/A'}\n\n"
-        "Por favor, revisa la plataforma para más detalles."
-    )
-    try:
-        send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [instance.estudiante.email])
-    except Exception:
-        # Evitar que errores de email rompan el flujo principal
-        pass
+@receiver(post_delete, sender=Calificacion)
+def invalidar_cursos_calificacion(sender, instance, raw=False, **kwargs):
+    # La huella ya evita servir un PDF viejo; esto libera el espacio de inmediato.
+    # La versión de notas del curso invalida sus definitivas en caché.
+    if raw:
+        return
+    estudiantes, materias = {instance.estudiante_id}, {instance.materia_id}
+    previo = getattr(instance, "_resumen_previo", None)
+    if previo:
+        materias.add(previo[0])
+        estudiantes.add(previo[1])
+    cursos = list(Materia.objects.filter(pk__in=materias).values_list("curso_id", flat=True))
+    cache_pdf.invalidar_calificaciones(estudiantes, cursos)
+    versiones.incrementar_notas(cursos)
+
+
+@receiver(pre_save, sender=Materia)
+def recordar_curso_previo(sender, instance, raw=False, **kwargs):
+    instance._curso_previo = None
+    if instance.pk and not raw:
+        instance._curso_previo = Materia.objects.filter(pk=instance.pk).values_list("curso_id", flat=True).first()
+
+
+@receiver(post_save, sender=Materia)
+@receiver(post_delete, sender=Materia)
+@receiver(post_save, sender=Curso)
+def invalidar_definitivas(sender, instance, raw=False, **kwargs):
+    # Pesos cambiados o una materia que pasa a otro curso
+    if raw:
+        return
+    if sender is Curso:
+        versiones.incrementar_notas([instance.pk])
+        return
+    versiones.incrementar_notas({instance.curso_id, getattr(instance, "_curso_previo", None)} - {None})
+
+
+@receiver(pre_save, sender=Asistencia)
+def recordar_asistencia_previa(sender, instance, raw=False, **kwargs):
+    instance._resumen_previo = None
+    if instance.pk and not raw:
+        instance._resumen_previo = (
+            Asistencia.objects.filter(pk=instance.pk).values_list("materia_id", "fecha", "estado").first()
+        )
+
+
+@receiver(post_save, sender=Asistencia)
+def actualizar_resumen_asistencia(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    actual = (instance.materia_id, instance.fecha, instance.estado)
+    previo = getattr(instance, "_resumen_previo", None)
+    if previo == actual:
+        return
+    if previo:
+        resumenes.contar_asistencia(*previo, -1)
+    resumenes.contar_asistencia(*actual, 1)
+
+
+@receiver(post_delete, sender=Asistencia)
+def descontar_resumen_asistencia(sender, instance, **kwargs):
+    resumenes.contar_asistencia(instance.materia_id, instance.fecha, instance.estado, -1)
+
+
+def incrementar_version(sender, raw=False, update_fields=None, **kwargs):
+    # El login solo actualiza last_login: no cambia ningún reporte
+    if raw or (update_fields and set(update_fields) <= {"last_login"}):
+        return
+    versiones.incrementar(DOMINIO_POR_MODELO[sender])
+
+
+for _modelo in DOMINIO_POR_MODELO:
+    post_save.connect(incrementar_version, sender=_modelo, dispatch_uid=f"version_{_modelo.__name__}_save")
+    post_delete.connect(incrementar_version, sender=_modelo, dispatch_uid=f"version_{_modelo.__name__}_delete")
+
+
+@receiver(post_save, sender=Calificacion)
+def notificar_calificacion(sender, instance, created, raw=False, **kwargs):
+    # Notificar solo calificaciones finales; el envío lo hace el comando enviar_correos
+    if raw:
+        return
+    correo = correos.correo_calificacion_final(instance)
+    if correo:
+        correo.save()
+        metricas.registrar_correos("encolado")
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=PerfilEstudiante)
+def indexar_estudiante(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields and set(update_fields) <= {"last_login"}):
+        return
+    busqueda.indexar_estudiantes([instance.pk if sender is User else instance.user_id])
+
+
+@receiver(post_delete, sender=User)
+def desindexar_estudiante(sender, instance, **kwargs):
+    busqueda.quitar_estudiante(instance.pk)
+
+
+@receiver(post_delete, sender=PerfilEstudiante)
+def reindexar_sin_perfil(sender, instance, **kwargs):
+    busqueda.indexar_estudiantes([instance.user_id])
+
+
+@receiver(post_save, sender=Curso)
+def indexar_curso(sender, instance, raw=False, **kwargs):
+    if not raw:
+        busqueda.indexar_curso(instance.pk)
+
+
+@receiver(post_delete, sender=Curso)
+def desindexar_curso(sender, instance, **kwargs):
+    busqueda.quitar_curso(instance.pk)
@@ -0,0 +1,239 @@
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts import importacion
+from accounts.models import User
+from . import cache_pdf, correos, trabajos
+from .models import CorreoPendiente, TrabajoReporte
+
+FALLAN = set()
+
+
+class BackendQueFalla(EmailBackend):
+    """locmem que rechaza los destinatarios de FALLAN."""
+
+    def send_messages(self, messages):
+        if any(set(m.to) & FALLAN for m in messages):
+            raise ConnectionError("rechazado")
+        return super().send_messages(messages)
+
+
+class BackendSinConexion(EmailBackend):
+    def open(self):
+        raise ConnectionRefusedError("sin servidor")
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class BandejaCorreosTests(TestCase):
+    def setUp(self):
+        FALLAN.clear()
+
+    def _vencer(self):
+        CorreoPendiente.objects.filter(estado="PENDIENTE").update(proximo_intento=timezone.now() - timedelta(seconds=1))
+
+    def test_envia_el_lote(self):
+        correos.encolar("a@example.com", "Nota", "Cuerpo")
+        correos.encolar("b@example.com", "Nota", "Cuerpo")
+        enviados, fallidos = correos.enviar_lote(correos.reclamar_lote(10))
+        self.assertEqual((enviados, fallidos), (2, 0))
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(CorreoPendiente.objects.filter(estado="ENVIADO").count(), 2)
+
+    @override_settings(EMAIL_BACKEND="academico.tests.BackendQueFalla")
+    def test_reintenta_con_espera(self):
+        FALLAN.add("falla@example.com")
+        fallido = correos.encolar("falla@example.com", "Nota", "Cuerpo")
+        correos.encolar("ok@example.com", "Nota", "Cuerpo")
+        self.assertEqual(correos.enviar_lote(correos.reclamar_lote(10)), (1, 1))
+        fallido.refresh_from_db()
+        self.assertEqual((fallido.estado, fallido.intentos), ("PENDIENTE", 1))
+        self.assertGreater(fallido.proximo_intento, timezone.now())
+        self.assertIn("rechazado", fallido.ultimo_error)
+        # Aún en espera: no se reclama
+        self.assertEqual(correos.reclamar_lote(10), [])
+
+        FALLAN.clear()
+        self._vencer()
+        self.assertEqual(correos.enviar_lote(correos.reclamar_lote(10)), (1, 0))
+        fallido.refresh_from_db()
+        self.assertEqual((fallido.estado, fallido.intentos), ("ENVIADO", 2))
+
+    @override_settings(EMAIL_BACKEND="academico.tests.BackendQueFalla")
+    def test_falla_tras_max_intentos(self):
+        FALLAN.add("falla@example.com")
+        correo = correos.encolar("falla@example.com", "Nota", "Cuerpo")
+        for _ in range(correos.MAX_INTENTOS):
+            self._vencer()
+            correos.enviar_lote(correos.reclamar_lote(10))
+        correo.refresh_from_db()
+        self.assertEqual((correo.estado, correo.intentos), ("FALLIDO", correos.MAX_INTENTOS))
+        self._vencer()
+        self.assertEqual(correos.reclamar_lote(10), [])
+
+    @override_settings(EMAIL_BACKEND="academico.tests.BackendSinConexion")
+    def test_sin_conexion_reprograma_el_lote(self):
+        correos.encolar("a@example.com", "Nota", "Cuerpo")
+        correos.encolar("b@example.com", "Nota", "Cuerpo")
+        self.assertEqual(correos.enviar_lote(correos.reclamar_lote(10)), (0, 2))
+        for correo in CorreoPendiente.objects.all():
+            self.assertEqual((correo.estado, correo.intentos), ("PENDIENTE", 1))
+            self.assertGreater(correo.proximo_intento, timezone.now())
+        # El comando termina sin error: el lote quedó en espera
+        call_command("enviar_correos", "--una-vez", stdout=io.StringIO())
+
+    def test_lote_abandonado_agota_intentos(self):
+        vencido = timezone.now() - timedelta(seconds=1)
+        agotado = correos.encolar("a@example.com", "Nota", "Cuerpo")
+        otro = correos.encolar("b@example.com", "Nota", "Cuerpo")
+        CorreoPendiente.objects.filter(pk=agotado.pk).update(
+            estado="ENVIANDO", intentos=correos.MAX_INTENTOS, proximo_intento=vencido
+        )
+        CorreoPendiente.objects.filter(pk=otro.pk).update(estado="ENVIANDO", intentos=1, proximo_intento=vencido)
+        self.assertEqual([c.pk for c in correos.reclamar_lote(10)], [otro.pk])
+        agotado.refresh_from_db()
+        self.assertEqual(agotado.estado, "FALLIDO")
+
+
+class FiltrosExportacionTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user("admin", password="x", role="ADMIN"))
+
+    def test_filtro_no_valido_responde_400_antes_de_la_descarga(self):
+        for vista in ("exportar_calificaciones_excel", "exportar_asistencias_excel"):
+            for consulta in ("format=csv&curso=abc", "desde=ayer", "desde=2024-13-01"):
+                with self.subTest(vista=vista, consulta=consulta):
+                    respuesta = self.client.get(f"{reverse(vista)}?{consulta}")
+                    self.assertEqual(respuesta.status_code, 400)
+                    self.assertNotIn("Content-Disposition", respuesta)
+
+    def test_trabajo_con_fecha_imposible_responde_400(self):
+        respuesta = self.client.post(reverse("reporte_trabajo_solicitar"), {"tipo": "CALIFICACIONES", "desde": "2024-13-01"})
+        self.assertEqual(respuesta.status_code, 400)
+
+
+class TrabajosBloqueadosTests(TestCase):
+    def test_reintenta_solo_los_que_tienen_intentos(self):
+        usuario = User.objects.create_user("admin", password="x", role="ADMIN")
+        hace_una_hora = timezone.now() - timedelta(hours=1)
+        reintentable, agotado = (
+            TrabajoReporte.objects.create(
+                tipo="ESTUDIANTES", solicitado_por=usuario, estado="EN_PROCESO", iniciado=hace_una_hora, intentos=intentos
+            )
+            for intentos in (1, trabajos.MAX_INTENTOS)
+        )
+        self.assertEqual(trabajos.liberar_bloqueados(30), 1)
+        reintentable.refresh_from_db()
+        agotado.refresh_from_db()
+        self.assertEqual(reintentable.estado, "PENDIENTE")
+        self.assertEqual(agotado.estado, "ERROR")
+        self.assertTrue(agotado.error)
+
+    def test_importacion_bloqueada_no_se_reintenta(self):
+        usuario = User.objects.create_user("admin", password="x", role="ADMIN")
+        trabajo = trabajos.encolar_importacion(usuario, SimpleUploadedFile("u.csv", b"username\nana\n"))
+        TrabajoReporte.objects.filter(pk=trabajo.pk).update(
+            estado="EN_PROCESO", iniciado=timezone.now() - timedelta(hours=1), intentos=1
+        )
+        self.assertEqual(trabajos.liberar_bloqueados(30), 0)
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.estado, "ERROR")
+        self.assertFalse(default_storage.exists(trabajo.parametros["archivo"]))
+
+
+class ImportacionEnColaTests(TestCase):
+    def test_falla_a_mitad_queda_en_error_con_el_avance(self):
+        usuario = User.objects.create_user("admin", password="x", role="ADMIN")
+        contenido = b"username,role\nuno,ADMIN\ndos,ADMIN\ntres,ADMIN\n"
+        trabajo = trabajos.encolar_importacion(usuario, SimpleUploadedFile("u.csv", contenido))
+        trabajo = trabajos.reclamar("prueba")
+        procesar_lote = importacion._Importador.procesar_lote
+        llamadas = []
+
+        def falla_en_el_segundo(importador, filas):
+            llamadas.append(filas)
+            if len(llamadas) == 2:
+                raise RuntimeError("worker caído")
+            return procesar_lote(importador, filas)
+
+        def de_a_una_fila(filas, **opciones):
+            return importacion.importar_usuarios(filas, tamano_lote=1, **opciones)
+
+        with (
+            mock.patch.object(importacion._Importador, "procesar_lote", falla_en_el_segundo),
+            mock.patch.object(trabajos, "importar_usuarios", de_a_una_fila),
+        ):
+            trabajos.procesar(trabajo)
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.estado, "ERROR")
+        self.assertEqual(trabajo.resumen["creados"], 1)
+        self.assertTrue(User.objects.filter(username="uno").exists())
+        self.assertFalse(default_storage.exists(trabajo.parametros["archivo"]))
+        # No vuelve a la cola: reintentarla chocaría con "uno" ya creado
+        self.assertIsNone(trabajos.reclamar("prueba"))
+
+
+class LimpiezaCachePdfTests(TestCase):
+    def setUp(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=carpeta.name, PDF_CACHE_LIMPIEZA_S=60))
+
+    def test_limpia_a_lo_sumo_una_vez_por_intervalo(self):
+        with mock.patch.object(cache_pdf, "limpiar", return_value=0) as limpiar:
+            cache_pdf.limpiar_si_toca()
+            cache_pdf.limpiar_si_toca()
+            self.assertEqual(limpiar.call_count, 1)
+            vieja = time.time() - 61
+            os.utime(cache_pdf._raiz() / cache_pdf.MARCA_LIMPIEZA, (vieja, vieja))
+            cache_pdf.limpiar_si_toca()
+            self.assertEqual(limpiar.call_count, 2)
+
+
+@override_settings(TIEMPOS_SERVER_TIMING=False, METRICAS_TOKEN="secreto", METRICAS_IPS=[])
+class ServerTimingTests(TestCase):
+    def test_solo_para_staff_o_clientes_autorizados(self):
+        url = reverse("login")
+        self.assertNotIn("Server-Timing", self.client.get(url))
+        self.assertIn("Server-Timing", self.client.get(url, headers={"Authorization": "Bearer secreto"}))
+        self.client.force_login(User.objects.create_user("staff", password="x", role="ADMIN", is_staff=True))
+        self.assertIn("Server-Timing", self.client.get(reverse("dashboard")))
+
+
+def ejecutar_comando(*argumentos):
+    """Corre un comando de manage.py en otro proceso: crean su propia base de prueba."""
+    return subprocess.run(
+        [sys.executable, str(settings.BASE_DIR / "manage.py"), *argumentos, "--verbosity", "0"],
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+
+
+class VerificacionesTests(SimpleTestCase):
+    def assertComandoCorrecto(self, resultado):
+        self.assertEqual(resultado.returncode, 0, resultado.stdout + resultado.stderr)
+
+    def test_planes_sin_recorridos_completos(self):
+        self.assertComandoCorrecto(ejecutar_comando("verificar_planes", "--estudiantes", "30"))
+
+    def test_concurrencia_sin_bloqueos(self):
+        resultado = ejecutar_comando(
+            "verificar_concurrencia", "--hilos", "4", "--operaciones", "25", "--estudiantes", "30"
+        )
+        self.assertComandoCorrecto(resultado)
@@ -0,0 +1,244 @@
+"""
+Cola de trabajos de reportes en la base de datos.
+
+Las vistas encolan un TrabajoReporte y el comando ``procesar_reportes`` lo
+ejecuta fuera de la petición, dejando el archivo bajo MEDIA_ROOT/reportes.
+La importación de usuarios usa la misma cola: su archivo es el CSV de filas
+con errores y los conteos quedan en ``resumen``.
+Dos solicitudes con el mismo tipo, parámetros, alcance y versión de datos
+comparten el mismo trabajo.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import uuid
+from contextlib import closing
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+from django.utils import timezone
+
+from accounts.importacion import importar_usuarios, leer_filas
+from accounts.models import User
+from gestion_academica import metricas
+from . import versiones
+from .boletines_lote import estudiantes_de, generar_zip, nombre_zip
+from .exportacion import generar, nombre_y_tipo
+from .models import Curso, TrabajoReporte
+from .reportes import (
+    COLUMNAS_ASISTENCIAS,
+    COLUMNAS_CALIFICACIONES,
+    COLUMNAS_ESTUDIANTES,
+    escribir_acta_pdf,
+    escribir_boletin_pdf,
+    filas_asistencias,
+    filas_calificaciones,
+    filas_estudiantes,
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_INTENTOS = 3
+CARPETA = "reportes"
+
+# Dominios de datos de cada tipo y si el contenido depende del usuario que lo pide.
+DEPENDENCIAS = {
+    "BOLETIN_PDF": (("calificaciones", "cursos", "usuarios"), False),
+    "ACTA_PDF": (("calificaciones", "cursos", "usuarios"), False),
+    "ESTUDIANTES": (("matriculas", "cursos", "usuarios"), False),
+    "CALIFICACIONES": (("calificaciones", "cursos", "usuarios"), True),
+    "ASISTENCIAS": (("asistencias", "cursos", "usuarios"), True),
+    "IMPORTAR_USUARIOS": ((), True),
+    "BOLETINES_ZIP": (("calificaciones", "cursos", "usuarios", "matriculas"), True),
+}
+# Los que se piden desde reporte_trabajo_solicitar; la importación tiene su propia vista
+TIPOS_REPORTE = ("BOLETIN_PDF", "ACTA_PDF", "ESTUDIANTES", "CALIFICACIONES", "ASISTENCIAS")
+# Los que no se pueden repetir tras un fallo: la importación guarda por lotes y al
+# reintentarla las filas ya creadas chocarían como duplicadas
+TIPOS_SIN_REINTENTO = ("IMPORTAR_USUARIOS",)
+CARPETA_IMPORTACIONES = "importaciones"
+COLUMNAS_ERRORES_IMPORTACION = [("fila", "Fila"), ("error", "Error")]
+# Errores que se guardan en el resumen para mostrarlos en la página; el CSV los tiene todos
+ERRORES_EN_RESUMEN = 200
+
+
+def alcance_de(usuario, tipo):
+    if not DEPENDENCIAS[tipo][1]:
+        return ""
+    if usuario.role == "ADMIN":
+        return "ADMIN"
+    return f"{usuario.role}:{usuario.pk}"
+
+
+def _huella(tipo, parametros, alcance):
+    contenido = {
+        "tipo": tipo,
+        "parametros": parametros,
+        "alcance": alcance,
+        "versiones": versiones.versiones(DEPENDENCIAS[tipo][0], using=DEFAULT_DB_ALIAS),
+    }
+    return hashlib.sha256(json.dumps(contenido, sort_keys=True).encode()).hexdigest()
+
+
+def encolar(usuario, tipo, parametros):
+    """
+    Devuelve (trabajo, creado). Reutiliza un trabajo pendiente, en proceso o
+    completado (con su archivo aún en disco) con la misma huella.
+    """
+    alcance = alcance_de(usuario, tipo)
+    huella = _huella(tipo, parametros, alcance)
+    # Siempre en default: se puede encolar desde una vista que lee de la réplica, y ahí un trabajo
+    # recién creado aún no existe y uno completado puede verse con otro estado
+    existente = (
+        TrabajoReporte.objects.using(DEFAULT_DB_ALIAS)
+        .filter(huella=huella, estado__in=["PENDIENTE", "EN_PROCESO", "COMPLETADO"])
+        .order_by("-creado")
+        .first()
+    )
+    if existente and (existente.estado != "COMPLETADO" or existente.archivo.storage.exists(existente.archivo.name)):
+        metricas.registrar_cache("trabajos_reporte", True)
+        return existente, False
+    metricas.registrar_cache("trabajos_reporte", False)
+    trabajo = TrabajoReporte.objects.create(
+        tipo=tipo, parametros=parametros, alcance=alcance, huella=huella, solicitado_por=usuario
+    )
+    return trabajo, True
+
+
+def reclamar(trabajador):
+    """Marca como EN_PROCESO el trabajo pendiente más antiguo, o None si no hay."""
+    while True:
+        candidato = (
+            TrabajoReporte.objects.filter(estado="PENDIENTE").order_by("creado").values_list("pk", flat=True).first()
+        )
+        if candidato is None:
+            return None
+        tomado = TrabajoReporte.objects.filter(pk=candidato, estado="PENDIENTE").update(
+            estado="EN_PROCESO", trabajador=trabajador, iniciado=timezone.now(), intentos=F("intentos") + 1
+        )
+        if tomado:
+            return TrabajoReporte.objects.get(pk=candidato)
+
+
+def liberar_bloqueados(minutos):
+    """
+    Devuelve a la cola los trabajos cuyo worker murió sin terminarlos, salvo
+    los que ya agotaron sus intentos: un trabajo que tumba o cuelga al worker
+    no se reintenta para siempre. Los de TIPOS_SIN_REINTENTO pasan a ERROR con
+    el avance que alcanzaron a registrar en ``resumen``.
+    """
+    limite = timezone.now() - timedelta(minutes=minutos)
+    bloqueados = TrabajoReporte.objects.filter(estado="EN_PROCESO", iniciado__lt=limite)
+    bloqueados.filter(intentos__gte=MAX_INTENTOS).update(
+        estado="ERROR", error=f"El trabajo no terminó en {minutos} minutos en ninguno de sus {MAX_INTENTOS} intentos."
+    )
+    sin_reintento = bloqueados.filter(tipo__in=TIPOS_SIN_REINTENTO)
+    for parametros in sin_reintento.filter(tipo="IMPORTAR_USUARIOS").values_list("parametros", flat=True):
+        default_storage.delete(parametros["archivo"])
+    sin_reintento.update(
+        estado="ERROR",
+        error=f"El trabajo no terminó en {minutos} minutos; no se reintenta porque pudo quedar aplicado en parte.",
+    )
+    return bloqueados.update(estado="PENDIENTE")
+
+
+def encolar_importacion(usuario, archivo):
+    """Guarda el archivo subido y encola su importación; devuelve el trabajo."""
+    extension = Path(archivo.name).suffix.lower()
+    nombre = default_storage.save(f"{CARPETA_IMPORTACIONES}/{uuid.uuid4().hex}{extension}", archivo)
+    return encolar(usuario, "IMPORTAR_USUARIOS", {"archivo": nombre, "nombre": archivo.name})[0]
+
+
+def _importar(trabajo, destino):
+    nombre = trabajo.parametros["archivo"]
+
+    def registrar_avance(creados, matriculas, errores):
+        trabajo.resumen = {
+            "creados": creados,
+            "matriculas": matriculas,
+            "total_errores": len(errores),
+            "errores": errores[:ERRORES_EN_RESUMEN],
+        }
+        trabajo.save(update_fields=["resumen"])
+
+    try:
+        # closing: si falla a mitad, el lector se cierra antes que el archivo
+        with default_storage.open(nombre, "rb") as archivo, closing(leer_filas(archivo, nombre)) as filas:
+            creados, matriculas, errores = importar_usuarios(filas, al_guardar_lote=registrar_avance)
+    finally:
+        # El archivo trae contraseñas: no se conserva una vez importado, y no se reintenta si falla
+        default_storage.delete(nombre)
+    registrar_avance(creados, matriculas, errores)
+    for bloque in generar("csv", COLUMNAS_ERRORES_IMPORTACION, errores, "Errores"):
+        destino.write(bloque)
+    return f"errores_{Path(trabajo.parametros['nombre']).stem}.csv"
+
+
+def _generar(trabajo, destino):
+    """Escribe el reporte en ``destino`` y devuelve el nombre de descarga."""
+    parametros = trabajo.parametros
+    if trabajo.tipo == "IMPORTAR_USUARIOS":
+        return _importar(trabajo, destino)
+    if trabajo.tipo == "BOLETIN_PDF":
+        estudiante = User.objects.get(pk=parametros["estudiante_id"])
+        escribir_boletin_pdf(estudiante, destino)
+        return f"boletin_{estudiante.username}.pdf"
+    if trabajo.tipo == "ACTA_PDF":
+        curso = Curso.objects.get(pk=parametros["curso_id"])
+        escribir_acta_pdf(curso, destino)
+        return f"acta_{curso.codigo}.pdf"
+    if trabajo.tipo == "BOLETINES_ZIP":
+        # El pool de BOLETINES_PROCESOS corre aquí, fuera de los workers web
+        curso = Curso.objects.get(pk=parametros["curso_id"]) if "curso_id" in parametros else None
+        periodo = parametros.get("periodo")
+        for bloque in generar_zip(estudiantes_de(trabajo.solicitado_por, curso=curso, periodo=periodo)):
+            destino.write(bloque)
+        return nombre_zip(curso, periodo)
+
+    formato = parametros.get("format", "xlsx")
+    if trabajo.tipo == "ESTUDIANTES":
+        curso = Curso.objects.get(pk=parametros["curso_id"])
+        nombre_base, hoja = f"estudiantes_{curso.codigo}", "Estudiantes"
+        columnas, filas = COLUMNAS_ESTUDIANTES, filas_estudiantes(curso)
+    elif trabajo.tipo == "CALIFICACIONES":
+        nombre_base, hoja = "calificaciones", "Calificaciones"
+        columnas, filas = COLUMNAS_CALIFICACIONES, filas_calificaciones(trabajo.solicitado_por, parametros)
+    else:
+        nombre_base, hoja = "asistencias", "Asistencias"
+        columnas, filas = COLUMNAS_ASISTENCIAS, filas_asistencias(trabajo.solicitado_por, parametros)
+    for bloque in generar(formato, columnas, filas, hoja):
+        destino.write(bloque)
+    return nombre_y_tipo(nombre_base, formato)[0]
+
+
+def procesar(trabajo):
+    carpeta = Path(settings.MEDIA_ROOT) / CARPETA
+    carpeta.mkdir(parents=True, exist_ok=True)
+    temporal = carpeta / f"{trabajo.huella}.{trabajo.pk}.tmp"
+    try:
+        with open(temporal, "wb") as destino:
+            nombre_descarga = _generar(trabajo, destino)
+        extension = Path(nombre_descarga).suffix
+        final = carpeta / f"{trabajo.huella}{extension}"
+        os.replace(temporal, final)
+    except Exception as exc:
+        logger.exception("Falló el trabajo de reporte %s", trabajo.pk)
+        temporal.unlink(missing_ok=True)
+        reintentar = trabajo.intentos < MAX_INTENTOS and trabajo.tipo not in TIPOS_SIN_REINTENTO
+        trabajo.estado = "PENDIENTE" if reintentar else "ERROR"
+        trabajo.error = f"{type(exc).__name__}: {exc}"
+        # resumen conserva el avance de una importación que falló a mitad
+        trabajo.save(update_fields=["estado", "error", "resumen"])
+        return
+    trabajo.archivo.name = f"{CARPETA}/{final.name}"
+    trabajo.nombre_descarga = nombre_descarga
+    trabajo.estado = "COMPLETADO"
+    trabajo.error = ""
+    trabajo.terminado = timezone.now()
+    trabajo.save(update_fields=["archivo", "nombre_descarga", "estado", "error", "terminado", "resumen"])
@@ -7,6 +7,7 @@ urlpatterns = [
     path("dashboard/estudiante/", views.dashboard_estudiante, name="dashboard_estudiante"),
     path("cursos/", views.curso_lista, name="curso_lista"),
     path("cursos/<int:pk>/", views.curso_detalle, name="curso_detalle"),
+    path("cursos/<int:pk>/definitivas/", views.curso_definitivas, name="curso_definitivas"),
     path("cursos/nuevo/", views.curso_crear, name="curso_crear"),
     path("cursos/<int:pk>/editar/", views.curso_editar, name="curso_editar"),
     path("cursos/<int:pk>/eliminar/", views.curso_eliminar, name="curso_eliminar"),
@@ -21,19 +22,28 @@ urlpatterns = [
     path("calificaciones/", views.calificacion_lista, name="calificacion_lista"),
     path("calificaciones/<int:pk>/", views.calificacion_detalle, name="calificacion_detalle"),
     path("calificaciones/nuevo/", views.calificacion_crear, name="calificacion_crear"),
+    path("calificaciones/planilla/", views.calificacion_masiva, name="calificacion_masiva"),
     path("calificaciones/<int:pk>/editar/", views.calificacion_editar, name="calificacion_editar"),
     path("calificaciones/<int:pk>/eliminar/", views.calificacion_eliminar, name="calificacion_eliminar"),
     path("asistencias/", views.asistencia_lista, name="asistencia_lista"),
     path("asistencias/nuevo/", views.asistencia_crear, name="asistencia_crear"),
+    path("asistencias/planilla/", views.asistencia_masiva, name="asistencia_masiva"),
     path("asistencias/<int:pk>/editar/", views.asistencia_editar, name="asistencia_editar"),
     path("asistencias/<int:pk>/eliminar/", views.asistencia_eliminar, name="asistencia_eliminar"),
     path("buscar/", views.buscar, name="buscar"),
     path("reportes/", views.reportes_dashboard, name="reportes_dashboard"),
     path("reportes/boletin/<int:estudiante_id>/", views.reporte_boletin_pdf, name="reporte_boletin_pdf"),
     path("reportes/boletin/", views.reporte_boletin_pdf, name="reporte_boletin_propio"),
+    path("reportes/boletines/", views.reporte_boletines_zip, name="reporte_boletines_zip"),
     path("reportes/acta/<int:curso_id>/", views.reporte_acta_curso_pdf, name="reporte_acta_curso_pdf"),
     path("reportes/estudiantes_excel/<int:curso_id>/", views.exportar_estudiantes_excel, name="exportar_estudiantes_excel"),
     path("reportes/calificaciones_excel/", views.exportar_calificaciones_excel, name="exportar_calificaciones_excel"),
     path("reportes/asistencias_excel/", views.exportar_asistencias_excel, name="exportar_asistencias_excel"),
+    path("reportes/trabajos/", views.reporte_trabajo_solicitar, name="reporte_trabajo_solicitar"),
+    path("reportes/trabajos/<int:pk>/", views.reporte_trabajo_estado, name="reporte_trabajo_estado"),
+    path("reportes/trabajos/<int:pk>/descargar/", views.reporte_trabajo_descargar, name="reporte_trabajo_descargar"),
     path("panel-promedios/", views.panel_promedios, name="panel_promedios"),
+    path("estudiantes-riesgo/", views.estudiantes_riesgo, name="estudiantes_riesgo"),
+    path("panel-estadisticas/", views.panel_estadisticas, name="panel_estadisticas"),
+    path("estadisticas/", views.estadisticas_notas, name="estadisticas_notas"),
 ]
@@ -0,0 +1,44 @@
+"""
+Versiones de datos por dominio.
+
+Cada cambio en un modelo aumenta el contador de su dominio (ver
+academico/signals.py). Un reporte generado con las mismas versiones de los
+dominios de los que depende es idéntico y puede reutilizarse.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import VersionDatos
+
+DOMINIOS = ("calificaciones", "asistencias", "matriculas", "cursos", "usuarios")
+
+
+def incrementar(dominio):
+    if VersionDatos.objects.filter(dominio=dominio).update(version=F("version") + 1):
+        return
+    try:
+        with transaction.atomic():
+            VersionDatos.objects.create(dominio=dominio, version=1)
+    except IntegrityError:
+        VersionDatos.objects.filter(dominio=dominio).update(version=F("version") + 1)
+
+
+def versiones(dominios, using=None):
+    """
+    Versión actual de cada dominio. ``using`` fija la base; sin él decide el
+    router, para que coincida con la base de la que se leen los datos.
+    """
+    consulta = VersionDatos.objects.using(using).filter(dominio__in=dominios)
+    actuales = dict(consulta.values_list("dominio", "version"))
+    return {dominio: actuales.get(dominio, 0) for dominio in sorted(dominios)}
+
+
+def dominio_notas(curso_id):
+    """Dominio con la versión de las calificaciones y pesos de un solo curso."""
+    return f"notas_curso_{curso_id}"
+
+
+def incrementar_notas(curso_ids):
+    for curso_id in set(curso_ids):
+        incrementar(dominio_notas(curso_id))
@@ -1,81 +1,103 @@
-import io
-import pandas as pd
+from functools import partial
+
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Avg, Count, Q
-from django.db.models.functions import TruncMonth
-from django.http import HttpResponse, HttpResponseForbidden
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Q
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponseBadRequest,
+    HttpResponseForbidden,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
 from django.utils import timezone
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
-from reportlab.lib import colors
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_POST
 
-from accounts.decorators import role_required
+from accounts.decorators import objeto_autorizado, role_required
 from accounts.models import User
+from gestion_academica import metricas
+from gestion_academica.replica import lectura_replica
+from . import cache_pdf
+from .boletines_lote import estudiantes_de, generar_zip, nombre_zip
+from .exportacion import FORMATOS, respuesta_exportacion
 from .forms import (
+    AsistenciaEstudianteFormSet,
     AsistenciaForm,
     BuscadorForm,
     CalificacionForm,
     CursoForm,
     MateriaForm,
     MatriculaForm,
+    NotaEstudianteFormSet,
+    PlanillaAsistenciaForm,
+    PlanillaCalificacionesForm,
+)
+from .busqueda import buscar_cursos, buscar_estudiantes
+from .carga_masiva import guardar_asistencias, guardar_calificaciones
+from .definitivas import TIPOS, definitivas_curso, pesos_materias
+from .estadisticas import estadisticas
+from .models import Asistencia, Calificacion, Curso, Materia, Matricula, TrabajoReporte
+from .paginacion import paginar, por_pagina_pedida
+from .reportes import (
+    COLUMNAS_ASISTENCIAS,
+    COLUMNAS_CALIFICACIONES,
+    COLUMNAS_ESTUDIANTES,
+    datos_acta,
+    datos_boletines,
+    dibujar_acta,
+    dibujar_boletin,
+    filas_asistencias,
+    filas_calificaciones,
+    filas_estudiantes,
 )
-from .models import Asistencia, Calificacion, Curso, Materia, Matricula
+from .resumenes import anotar_promedios, asistencia_mensual
+from .riesgo import con_estudiantes, estudiantes_en_riesgo
+from .trabajos import TIPOS_REPORTE, alcance_de, encolar
 
 
-def _cursos_por_usuario(user):
-    if user.role == "ADMIN":
-        return Curso.objects.all()
+def _estudiantes_del_docente(user):
     if user.role == "DOCENTE":
-        return Curso.objects.filter(docente_responsable=user)
-    return Curso.objects.filter(matriculas__estudiante=user)
+        return User.objects.filter(matriculas__curso__docente_responsable=user, role="ESTUDIANTE").distinct()
+    return User.objects.filter(role="ESTUDIANTE")
 
 
-def _materias_por_usuario(user):
-    if user.role == "ADMIN":
-        return Materia.objects.all()
+def _puede_ver_boletin(user, estudiante):
+    if user.role == "ESTUDIANTE":
+        return estudiante == user
     if user.role == "DOCENTE":
-        return Materia.objects.filter(curso__docente_responsable=user)
-    return Materia.objects.filter(curso__matriculas__estudiante=user)
+        return Matricula.objects.filter(estudiante=estudiante, curso__docente_responsable=user).exists()
+    return True
 
 
-def _estudiantes_del_docente(user):
-    if user.role == "DOCENTE":
-        return User.objects.filter(matriculas__curso__docente_responsable=user, role="ESTUDIANTE").distinct()
-    return User.objects.filter(role="ESTUDIANTE")
+RIESGO_EN_DASHBOARD = 10
 
 
 @login_required
+@lectura_replica
 def dashboard_view(request):
-    cursos = _cursos_por_usuario(request.user)
-    materias = _materias_por_usuario(request.user)
+    cursos = Curso.objects.para_usuario(request.user)
+    materias = Materia.objects.para_usuario(request.user)
     estudiantes = _estudiantes_del_docente(request.user)
 
     total_estudiantes = estudiantes.count()
     total_cursos = cursos.count()
     total_materias = materias.count()
 
-    promedio_materias = (
-        materias.annotate(promedio=Avg("calificaciones__nota"))
-        .order_by("nombre")
-    )
+    promedio_materias = anotar_promedios(materias.order_by("nombre"))
     chart_labels = [m.nombre for m in promedio_materias]
-    chart_data = [round(m.promedio or 0, 2) for m in promedio_materias]
-
-    asistencia_qs = Asistencia.objects.filter(materia__in=materias)
-    asistencia_por_mes = (
-        asistencia_qs.annotate(month=TruncMonth("fecha"))
-        .values("month")
-        .annotate(total=Count("id"), presentes=Count("id", filter=Q(estado="PRESENTE")))
-        .order_by("month")
-    )
+    chart_data = [round(float(m.promedio or 0), 2) for m in promedio_materias]
+
     asistencia_labels, asistencia_valores = [], []
-    for item in asistencia_por_mes:
-        asistencia_labels.append(item["month"].strftime("%Y-%m"))
+    for item in asistencia_mensual(materias):
+        asistencia_labels.append(item["mes"].strftime("%Y-%m"))
         total = item["total"] or 1
-        asistencia_valores.append(round((item["presentes"] / total) * 100, 2))
+        asistencia_valores.append(round((item["total_presentes"] / total) * 100, 2))
 
     contexto = {
         "total_estudiantes": total_estudiantes,
@@ -89,6 +111,9 @@ def dashboard_view(request):
     template = "academico/dashboard_admin.html"
     if request.user.role == "DOCENTE":
         template = "academico/dashboard_docente.html"
+        riesgo = estudiantes_en_riesgo(materias)
+        contexto["total_riesgo"] = len(riesgo)
+        contexto["riesgo"] = con_estudiantes(riesgo[:RIESGO_EN_DASHBOARD])
     elif request.user.role == "ESTUDIANTE":
         template = "academico/dashboard_estudiante.html"
     return render(request, template, contexto)
@@ -111,20 +136,53 @@ def dashboard_estudiante(request):
 
 @login_required
 def curso_lista(request):
-    cursos = _cursos_por_usuario(request.user)
-    return render(request, "academico/curso_lista.html", {"cursos": cursos})
+    cursos = Curso.objects.para_usuario(request.user).select_related("docente_responsable")
+    pagina = paginar(request, cursos, ("codigo",))
+    return render(request, "academico/curso_lista.html", {"cursos": pagina, "pagina": pagina})
 
 
 @login_required
-def curso_detalle(request, pk):
-    curso = get_object_or_404(Curso, pk=pk)
-    if request.user.role == "DOCENTE" and curso.docente_responsable != request.user:
-        return HttpResponseForbidden()
-    if request.user.role == "ESTUDIANTE" and not Matricula.objects.filter(estudiante=request.user, curso=curso).exists():
-        return HttpResponseForbidden()
+@objeto_autorizado(Curso, relacionados=["docente_responsable"])
+def curso_detalle(request, curso):
     return render(request, "academico/curso_detalle.html", {"curso": curso})
 
 
+@login_required
+@objeto_autorizado(Curso)
+def curso_definitivas(request, curso):
+    """Pesos efectivos de cada materia y notas definitivas de los estudiantes del curso."""
+    campos_peso = [f"peso_efectivo_{tipo.lower()}" for tipo in TIPOS]
+    materias = [
+        {"id": fila[0], "codigo": fila[1], "nombre": fila[2], "pesos": dict(zip(TIPOS, fila[3:]))}
+        for fila in pesos_materias(Materia.objects.filter(curso=curso))
+        .order_by("nombre")
+        .values_list("pk", "codigo", "nombre", *campos_peso)
+    ]
+    filas = definitivas_curso(curso.pk)
+    if request.user.role == "ESTUDIANTE":
+        filas = [fila for fila in filas if fila[0] == request.user.pk]
+    notas = {}
+    for estudiante_id, materia_id, _, promedios, definitiva in filas:
+        notas.setdefault(estudiante_id, []).append(
+            {
+                "materia": materia_id,
+                "promedios": {tipo: _redondear(valor) for tipo, valor in zip(TIPOS, promedios)},
+                "definitiva": _redondear(definitiva),
+            }
+        )
+    estudiantes = [
+        {"id": pk, "username": username, "nombre": f"{nombre} {apellido}".strip(), "materias": notas[pk]}
+        for pk, username, nombre, apellido in User.objects.filter(pk__in=notas)
+        .order_by("username")
+        .values_list("pk", "username", "first_name", "last_name")
+    ]
+    return JsonResponse({"curso": curso.pk, "materias": materias, "estudiantes": estudiantes})
+
+
+def _redondear(valor):
+    return None if valor is None else round(valor, 2)
+
+
 @role_required(["ADMIN"])
 def curso_crear(request):
     if request.method == "POST":
@@ -159,19 +217,14 @@ def curso_eliminar(request, pk):
 
 @login_required
 def materia_lista(request):
-    materias = _materias_por_usuario(request.user)
-    return render(request, "academico/materia_lista.html", {"materias": materias})
+    materias = Materia.objects.para_usuario(request.user).select_related("curso")
+    pagina = paginar(request, materias, ("codigo",))
+    return render(request, "academico/materia_lista.html", {"materias": pagina, "pagina": pagina})
 
 
 @login_required
-def materia_detalle(request, pk):
-    materia = get_object_or_404(Materia, pk=pk)
-    if request.user.role == "DOCENTE" and materia.curso.docente_responsable != request.user:
-        return HttpResponseForbidden()
-    if request.user.role == "ESTUDIANTE":
-        matriculado = Matricula.objects.filter(estudiante=request.user, curso=materia.curso).exists()
-        if not matriculado:
-            return HttpResponseForbidden()
+@objeto_autorizado(Materia, relacionados=["curso"])
+def materia_detalle(request, materia):
     return render(request, "academico/materia_detalle.html", {"materia": materia})
 
 
@@ -188,12 +241,8 @@ def materia_crear(request):
 
 
 @login_required
-def materia_editar(request, pk):
-    materia = get_object_or_404(Materia, pk=pk)
-    if request.user.role not in ["ADMIN", "DOCENTE"]:
-        return HttpResponseForbidden()
-    if request.user.role == "DOCENTE" and materia.curso.docente_responsable != request.user:
-        return HttpResponseForbidden()
+@objeto_autorizado(Materia, roles=["ADMIN", "DOCENTE"])
+def materia_editar(request, materia):
     form = MateriaForm(request.POST or None, instance=materia)
     if request.method == "POST" and form.is_valid():
         form.save()
@@ -203,12 +252,8 @@ def materia_editar(request, pk):
 
 
 @login_required
-def materia_eliminar(request, pk):
-    materia = get_object_or_404(Materia, pk=pk)
-    if request.user.role not in ["ADMIN", "DOCENTE"]:
-        return HttpResponseForbidden()
-    if request.user.role == "DOCENTE" and materia.curso.docente_responsable != request.user:
-        return HttpResponseForbidden()
+@objeto_autorizado(Materia, roles=["ADMIN", "DOCENTE"])
+def materia_eliminar(request, materia):
     materia.delete()
     messages.info(request, "Materia eliminada.")
     return redirect("materia_lista")
@@ -216,22 +261,14 @@ def materia_eliminar(request, pk):
 
 @login_required
 def matricula_lista(request):
-    if request.user.role == "ESTUDIANTE":
-        matriculas = Matricula.objects.filter(estudiante=request.user)
-    elif request.user.role == "DOCENTE":
-        matriculas = Matricula.objects.filter(curso__docente_responsable=request.user)
-    else:
-        matriculas = Matricula.objects.all()
-    return render(request, "academico/matricula_lista.html", {"matriculas": matriculas})
+    matriculas = Matricula.objects.para_usuario(request.user).select_related("estudiante", "curso")
+    pagina = paginar(request, matriculas, ("-fecha_matricula", "id"))
+    return render(request, "academico/matricula_lista.html", {"matriculas": pagina, "pagina": pagina})
 
 
 @login_required
-def matricula_detalle(request, pk):
-    matricula = get_object_or_404(Matricula, pk=pk)
-    if request.user.role == "DOCENTE" and matricula.curso.docente_responsable != request.user:
-        return HttpResponseForbidden()
-    if request.user.role == "ESTUDIANTE" and matricula.estudiante != request.user:
-        return HttpResponseForbidden()
+@objeto_autorizado(Matricula, relacionados=["estudiante", "curso"])
+def matricula_detalle(request, matricula):
     return render(request, "academico/matricula_detalle.html", {"matricula": matricula})
 
 
@@ -242,7 +279,7 @@ def matricula_crear(request):
     form = MatriculaForm(request.POST or None)
     form.fields["estudiante"].queryset = User.objects.filter(role="ESTUDIANTE", is_active=True)
     if request.user.role == "DOCENTE":
-        form.fields["curso"].queryset = Curso.objects.filter(docente_responsable=request.user)
+        form.fields["curso"].queryset = Curso.objects.para_usuario(request.user)
     if request.method == "POST" and form.is_valid():
         form.save()
         messages.success(request, "Matrícula registrada.")
@@ -252,23 +289,19 @@ def matricula_crear(request):
 
 @login_required
 def calificacion_lista(request):
-    if request.user.role == "ADMIN":
-        calificaciones = Calificacion.objects.select_related("materia", "estudiante")
-    elif request.user.role == "DOCENTE":
-        calificaciones = Calificacion.objects.filter(materia__curso__docente_responsable=request.user)
-    else:
-        calificaciones = Calificacion.objects.filter(estudiante=request.user)
-    return render(request, "academico/calificacion_lista.html", {"calificaciones": calificaciones})
+    calificaciones = Calificacion.objects.para_usuario(request.user).select_related("materia", "estudiante")
+    pagina = paginar(request, calificaciones, ("-fecha", "id"))
+    return render(request, "academico/calificacion_lista.html", {"calificaciones": pagina, "pagina": pagina})
 
 
 @login_required
-def calificacion_detalle(request, pk):
-    calificacion = get_object_or_404(Calificacion, pk=pk)
-    if request.user.role == "DOCENTE":
-        if calificacion.materia.curso.docente_responsable != request.user and calificacion.creado_por != request.user:
-            return HttpResponseForbidden()
-    if request.user.role == "ESTUDIANTE" and calificacion.estudiante != request.user:
-        return HttpResponseForbidden()
+@objeto_autorizado(
+    Calificacion,
+    relacionados=["estudiante", "materia__curso"],
+    # El docente también ve las notas que registró en cursos que ya no dirige
+    ademas=lambda usuario: Q(creado_por=usuario) if usuario.role == "DOCENTE" else None,
+)
+def calificacion_detalle(request, calificacion):
     return render(request, "academico/calificacion_detalle.html", {"calificacion": calificacion})
 
 
@@ -279,7 +312,7 @@ def calificacion_crear(request):
     form = CalificacionForm(request.POST or None)
     estudiantes_qs = _estudiantes_del_docente(request.user)
     form.fields["estudiante"].queryset = estudiantes_qs
-    form.fields["materia"].queryset = _materias_por_usuario(request.user)
+    form.fields["materia"].queryset = Materia.objects.para_usuario(request.user).select_related("curso")
     if request.method == "POST" and form.is_valid():
         calificacion = form.save(commit=False)
         calificacion.creado_por = request.user if request.user.role == "DOCENTE" else None
@@ -290,15 +323,65 @@ def calificacion_crear(request):
 
 
 @login_required
-def calificacion_editar(request, pk):
-    calificacion = get_object_or_404(Calificacion, pk=pk)
-    if request.user.role == "DOCENTE" and calificacion.materia.curso.docente_responsable != request.user:
-        return HttpResponseForbidden()
-    if request.user.role == "ESTUDIANTE":
+def calificacion_masiva(request):
+    if request.user.role not in ["ADMIN", "DOCENTE"]:
         return HttpResponseForbidden()
+    selector = PlanillaCalificacionesForm(request.GET or None)
+    selector.fields["materia"].queryset = Materia.objects.para_usuario(request.user).select_related("curso")
+    filas = []
+    formset = None
+    if selector.is_valid():
+        materia = selector.cleaned_data["materia"]
+        tipo_evaluacion = selector.cleaned_data["tipo_evaluacion"]
+        fecha = selector.cleaned_data["fecha"]
+        estudiantes = {
+            est.pk: est
+            for est in User.objects.filter(matriculas__curso_id=materia.curso_id, role="ESTUDIANTE").order_by(
+                "last_name", "first_name", "username"
+            )
+        }
+        if request.method == "POST":
+            formset = NotaEstudianteFormSet(request.POST)
+            if formset.is_valid():
+                notas = {
+                    datos["estudiante"]: (datos["nota"], datos["observaciones"])
+                    for datos in formset.cleaned_data
+                    if datos.get("nota") is not None and datos["estudiante"] in estudiantes
+                }
+                creadas, actualizadas = guardar_calificaciones(
+                    materia, tipo_evaluacion, fecha, estudiantes, notas, request.user
+                )
+                messages.success(request, f"Planilla guardada: {creadas} nuevas, {actualizadas} actualizadas.")
+                return redirect(request.get_full_path())
+        else:
+            existentes = {
+                cal.estudiante_id: cal
+                for cal in Calificacion.objects.filter(materia=materia, tipo_evaluacion=tipo_evaluacion, fecha=fecha)
+            }
+            formset = NotaEstudianteFormSet(
+                initial=[
+                    {
+                        "estudiante": est_id,
+                        "nota": existentes[est_id].nota if est_id in existentes else None,
+                        "observaciones": existentes[est_id].observaciones if est_id in existentes else "",
+                    }
+                    for est_id in estudiantes
+                ]
+            )
+        filas = [(form, estudiantes.get(_entero(form["estudiante"].value()))) for form in formset.forms]
+    return render(
+        request,
+        "academico/calificacion_masiva.html",
+        {"selector": selector, "formset": formset, "filas": filas, "titulo": "Planilla de calificaciones"},
+    )
+
+
+@login_required
+@objeto_autorizado(Calificacion, roles=["ADMIN", "DOCENTE"])
+def calificacion_editar(request, calificacion):
     form = CalificacionForm(request.POST or None, instance=calificacion)
     form.fields["estudiante"].queryset = _estudiantes_del_docente(request.user)
-    form.fields["materia"].queryset = _materias_por_usuario(request.user)
+    form.fields["materia"].queryset = Materia.objects.para_usuario(request.user).select_related("curso")
     if request.method == "POST" and form.is_valid():
         form.save()
         messages.success(request, "Calificación actualizada.")
@@ -307,12 +390,8 @@ def calificacion_editar(request, pk):
 
 
 @login_required
-def calificacion_eliminar(request, pk):
-    calificacion = get_object_or_404(Calificacion, pk=pk)
-    if request.user.role == "DOCENTE" and calificacion.materia.curso.docente_responsable != request.user:
-        return HttpResponseForbidden()
-    if request.user.role == "ESTUDIANTE":
-        return HttpResponseForbidden()
+@objeto_autorizado(Calificacion, roles=["ADMIN", "DOCENTE"])
+def calificacion_eliminar(request, calificacion):
     calificacion.delete()
     messages.info(request, "Calificación eliminada.")
     return redirect("calificacion_lista")
@@ -320,13 +399,9 @@ def calificacion_eliminar(request, pk):
 
 @login_required
 def asistencia_lista(request):
-    if request.user.role == "ADMIN":
-        asistencias = Asistencia.objects.select_related("materia", "estudiante")
-    elif request.user.role == "DOCENTE":
-        asistencias = Asistencia.objects.filter(materia__curso__docente_responsable=request.user)
-    else:
-        asistencias = Asistencia.objects.filter(estudiante=request.user)
-    return render(request, "academico/asistencia_lista.html", {"asistencias": asistencias})
+    asistencias = Asistencia.objects.para_usuario(request.user).select_related("materia", "estudiante")
+    pagina = paginar(request, asistencias, ("-fecha", "id"))
+    return render(request, "academico/asistencia_lista.html", {"asistencias": pagina, "pagina": pagina})
 
 
 @login_required
@@ -335,7 +410,7 @@ def asistencia_crear(request):
         return HttpResponseForbidden()
     form = AsistenciaForm(request.POST or None)
     form.fields["estudiante"].queryset = _estudiantes_del_docente(request.user)
-    form.fields["materia"].queryset = _materias_por_usuario(request.user)
+    form.fields["materia"].queryset = Materia.objects.para_usuario(request.user).select_related("curso")
     if request.method == "POST" and form.is_valid():
         form.save()
         messages.success(request, "Asistencia registrada.")
@@ -344,15 +419,64 @@ def asistencia_crear(request):
 
 
 @login_required
-def asistencia_editar(request, pk):
-    asistencia = get_object_or_404(Asistencia, pk=pk)
-    if request.user.role == "DOCENTE" and asistencia.materia.curso.docente_responsable != request.user:
-        return HttpResponseForbidden()
-    if request.user.role == "ESTUDIANTE":
+def asistencia_masiva(request):
+    if request.user.role not in ["ADMIN", "DOCENTE"]:
         return HttpResponseForbidden()
+    selector = PlanillaAsistenciaForm(request.GET or None)
+    selector.fields["materia"].queryset = Materia.objects.para_usuario(request.user).select_related("curso")
+    filas = []
+    formset = None
+    if selector.is_valid():
+        materia = selector.cleaned_data["materia"]
+        fecha = selector.cleaned_data["fecha"]
+        estudiantes = {
+            est.pk: est
+            for est in User.objects.filter(matriculas__curso_id=materia.curso_id, role="ESTUDIANTE").order_by(
+                "last_name", "first_name", "username"
+            )
+        }
+        if request.method == "POST":
+            formset = AsistenciaEstudianteFormSet(request.POST)
+            if formset.is_valid():
+                registros = {
+                    datos["estudiante"]: (datos["estado"], datos["observaciones"])
+                    for datos in formset.cleaned_data
+                    if datos.get("estudiante") in estudiantes
+                }
+                total = guardar_asistencias(materia, fecha, registros)
+                messages.success(request, f"Asistencia registrada para {total} estudiantes.")
+                return redirect(request.get_full_path())
+        else:
+            existentes = {
+                est_id: (estado, observaciones)
+                for est_id, estado, observaciones in Asistencia.objects.filter(materia=materia, fecha=fecha).values_list(
+                    "estudiante_id", "estado", "observaciones"
+                )
+            }
+            formset = AsistenciaEstudianteFormSet(
+                initial=[
+                    {
+                        "estudiante": est_id,
+                        "estado": existentes.get(est_id, ("PRESENTE", ""))[0],
+                        "observaciones": existentes.get(est_id, ("PRESENTE", ""))[1],
+                    }
+                    for est_id in estudiantes
+                ]
+            )
+        filas = [(form, estudiantes.get(_entero(form["estudiante"].value()))) for form in formset.forms]
+    return render(
+        request,
+        "academico/asistencia_masiva.html",
+        {"selector": selector, "formset": formset, "filas": filas, "titulo": "Llamado a lista"},
+    )
+
+
+@login_required
+@objeto_autorizado(Asistencia, roles=["ADMIN", "DOCENTE"])
+def asistencia_editar(request, asistencia):
     form = AsistenciaForm(request.POST or None, instance=asistencia)
     form.fields["estudiante"].queryset = _estudiantes_del_docente(request.user)
-    form.fields["materia"].queryset = _materias_por_usuario(request.user)
+    form.fields["materia"].queryset = Materia.objects.para_usuario(request.user).select_related("curso")
     if request.method == "POST" and form.is_valid():
         form.save()
         messages.success(request, "Asistencia actualizada.")
@@ -361,12 +485,8 @@ def asistencia_editar(request, pk):
 
 
 @login_required
-def asistencia_eliminar(request, pk):
-    asistencia = get_object_or_404(Asistencia, pk=pk)
-    if request.user.role == "DOCENTE" and asistencia.materia.curso.docente_responsable != request.user:
-        return HttpResponseForbidden()
-    if request.user.role == "ESTUDIANTE":
-        return HttpResponseForbidden()
+@objeto_autorizado(Asistencia, roles=["ADMIN", "DOCENTE"])
+def asistencia_eliminar(request, asistencia):
     asistencia.delete()
     messages.info(request, "Asistencia eliminada.")
     return redirect("asistencia_lista")
@@ -378,215 +498,329 @@ def buscar(request):
     estudiantes = cursos = None
     if form.is_valid():
         query = form.cleaned_data["query"]
-        estudiantes = User.objects.filter(role="ESTUDIANTE").filter(
-            Q(username__icontains=query)
-            | Q(first_name__icontains=query)
-            | Q(last_name__icontains=query)
-            | Q(perfil_estudiante__codigo_estudiante__icontains=query)
-        )
-        cursos = Curso.objects.filter(Q(nombre__icontains=query) | Q(codigo__icontains=query))
-        if request.user.role == "DOCENTE":
-            cursos = cursos.filter(docente_responsable=request.user)
-        if request.user.role == "ESTUDIANTE":
-            cursos = cursos.filter(matriculas__estudiante=request.user)
+        por_pagina = por_pagina_pedida(request)
+        estudiantes = buscar_estudiantes(request.user, query, _numero_pagina(request, "pagina_estudiantes"), por_pagina)
+        cursos = buscar_cursos(request.user, query, _numero_pagina(request, "pagina_cursos"), por_pagina)
     return render(request, "academico/buscar.html", {"form": form, "estudiantes": estudiantes, "cursos": cursos})
 
 
 @login_required
+@lectura_replica
 def reporte_boletin_pdf(request, estudiante_id=None):
     estudiante = (
         get_object_or_404(User, pk=estudiante_id, role="ESTUDIANTE") if estudiante_id else request.user
     )
-    if request.user.role == "ESTUDIANTE" and estudiante != request.user:
+    if not _puede_ver_boletin(request.user, estudiante):
         return HttpResponseForbidden()
-    if request.user.role == "DOCENTE" and not Matricula.objects.filter(
-        estudiante=estudiante, curso__docente_responsable=request.user
-    ).exists():
-        return HttpResponseForbidden()
-    calificaciones = Calificacion.objects.filter(estudiante=estudiante).select_related("materia")
-    promedio_global = calificaciones.aggregate(prom=Avg("nota"))["prom"] or 0
-
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    elements = []
-    styles = getSampleStyleSheet()
-    elements.append(Paragraph("Sistema de Gestión Académica - Boletín", styles["Title"]))
-    elements.append(Paragraph(f"Estudiante: {estudiante.get_full_name()}", styles["Normal"]))
-    elements.append(Paragraph(f"Código: {getattr(estudiante.perfil_estudiante, 'codigo_estudiante', 'N/A')}", styles["Normal"]))
-    elements.append(Spacer(1, 12))
-
-    data = [["Materia", "Tipo", "Nota", "Fecha"]]
-    for cal in calificaciones:
-        data.append([cal.materia.nombre, cal.get_tipo_evaluacion_display(), float(cal.nota), cal.fecha.strftime("%Y-%m-%d")])
-    table = Table(data, hAlign="LEFT")
-    table.setStyle(TableStyle([("BACKGROUND", (0, 0), (-1, 0), colors.lightblue), ("GRID", (0, 0), (-1, -1), 0.5, colors.grey)]))
-    elements.append(table)
-    elements.append(Spacer(1, 12))
-    elements.append(Paragraph(f"Promedio general: {round(promedio_global, 2)}", styles["Heading3"]))
-
-    doc.build(elements)
-    buffer.seek(0)
-    response = HttpResponse(buffer, content_type="application/pdf")
-    response["Content-Disposition"] = f'attachment; filename="boletin_{estudiante.username}.pdf"'
-    return response
-
-
-@login_required
-def reporte_acta_curso_pdf(request, curso_id):
-    curso = get_object_or_404(Curso, pk=curso_id)
-    if request.user.role == "DOCENTE" and curso.docente_responsable != request.user:
-        return HttpResponseForbidden()
-    if request.user.role == "ESTUDIANTE":
-        return HttpResponseForbidden()
-    estudiantes = User.objects.filter(matriculas__curso=curso).distinct()
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    elements = []
-    styles = getSampleStyleSheet()
-    elements.append(Paragraph(f"Acta de curso - {curso.nombre}", styles["Title"]))
-    elements.append(Paragraph(f"Periodo: {curso.periodo_academico}", styles["Normal"]))
-    elements.append(Spacer(1, 12))
-    data = [["Estudiante", "Materia", "Nota", "Tipo"]]
-    calificaciones = Calificacion.objects.filter(materia__curso=curso).select_related("estudiante", "materia")
-    for cal in calificaciones:
-        data.append(
-            [
-                cal.estudiante.get_full_name(),
-                cal.materia.nombre,
-                float(cal.nota),
-                cal.get_tipo_evaluacion_display(),
-            ]
-        )
-    table = Table(data, hAlign="LEFT")
-    table.setStyle(TableStyle([("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey), ("GRID", (0, 0), (-1, -1), 0.5, colors.black)]))
-    elements.append(table)
-    doc.build(elements)
-    buffer.seek(0)
-    response = HttpResponse(buffer, content_type="application/pdf")
-    response["Content-Disposition"] = f'attachment; filename="acta_{curso.codigo}.pdf"'
-    return response
+    datos = datos_boletines([estudiante.pk])[estudiante.pk]
+    return cache_pdf.respuesta(
+        request,
+        "boletin",
+        estudiante.pk,
+        cache_pdf.huella_boletin(datos),
+        partial(dibujar_boletin, datos),
+        f"boletin_{estudiante.username}.pdf",
+    )
+
+
+@role_required(["ADMIN", "DOCENTE"])
+@lectura_replica
+def reporte_boletines_zip(request):
+    """
+    Un curso pequeño se descarga en la misma petición sin pool de procesos;
+    un curso grande o un periodo se encola para procesar_reportes.
+    """
+    curso_id = _entero(request.GET.get("curso"))
+    periodo = request.GET.get("periodo")
+    curso = None
+    if curso_id:
+        curso = get_object_or_404(Curso.objects.con_permiso(request.user), pk=curso_id)
+        if not curso.permitido:
+            return HttpResponseForbidden()
+        estudiantes = estudiantes_de(request.user, curso=curso)
+        if len(estudiantes) <= settings.BOLETINES_ZIP_SINCRONO:
+            response = StreamingHttpResponse(
+                metricas.medir_iterable(generar_zip(estudiantes, procesos=1), "boletines", "zip"),
+                content_type="application/zip",
+            )
+            response["Content-Disposition"] = f'attachment; filename="{nombre_zip(curso)}"'
+            return response
+        parametros = {"curso_id": curso.pk}
+    elif periodo:
+        parametros = {"periodo": periodo}
+    else:
+        messages.error(request, "Elige un curso o un periodo académico.")
+        return redirect("reportes_dashboard")
+    trabajo, _ = encolar(request.user, "BOLETINES_ZIP", parametros)
+    messages.info(request, "Los boletines se están generando; el enlace de descarga aparece aquí al terminar.")
+    return redirect(f"{reverse('reportes_dashboard')}?trabajo={trabajo.pk}")
 
 
 @login_required
-def exportar_estudiantes_excel(request, curso_id):
-    curso = get_object_or_404(Curso, pk=curso_id)
-    if request.user.role == "DOCENTE" and curso.docente_responsable != request.user:
-        return HttpResponseForbidden()
-    if request.user.role == "ESTUDIANTE" and not Matricula.objects.filter(estudiante=request.user, curso=curso).exists():
-        return HttpResponseForbidden()
-    estudiantes = User.objects.filter(matriculas__curso=curso, role="ESTUDIANTE")
-    datos = [
-        {
-            "Usuario": est.username,
-            "Nombre": est.get_full_name(),
-            "Código": getattr(est.perfil_estudiante, "codigo_estudiante", ""),
-            "Email": est.email,
-        }
-        for est in estudiantes
-    ]
-    df = pd.DataFrame(datos)
-    with io.BytesIO() as buffer:
-        df.to_excel(buffer, index=False)
-        buffer.seek(0)
-        response = HttpResponse(
-            buffer.getvalue(),
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        )
-    response["Content-Disposition"] = f'attachment; filename="estudiantes_{curso.codigo}.xlsx"'
-    return response
+@objeto_autorizado(Curso, roles=["ADMIN", "DOCENTE"], parametro="curso_id")
+@lectura_replica
+def reporte_acta_curso_pdf(request, curso):
+    datos = datos_acta(curso)
+    return cache_pdf.respuesta(
+        request,
+        "acta",
+        curso.pk,
+        cache_pdf.huella_acta(datos),
+        partial(dibujar_acta, datos),
+        f"acta_{curso.codigo}.pdf",
+    )
 
 
 @login_required
+@objeto_autorizado(Curso, parametro="curso_id")
+@lectura_replica
+def exportar_estudiantes_excel(request, curso):
+    return respuesta_exportacion(
+        request, f"estudiantes_{curso.codigo}", COLUMNAS_ESTUDIANTES, filas_estudiantes(curso), hoja="Estudiantes"
+    )
+
+
+@login_required
+@lectura_replica
 def exportar_calificaciones_excel(request):
-    if request.user.role == "ADMIN":
-        calificaciones = Calificacion.objects.all()
-    elif request.user.role == "DOCENTE":
-        calificaciones = Calificacion.objects.filter(materia__curso__docente_responsable=request.user)
-    else:
-        calificaciones = Calificacion.objects.filter(estudiante=request.user)
-    curso_id = request.GET.get("curso")
-    materia_id = request.GET.get("materia")
-    if curso_id:
-        calificaciones = calificaciones.filter(materia__curso_id=curso_id)
-    if materia_id:
-        calificaciones = calificaciones.filter(materia_id=materia_id)
-    datos = [
-        {
-            "Estudiante": cal.estudiante.get_full_name(),
-            "Materia": cal.materia.nombre,
-            "Curso": cal.materia.curso.nombre,
-            "Nota": float(cal.nota),
-            "Tipo": cal.get_tipo_evaluacion_display(),
-            "Fecha": cal.fecha.strftime("%Y-%m-%d"),
-        }
-        for cal in calificaciones
-    ]
-    df = pd.DataFrame(datos)
-    with io.BytesIO() as buffer:
-        df.to_excel(buffer, index=False)
-        buffer.seek(0)
-        response = HttpResponse(
-            buffer.getvalue(),
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        )
-    response["Content-Disposition"] = "attachment; filename=calificaciones.xlsx"
-    return response
+    # Se valida antes de responder: la consulta corre cuando ya empezó la descarga
+    filtros, error = _filtros_exportacion(request.GET)
+    if error:
+        return HttpResponseBadRequest(error)
+    filas = filas_calificaciones(request.user, filtros)
+    return respuesta_exportacion(request, "calificaciones", COLUMNAS_CALIFICACIONES, filas, hoja="Calificaciones")
 
 
 @login_required
+@lectura_replica
 def exportar_asistencias_excel(request):
-    desde_str = request.GET.get("desde")
-    hasta_str = request.GET.get("hasta")
-    if request.user.role == "ADMIN":
-        asistencias = Asistencia.objects.all()
-    elif request.user.role == "DOCENTE":
-        asistencias = Asistencia.objects.filter(materia__curso__docente_responsable=request.user)
+    filtros, error = _filtros_exportacion(request.GET)
+    if error:
+        return HttpResponseBadRequest(error)
+    filas = filas_asistencias(request.user, filtros)
+    return respuesta_exportacion(request, "asistencias", COLUMNAS_ASISTENCIAS, filas, hoja="Asistencias")
+
+
+def _entero(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _fecha(valor):
+    # parse_date devuelve None si no tiene forma de fecha y falla si es imposible (2024-13-01)
+    try:
+        return parse_date(valor)
+    except ValueError:
+        return None
+
+
+def _filtros_exportacion(parametros):
+    """Filtros curso/materia/desde/hasta validados de ``parametros``: (filtros, None) o (None, error)."""
+    filtros = {}
+    for clave in ("curso", "materia"):
+        if parametros.get(clave):
+            if _entero(parametros[clave]) is None:
+                return None, f"Filtro {clave} no válido."
+            filtros[clave] = _entero(parametros[clave])
+    for clave in ("desde", "hasta"):
+        if parametros.get(clave):
+            if _fecha(parametros[clave]) is None:
+                return None, f"Fecha {clave} no válida."
+            filtros[clave] = parametros[clave]
+    return filtros, None
+
+
+def _numero_pagina(request, parametro):
+    return max(1, _entero(request.GET.get(parametro)) or 1)
+
+
+def _estado_trabajo(trabajo):
+    datos = {
+        "id": trabajo.pk,
+        "tipo": trabajo.tipo,
+        "estado": trabajo.estado,
+        "creado": trabajo.creado.isoformat(),
+        "terminado": trabajo.terminado.isoformat() if trabajo.terminado else None,
+        "error": trabajo.error or None,
+        "estado_url": reverse("reporte_trabajo_estado", args=[trabajo.pk]),
+    }
+    if trabajo.estado == "COMPLETADO":
+        datos["descarga_url"] = reverse("reporte_trabajo_descargar", args=[trabajo.pk])
+    return datos
+
+
+def _puede_ver_trabajo(user, trabajo):
+    if trabajo.solicitado_por_id == user.pk:
+        return True
+    parametros = trabajo.parametros
+    if trabajo.tipo == "BOLETIN_PDF":
+        estudiante = User.objects.filter(pk=parametros.get("estudiante_id")).first()
+        return estudiante is not None and _puede_ver_boletin(user, estudiante)
+    if trabajo.tipo in ("ACTA_PDF", "ESTUDIANTES"):
+        if trabajo.tipo == "ACTA_PDF" and user.role == "ESTUDIANTE":
+            return False
+        return Curso.objects.para_usuario(user).filter(pk=parametros.get("curso_id")).exists()
+    return trabajo.alcance == alcance_de(user, trabajo.tipo)
+
+
+@login_required
+@require_POST
+def reporte_trabajo_solicitar(request):
+    tipo = request.POST.get("tipo")
+    if tipo not in TIPOS_REPORTE:
+        return JsonResponse({"error": "Tipo de reporte no válido."}, status=400)
+    if tipo == "BOLETIN_PDF":
+        estudiante_id = _entero(request.POST.get("estudiante_id") or request.user.pk)
+        estudiante = get_object_or_404(User, pk=estudiante_id, role="ESTUDIANTE")
+        if not _puede_ver_boletin(request.user, estudiante):
+            return HttpResponseForbidden()
+        parametros = {"estudiante_id": estudiante.pk}
+    elif tipo in ("ACTA_PDF", "ESTUDIANTES"):
+        curso = get_object_or_404(Curso.objects.con_permiso(request.user), pk=_entero(request.POST.get("curso_id")))
+        if not curso.permitido or (tipo == "ACTA_PDF" and request.user.role == "ESTUDIANTE"):
+            return HttpResponseForbidden()
+        parametros = {"curso_id": curso.pk}
     else:
-        asistencias = Asistencia.objects.filter(estudiante=request.user)
-    if desde_str:
-        asistencias = asistencias.filter(fecha__gte=desde_str)
-    if hasta_str:
-        asistencias = asistencias.filter(fecha__lte=hasta_str)
-    datos = [
-        {
-            "Estudiante": a.estudiante.get_full_name(),
-            "Materia": a.materia.nombre,
-            "Fecha": a.fecha.strftime("%Y-%m-%d"),
-            "Estado": a.get_estado_display(),
-        }
-        for a in asistencias
-    ]
-    df = pd.DataFrame(datos)
-    with io.BytesIO() as buffer:
-        df.to_excel(buffer, index=False)
-        buffer.seek(0)
-        response = HttpResponse(
-            buffer.getvalue(),
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        )
-    response["Content-Disposition"] = "attachment; filename=asistencias.xlsx"
-    return response
+        parametros, error = _filtros_exportacion(request.POST)
+        if error:
+            return JsonResponse({"error": error}, status=400)
+    if tipo not in ("BOLETIN_PDF", "ACTA_PDF"):
+        formato = request.POST.get("format", "xlsx")
+        if formato not in FORMATOS:
+            return JsonResponse({"error": "Formato no soportado. Usa xlsx, csv o jsonl."}, status=400)
+        parametros["format"] = formato
+    trabajo, creado = encolar(request.user, tipo, parametros)
+    return JsonResponse(_estado_trabajo(trabajo), status=202 if creado else 200)
+
+
+@login_required
+def reporte_trabajo_estado(request, pk):
+    trabajo = get_object_or_404(TrabajoReporte, pk=pk)
+    if not _puede_ver_trabajo(request.user, trabajo):
+        return HttpResponseForbidden()
+    return JsonResponse(_estado_trabajo(trabajo))
 
 
 @login_required
+def reporte_trabajo_descargar(request, pk):
+    trabajo = get_object_or_404(TrabajoReporte, pk=pk, estado="COMPLETADO")
+    if not _puede_ver_trabajo(request.user, trabajo):
+        return HttpResponseForbidden()
+    if not trabajo.archivo.storage.exists(trabajo.archivo.name):
+        raise Http404("El archivo del reporte ya no está disponible.")
+    return FileResponse(trabajo.archivo.open("rb"), as_attachment=True, filename=trabajo.nombre_descarga)
+
+
+@login_required
+@lectura_replica
 def panel_promedios(request):
     curso_id = request.GET.get("curso")
     periodo = request.GET.get("periodo")
-    materias = _materias_por_usuario(request.user)
+    materias = Materia.objects.para_usuario(request.user)
     if curso_id:
         materias = materias.filter(curso_id=curso_id)
     if periodo:
-        materias = materias.filter(curso__periodo_academico__icontains=periodo)
-    promedios = materias.annotate(promedio=Avg("calificaciones__nota"))
-    cursos = _cursos_por_usuario(request.user)
+        # Igualdad exacta para que la consulta use el índice de periodo_academico
+        materias = materias.filter(curso__periodo_academico=periodo)
+    promedios = anotar_promedios(materias.select_related("curso"))
+    cursos = Curso.objects.para_usuario(request.user)
+    periodos = cursos.order_by("periodo_academico").values_list("periodo_academico", flat=True).distinct()
     return render(
         request,
         "academico/panel_promedios.html",
-        {"promedios": promedios, "cursos": cursos, "curso_id": curso_id, "periodo": periodo},
+        {"promedios": promedios, "cursos": cursos, "periodos": periodos, "curso_id": curso_id, "periodo": periodo},
+    )
+
+
+@role_required(["ADMIN", "DOCENTE"])
+@lectura_replica
+def estudiantes_riesgo(request):
+    materias = Materia.objects.para_usuario(request.user)
+    for clave, campo in (("curso", "curso_id"), ("materia", "pk")):
+        if request.GET.get(clave):
+            if _entero(request.GET[clave]) is None:
+                messages.error(request, "Filtro no válido.")
+                materias = Materia.objects.none()
+                break
+            materias = materias.filter(**{campo: _entero(request.GET[clave])})
+    riesgo = con_estudiantes(estudiantes_en_riesgo(materias))
+    return render(
+        request,
+        "academico/estudiantes_riesgo.html",
+        {
+            "riesgo": riesgo,
+            "cursos": Curso.objects.para_usuario(request.user),
+            "materias": Materia.objects.para_usuario(request.user).select_related("curso"),
+            "filtros": request.GET,
+            "nota_minima": settings.RIESGO_NOTA_MINIMA,
+            "inasistencia_maxima": settings.RIESGO_INASISTENCIA_MAXIMA,
+        },
+    )
+
+
+def _calificaciones_filtradas(request):
+    """Calificaciones visibles para el rol con los filtros curso/materia/tipo_evaluacion/periodo, o None si no son válidos."""
+    calificaciones = Calificacion.objects.para_usuario(request.user)
+    for clave, campo in (("curso", "materia__curso_id"), ("materia", "materia_id")):
+        if request.GET.get(clave):
+            if _entero(request.GET[clave]) is None:
+                return None
+            calificaciones = calificaciones.filter(**{campo: _entero(request.GET[clave])})
+    tipo = request.GET.get("tipo_evaluacion")
+    if tipo:
+        if tipo not in dict(Calificacion.TIPO_EVALUACION):
+            return None
+        calificaciones = calificaciones.filter(tipo_evaluacion=tipo)
+    if request.GET.get("periodo"):
+        calificaciones = calificaciones.filter(materia__curso__periodo_academico=request.GET["periodo"])
+    return calificaciones
+
+
+@login_required
+@lectura_replica
+def estadisticas_notas(request):
+    calificaciones = _calificaciones_filtradas(request)
+    if calificaciones is None:
+        return JsonResponse({"error": "Filtro no válido."}, status=400)
+    return JsonResponse(estadisticas(calificaciones))
+
+
+@login_required
+@lectura_replica
+def panel_estadisticas(request):
+    calificaciones = _calificaciones_filtradas(request)
+    if calificaciones is None:
+        messages.error(request, "Filtro no válido.")
+        calificaciones = Calificacion.objects.none()
+    cursos = Curso.objects.para_usuario(request.user)
+    periodos = cursos.order_by("periodo_academico").values_list("periodo_academico", flat=True).distinct()
+    return render(
+        request,
+        "academico/panel_estadisticas.html",
+        {
+            "datos": estadisticas(calificaciones),
+            "cursos": cursos,
+            "periodos": periodos,
+            "tipos": Calificacion.TIPO_EVALUACION,
+            "filtros": request.GET,
+        },
     )
 
 
 @login_required
+@lectura_replica
 def reportes_dashboard(request):
-    cursos = _cursos_por_usuario(request.user)
-    return render(request, "academico/reportes_dashboard.html", {"cursos": cursos})
+    cursos = Curso.objects.para_usuario(request.user)
+    periodos = cursos.order_by("periodo_academico").values_list("periodo_academico", flat=True).distinct()
+    # Boletines ZIP encolados por reporte_boletines_zip; su estado lo escribe el worker, se lee de default
+    trabajo = None
+    if request.GET.get("trabajo", "").isdigit():
+        trabajos_zip = TrabajoReporte.objects.using(DEFAULT_DB_ALIAS).filter(tipo="BOLETINES_ZIP")
+        trabajo = trabajos_zip.filter(pk=request.GET["trabajo"]).first()
+        if trabajo is not None and not _puede_ver_trabajo(request.user, trabajo):
+            trabajo = None
+    return render(
+        request, "academico/reportes_dashboard.html", {"cursos": cursos, "periodos": periodos, "trabajo": trabajo}
+    )
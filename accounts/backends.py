@@ -0,0 +1,55 @@
+"""
+Usuario de la sesión desde caché.
+
+``AuthenticationMiddleware`` carga en cada petición el usuario de la sesión con
+``get_user`` del backend. ``BackendUsuarioEnCache`` lo lee de la caché
+``sesiones`` (compartida entre workers) y solo consulta la base si no está o
+venció; con ``SESSION_ENGINE`` cached_db la sesión tampoco se lee de la base,
+así que una página no hace consultas de autenticación.
+
+Cualquier guardado o borrado del usuario (editar, activar/desactivar, cambiar
+la contraseña, el login que actualiza last_login) borra su entrada con un
+signal: la siguiente petición lo vuelve a leer, un usuario desactivado queda
+fuera de inmediato y una contraseña nueva invalida las sesiones abiertas, como
+sin caché. Los ``update()`` masivos sobre usuarios no disparan signals y deben
+llamar a ``invalidar_usuario``.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+
+def _cache():
+    return caches[settings.SESSION_CACHE_ALIAS]
+
+
+def _clave(user_id):
+    return f"usuario:{user_id}"
+
+
+def usuario_en_cache(user_id):
+    """El usuario con id ``user_id`` (con su rol), de la caché o de la base; None si no existe."""
+    cache = _cache()
+    clave = _clave(user_id)
+    usuario = cache.get(clave)
+    if usuario is None:
+        usuario = get_user_model()._default_manager.filter(pk=user_id).first()
+        if usuario is None:
+            return None
+        cache.set(clave, usuario, settings.USUARIOS_CACHE_S)
+    return usuario
+
+
+def invalidar_usuario(user_id):
+    _cache().delete(_clave(user_id))
+
+
+class BackendUsuarioEnCache(ModelBackend):
+    """ModelBackend que toma de la caché al usuario de cada petición."""
+
+    def get_user(self, user_id):
+        usuario = usuario_en_cache(user_id)
+        # is_active del usuario en caché: al desactivarlo su entrada se borra
+        return usuario if usuario is not None and self.user_can_authenticate(usuario) else None
@@ -0,0 +1,55 @@
+"""
+Hash de contraseñas en paralelo para importaciones masivas.
+
+Este módulo no importa modelos: los procesos hijos solo necesitan la
+configuración de Django para leer PASSWORD_HASHERS.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+
+# Por debajo de este número no compensa arrancar procesos.
+MINIMO_PARALELO = 64
+
+
+def _inicializar(modulo_settings):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", modulo_settings)
+    import django
+
+    django.setup()
+
+
+def _hashear(contrasena):
+    # Sin contraseña la cuenta queda sin acceso hasta que el administrador la asigne
+    return make_password(contrasena or None)
+
+
+class Hasheador:
+    """Pool de procesos reutilizable entre lotes; se usa como context manager."""
+
+    def __init__(self, procesos=None):
+        self.procesos = procesos or os.cpu_count() or 1
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def hashear(self, contrasenas):
+        contrasenas = list(contrasenas)
+        if self.procesos < 2 or len(contrasenas) < MINIMO_PARALELO:
+            return [_hashear(contrasena) for contrasena in contrasenas]
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.procesos,
+                initializer=_inicializar,
+                initargs=(os.environ.get("DJANGO_SETTINGS_MODULE", "gestion_academica.settings"),),
+            )
+        bloque = max(1, len(contrasenas) // (self.procesos * 4))
+        return list(self._pool.map(_hashear, contrasenas, chunksize=bloque))
@@ -1,19 +1,47 @@
-from django.contrib.auth.decorators import user_passes_test
-from django.http import HttpResponseForbidden
+from functools import wraps
 
+from django.http import Http404, HttpResponseForbidden
 
-def role_required(roles):
-    def check(user):
-        return user.is_authenticated and user.role in roles
+MENSAJE_SIN_PERMISO = "No tienes permiso para acceder a esta sección."
 
-    def decorator(view_func):
-        decorated = user_passes_test(check)(view_func)
 
+def role_required(roles):
+    def decorator(view_func):
+        # Una sola comprobación sobre request.user, que ya viene de la caché (accounts/backends.py)
+        @wraps(view_func)
         def _wrapped_view(request, *args, **kwargs):
             if not request.user.is_authenticated or request.user.role not in roles:
-                return HttpResponseForbidden("No tienes permiso para acceder a esta sección.")
-            return decorated(request, *args, **kwargs)
+                return HttpResponseForbidden(MENSAJE_SIN_PERMISO)
+            return view_func(request, *args, **kwargs)
+
+        return _wrapped_view
+
+    return decorator
+
+
+def objeto_autorizado(modelo, roles=None, parametro="pk", relacionados=(), ademas=None):
+    """
+    Reemplaza el id ``parametro`` de la URL por el objeto de ``modelo``, leído en
+    una sola consulta con ``modelo.objects.con_permiso(usuario)``: 404 si no
+    existe y 403 si queda fuera del alcance del rol. ``roles`` se valida antes
+    con role_required, sin consultar la base; ``ademas(usuario)`` es una Q que
+    amplía el alcance.
+    """
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            extra = ademas(request.user) if ademas else None
+            consulta = modelo.objects.con_permiso(request.user, extra).select_related(*relacionados)
+            objeto = consulta.filter(pk=kwargs.pop(parametro)).first()
+            if objeto is None:
+                raise Http404(f"No existe el {modelo._meta.verbose_name} solicitado.")
+            if not objeto.permitido:
+                return HttpResponseForbidden(MENSAJE_SIN_PERMISO)
+            return view_func(request, objeto, *args, **kwargs)
 
+        if roles:
+            return role_required(roles)(_wrapped_view)
         return _wrapped_view
 
     return decorator
@@ -1,5 +1,6 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm, AuthenticationForm
+from .importacion import validar_archivo
 from .models import User, PerfilDocente, PerfilEstudiante
 
 
@@ -54,3 +55,20 @@ class PerfilEstudianteForm(forms.ModelForm):
             "programa": forms.TextInput(attrs={"class": "form-control"}),
             "fecha_nacimiento": forms.DateInput(attrs={"class": "form-control", "type": "date"}),
         }
+
+
+class ImportarUsuariosForm(forms.Form):
+    archivo = forms.FileField(
+        help_text="CSV o XLSX con encabezado: username, first_name, last_name, email, role, password, "
+        "codigo_estudiante, programa, fecha_nacimiento, especialidad, telefono, cursos.",
+        widget=forms.ClearableFileInput(attrs={"class": "form-control", "accept": ".csv,.xlsx"}),
+    )
+
+    def clean_archivo(self):
+        archivo = self.cleaned_data["archivo"]
+        if not archivo.name.lower().endswith((".csv", ".xlsx")):
+            raise forms.ValidationError("El archivo debe ser .csv o .xlsx.")
+        # Codificación o formato dañado se informan aquí y no en el worker
+        if not validar_archivo(archivo, archivo.name):
+            raise forms.ValidationError("El archivo no tiene filas con datos.")
+        return archivo
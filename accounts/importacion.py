@@ -0,0 +1,231 @@
+"""
+Importación masiva de usuarios, perfiles y matrículas desde CSV o XLSX.
+
+El archivo se lee fila a fila y se procesa por lotes: las contraseñas se
+hashean en un pool de procesos y cada lote se inserta con bulk_create en una
+transacción. bulk_create no emite signals, así que los perfiles y el índice del
+buscador se actualizan aquí y la versión de datos se incrementa una vez.
+
+Columnas reconocidas (la primera fila es el encabezado): username, first_name,
+last_name, email, role, password, codigo_estudiante, programa,
+fecha_nacimiento, especialidad, telefono y cursos (códigos separados por ";").
+"""
+
+import csv
+import io
+from datetime import date, datetime
+from zipfile import BadZipFile
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+
+from academico import busqueda, versiones
+from academico.models import Curso, Matricula
+from .contrasenas import Hasheador
+from .models import PerfilDocente, PerfilEstudiante, User
+
+TAMANO_LOTE = 1000
+EXTENSIONES = (".csv", ".xlsx")
+
+
+def _texto(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, datetime):
+        return valor.date().isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, float) and valor.is_integer():
+        # Excel guarda los códigos numéricos como float
+        return str(int(valor))
+    return str(valor).strip()
+
+
+def _con_datos(filas):
+    encabezado = [_texto(columna).lower() for columna in next(filas, [])]
+    for numero, valores in enumerate(filas, start=2):
+        datos = {columna: _texto(valor) for columna, valor in zip(encabezado, valores) if columna}
+        if any(datos.values()):
+            yield numero, datos
+
+
+def leer_filas(archivo, nombre):
+    """
+    Genera (número de fila, dict columna -> texto) sin cargar el archivo
+    completo. Un XLSX dañado o un CSV que no está en UTF-8 lanzan
+    ValidationError.
+    """
+    if nombre.lower().endswith(".xlsx"):
+        try:
+            libro = load_workbook(archivo, read_only=True, data_only=True)
+        except (BadZipFile, InvalidFileException, KeyError) as exc:
+            raise ValidationError("El archivo no es un libro de Excel (.xlsx) válido.") from exc
+        try:
+            yield from _con_datos(libro.active.iter_rows(values_only=True))
+        finally:
+            libro.close()
+    else:
+        texto = io.TextIOWrapper(archivo, encoding="utf-8-sig", newline="")
+        try:
+            yield from _con_datos(csv.reader(texto))
+        except UnicodeDecodeError as exc:
+            raise ValidationError("El CSV debe estar codificado en UTF-8.") from exc
+        finally:
+            # Sin cerrar el archivo, que se vuelve a leer después de validarlo
+            texto.detach()
+
+
+def validar_archivo(archivo, nombre):
+    """Recorre el archivo sin importar nada y lo deja al inicio; devuelve el número de filas con datos."""
+    filas = sum(1 for _ in leer_filas(archivo, nombre))
+    archivo.seek(0)
+    return filas
+
+
+def _mensaje(error):
+    if hasattr(error, "message_dict"):
+        return "; ".join(f"{campo}: {' '.join(mensajes)}" for campo, mensajes in error.message_dict.items())
+    return " ".join(error.messages)
+
+
+class _Importador:
+    def __init__(self, hasheador):
+        self.hasheador = hasheador
+        self.cursos = dict(Curso.objects.values_list("codigo", "id"))
+        self.usernames = set()
+        self.codigos = set()
+        self.creados = 0
+        self.matriculas = 0
+        self.errores = []
+
+    def _preparar(self, numero, datos):
+        """Valida la fila sin consultar la base; devuelve el registro o None si tiene errores."""
+        usuario = User(
+            username=datos.get("username", ""),
+            first_name=datos.get("first_name", ""),
+            last_name=datos.get("last_name", ""),
+            email=datos.get("email", ""),
+            role=(datos.get("role") or "ESTUDIANTE").upper(),
+        )
+        perfil = None
+        curso_ids = []
+        try:
+            usuario.clean_fields(exclude=["password"])
+            if usuario.role == "ESTUDIANTE":
+                perfil = PerfilEstudiante(
+                    codigo_estudiante=datos.get("codigo_estudiante", ""),
+                    programa=datos.get("programa") or "Pendiente",
+                    fecha_nacimiento=datos.get("fecha_nacimiento") or None,
+                )
+                perfil.clean_fields(exclude=["user"])
+                for codigo in filter(None, (c.strip() for c in datos.get("cursos", "").split(";"))):
+                    if codigo not in self.cursos:
+                        raise ValidationError({"cursos": [f"No existe el curso {codigo}."]})
+                    curso_ids.append(self.cursos[codigo])
+            elif usuario.role == "DOCENTE":
+                perfil = PerfilDocente(especialidad=datos.get("especialidad", ""), telefono=datos.get("telefono", ""))
+                perfil.clean_fields(exclude=["user"])
+        except ValidationError as exc:
+            self.errores.append((numero, _mensaje(exc)))
+            return None
+        if usuario.username in self.usernames:
+            self.errores.append((numero, f"username: {usuario.username} está repetido en el archivo."))
+            return None
+        codigo = getattr(perfil, "codigo_estudiante", None)
+        if codigo and codigo in self.codigos:
+            self.errores.append((numero, f"codigo_estudiante: {codigo} está repetido en el archivo."))
+            return None
+        self.usernames.add(usuario.username)
+        if codigo:
+            self.codigos.add(codigo)
+        return numero, usuario, perfil, curso_ids, datos.get("password", "")
+
+    def procesar_lote(self, filas):
+        registros = [registro for registro in (self._preparar(numero, datos) for numero, datos in filas) if registro]
+        if not registros:
+            return
+        # Una consulta por lote para los valores únicos que ya existen en la base
+        usados = set(User.objects.filter(username__in=[r[1].username for r in registros]).values_list("username", flat=True))
+        codigos = [r[2].codigo_estudiante for r in registros if isinstance(r[2], PerfilEstudiante)]
+        codigos_usados = set(
+            PerfilEstudiante.objects.filter(codigo_estudiante__in=codigos).values_list("codigo_estudiante", flat=True)
+        )
+        validos = []
+        for registro in registros:
+            numero, usuario, perfil = registro[:3]
+            if usuario.username in usados:
+                self.errores.append((numero, f"username: ya existe el usuario {usuario.username}."))
+            elif isinstance(perfil, PerfilEstudiante) and perfil.codigo_estudiante in codigos_usados:
+                self.errores.append((numero, f"codigo_estudiante: {perfil.codigo_estudiante} ya está registrado."))
+            else:
+                validos.append(registro)
+        if not validos:
+            return
+
+        for registro, hash_ in zip(validos, self.hasheador.hashear(r[4] for r in validos)):
+            registro[1].password = hash_
+        self._guardar(validos)
+
+    def _guardar(self, registros):
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create([r[1] for r in registros])
+                perfiles_estudiante, perfiles_docente, matriculas = [], [], []
+                for _, usuario, perfil, curso_ids, _ in registros:
+                    if perfil is not None:
+                        perfil.user = usuario
+                        (perfiles_docente if isinstance(perfil, PerfilDocente) else perfiles_estudiante).append(perfil)
+                    matriculas.extend(Matricula(estudiante=usuario, curso_id=curso_id) for curso_id in set(curso_ids))
+                PerfilEstudiante.objects.bulk_create(perfiles_estudiante)
+                PerfilDocente.objects.bulk_create(perfiles_docente)
+                Matricula.objects.bulk_create(matriculas)
+                busqueda.indexar_estudiantes([r[1].pk for r in registros])
+        except IntegrityError as exc:
+            # Otro proceso registró alguno de los valores entre la validación y el INSERT:
+            # se reintenta por mitades hasta aislar las filas que chocan
+            for _, usuario, perfil, _, _ in registros:
+                usuario.pk = None
+                if perfil is not None:
+                    perfil.pk = None
+            if len(registros) == 1:
+                self.errores.append((registros[0][0], f"No se pudo guardar: {exc}"))
+                return
+            mitad = len(registros) // 2
+            self._guardar(registros[:mitad])
+            self._guardar(registros[mitad:])
+            return
+        self.creados += len(registros)
+        self.matriculas += len(matriculas)
+
+
+def importar_usuarios(filas, procesos=None, tamano_lote=TAMANO_LOTE, al_guardar_lote=None):
+    """
+    Importa las filas de ``leer_filas``. Las filas con errores se omiten y el
+    resto se guarda. Devuelve (usuarios creados, matrículas creadas, errores),
+    donde errores es una lista de (número de fila, mensaje).
+
+    Cada lote queda guardado al terminarlo: si la importación se corta, lo ya
+    importado se conserva. ``al_guardar_lote`` recibe los conteos acumulados
+    tras cada lote para poder registrar el avance.
+    """
+    with Hasheador(procesos) as hasheador:
+        importador = _Importador(hasheador)
+        try:
+            lote = []
+            for fila in filas:
+                lote.append(fila)
+                if len(lote) >= tamano_lote:
+                    importador.procesar_lote(lote)
+                    lote = []
+                    if al_guardar_lote:
+                        al_guardar_lote(importador.creados, importador.matriculas, importador.errores)
+            importador.procesar_lote(lote)
+        finally:
+            # También si falla a mitad: los lotes ya guardados invalidan las cachés
+            if importador.creados:
+                versiones.incrementar("usuarios")
+            if importador.matriculas:
+                versiones.incrementar("matriculas")
+    return importador.creados, importador.matriculas, importador.errores
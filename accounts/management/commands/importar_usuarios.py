@@ -0,0 +1,36 @@
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.importacion import EXTENSIONES, TAMANO_LOTE, importar_usuarios, leer_filas, validar_archivo
+
+
+class Command(BaseCommand):
+    help = "Importa usuarios, perfiles y matrículas desde un archivo CSV o XLSX."
+
+    def add_arguments(self, parser):
+        parser.add_argument("archivo", help="Ruta del archivo .csv o .xlsx con encabezado.")
+        parser.add_argument("--procesos", type=int, help="Procesos para hashear contraseñas (por defecto, uno por CPU).")
+        parser.add_argument("--lote", type=int, default=TAMANO_LOTE, help="Filas por transacción.")
+
+    def handle(self, *args, **options):
+        ruta = Path(options["archivo"])
+        if ruta.suffix.lower() not in EXTENSIONES:
+            raise CommandError("El archivo debe ser .csv o .xlsx.")
+        if not ruta.exists():
+            raise CommandError(f"No existe el archivo {ruta}.")
+        with open(ruta, "rb") as archivo:
+            # Antes de importar nada: un error de formato a mitad de archivo dejaría lotes ya guardados
+            try:
+                validar_archivo(archivo, ruta.name)
+            except ValidationError as exc:
+                raise CommandError(" ".join(exc.messages))
+            creados, matriculas, errores = importar_usuarios(
+                leer_filas(archivo, ruta.name), procesos=options["procesos"], tamano_lote=options["lote"]
+            )
+        for numero, mensaje in errores:
+            self.stderr.write(f"Fila {numero}: {mensaje}")
+        self.stdout.write(
+            self.style.SUCCESS(f"{creados} usuarios y {matriculas} matrículas creados; {len(errores)} filas con errores.")
+        )
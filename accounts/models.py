@@ -8,7 +8,7 @@ class User(AbstractUser):
         ("DOCENTE", "Docente"),
         ("ESTUDIANTE", "Estudiante"),
     )
-    role = models.CharField(max_length=20, choices=ROLE_CHOICES, default="ESTUDIANTE")
+    role = models.CharField(max_length=20, choices=ROLE_CHOICES, default="ESTUDIANTE", db_index=True)
 
     def is_admin(self):
         return self.role == "ADMIN"
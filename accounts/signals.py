@@ -1,5 +1,6 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from .backends import invalidar_usuario
 from .models import User, PerfilDocente, PerfilEstudiante
 
 
@@ -12,3 +13,10 @@ def crear_perfil(sender, instance, created, **kwargs):
     elif instance.role == "ESTUDIANTE":
         # Provide a placeholder code; admin must update with a unique code
         PerfilEstudiante.objects.create(user=instance, codigo_estudiante=f"AUTO-{instance.id}", programa="Pendiente")
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidar_usuario_en_cache(sender, instance, **kwargs):
+    # Editar, activar/desactivar o cambiar la contraseña: la próxima petición lee el usuario de la base
+    invalidar_usuario(instance.pk)
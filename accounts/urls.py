@@ -3,6 +3,7 @@ from .views import (
     CustomLoginView,
     CustomLogoutView,
     registrar_usuario,
+    usuarios_importar,
     usuarios_lista,
     usuario_editar,
     usuario_reset_password,
@@ -15,6 +16,7 @@ urlpatterns = [
     path("logout/", CustomLogoutView.as_view(), name="logout"),
     path("registrar/", registrar_usuario, name="registrar_usuario"),
     path("usuarios/", usuarios_lista, name="usuarios_lista"),
+    path("usuarios/importar/", usuarios_importar, name="usuarios_importar"),
     path("usuarios/<int:pk>/editar/", usuario_editar, name="usuario_editar"),
     path("usuarios/<int:pk>/password/", usuario_reset_password, name="usuario_reset_password"),
     path("usuarios/<int:pk>/toggle/", usuario_toggle_activo, name="usuario_toggle_activo"),
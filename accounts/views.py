@@ -7,8 +7,12 @@ from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse, reverse_lazy
 from django.contrib.auth.forms import SetPasswordForm
 
+from academico.models import TrabajoReporte
+from academico.paginacion import paginar
+from academico.trabajos import encolar_importacion
+
 from .decorators import role_required
-from .forms import CustomUserCreationForm, CustomUserChangeForm, LoginForm
+from .forms import CustomUserCreationForm, CustomUserChangeForm, ImportarUsuariosForm, LoginForm
 from .models import User
 
 
@@ -70,10 +74,24 @@ def registrar_usuario(request):
     return render(request, "accounts/registro.html", {"form": form})
 
 
+@role_required(["ADMIN"])
+def usuarios_importar(request):
+    """Valida el archivo y lo encola: el hash de miles de contraseñas no cabe en una petición."""
+    form = ImportarUsuariosForm(request.POST or None, request.FILES or None)
+    if request.method == "POST" and form.is_valid():
+        trabajo = encolar_importacion(request.user, form.cleaned_data["archivo"])
+        messages.info(request, "Importación en cola; esta página muestra el resultado al terminar.")
+        return redirect(f"{reverse('usuarios_importar')}?trabajo={trabajo.pk}")
+    trabajo = None
+    if request.GET.get("trabajo", "").isdigit():
+        trabajo = TrabajoReporte.objects.filter(pk=request.GET["trabajo"], tipo="IMPORTAR_USUARIOS").first()
+    return render(request, "accounts/usuarios_importar.html", {"form": form, "trabajo": trabajo})
+
+
 @role_required(["ADMIN"])
 def usuarios_lista(request):
-    usuarios = User.objects.all().order_by("username")
-    return render(request, "accounts/usuarios_lista.html", {"usuarios": usuarios})
+    pagina = paginar(request, User.objects.all(), ("username",))
+    return render(request, "accounts/usuarios_lista.html", {"usuarios": pagina, "pagina": pagina})
 
 
 @role_required(["ADMIN"])
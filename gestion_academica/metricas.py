@@ -0,0 +1,95 @@
+"""
+Métricas en formato de exposición de Prometheus, servidas en ``/metrics``.
+
+Con gunicorn cada worker lleva sus propios contadores; si la variable de
+entorno PROMETHEUS_MULTIPROC_DIR apunta a una carpeta compartida (vacía al
+arrancar, ver gunicorn.conf.py), cada proceso escribe ahí sus valores y la
+vista los suma. Los comandos de gestión que se ejecuten con la misma variable
+(por ejemplo ``enviar_correos``) también aparecen en el total.
+"""
+
+import contextlib
+import hmac
+import os
+import time
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+BUCKETS_CONSULTAS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+BUCKETS_REPORTES = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+peticiones_segundos = Histogram(
+    "academico_peticion_segundos", "Duración de las peticiones por nombre de URL.", ["vista", "metodo"]
+)
+peticiones_total = Counter("academico_peticiones_total", "Peticiones por nombre de URL y código HTTP.", ["vista", "estado"])
+db_consultas = Histogram(
+    "academico_db_consultas", "Consultas SQL por petición.", ["vista"], buckets=BUCKETS_CONSULTAS
+)
+db_segundos = Histogram("academico_db_segundos", "Tiempo en base de datos por petición.", ["vista"])
+reporte_segundos = Histogram(
+    "academico_reporte_segundos", "Tiempo de generación de reportes PDF y exportaciones.", ["tipo", "formato"],
+    buckets=BUCKETS_REPORTES,
+)
+correos_total = Counter(
+    "academico_correos_total", "Correos de calificaciones por resultado (encolado, enviado, error, fallido).", ["resultado"]
+)
+cache_total = Counter("academico_cache_total", "Consultas a cachés por resultado (acierto, fallo).", ["cache", "resultado"])
+
+
+def observar_peticion(vista, metodo, estado, segundos, consultas, segundos_db):
+    peticiones_segundos.labels(vista, metodo).observe(segundos)
+    peticiones_total.labels(vista, estado).inc()
+    db_consultas.labels(vista).observe(consultas)
+    db_segundos.labels(vista).observe(segundos_db)
+
+
+def registrar_cache(cache, acierto):
+    cache_total.labels(cache, "acierto" if acierto else "fallo").inc()
+
+
+def registrar_correos(resultado, cantidad=1):
+    if cantidad:
+        correos_total.labels(resultado).inc(cantidad)
+
+
+@contextlib.contextmanager
+def medir_reporte(tipo, formato):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        reporte_segundos.labels(tipo, formato).observe(time.perf_counter() - inicio)
+
+
+def medir_iterable(bloques, tipo, formato):
+    """Mide una generación en streaming hasta que se entrega el último bloque."""
+    with medir_reporte(tipo, formato):
+        yield from bloques
+
+
+def _registro():
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registro = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+        return registro
+    return REGISTRY
+
+
+def autorizado(request):
+    """Si la petición puede ver datos internos de rendimiento: /metrics y, fuera de DEBUG, Server-Timing."""
+    token = settings.METRICAS_TOKEN
+    if token and hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return True
+    if request.META.get("REMOTE_ADDR") in settings.METRICAS_IPS:
+        return True
+    # Sin token ni IPs configurados solo queda abierto en desarrollo
+    return settings.DEBUG and not token and not settings.METRICAS_IPS
+
+
+def metricas(request):
+    if not autorizado(request):
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(_registro()), content_type=CONTENT_TYPE_LATEST)
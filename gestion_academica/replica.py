@@ -0,0 +1,105 @@
+"""
+Réplica de lectura para reportes, exportaciones, paneles y dashboards.
+
+Si DATABASES define el alias ``replica``, las vistas marcadas con
+``@lectura_replica`` hacen sus lecturas ahí (también mientras se entrega una
+respuesta en streaming) y el resto sigue en ``default``; las escrituras van
+siempre a ``default``. El usuario de la sesión se carga antes de entrar a la
+vista (de su caché o de ``default``), así que uno desactivado pierde el acceso
+de inmediato.
+
+Para leer lo que uno mismo acaba de escribir, ``ReplicaMiddleware`` deja una
+cookie durante REPLICA_VENTANA_S segundos cuando una petición escribe en la
+base, y mientras exista esas vistas leen de ``default``.
+
+En local la réplica es una copia del archivo SQLite que actualiza el comando
+``copiar_replica``; en producción puede ser cualquier réplica del motor usado.
+"""
+
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.http import FileResponse
+
+ALIAS = "replica"
+COOKIE = "leer_principal"
+
+_en_replica = ContextVar("en_replica", default=False)
+# Lista de la petición en curso donde el router anota cada escritura
+_escrituras = ContextVar("escrituras", default=None)
+
+
+def disponible():
+    return ALIAS in settings.DATABASES
+
+
+class RouterReplica:
+    def db_for_read(self, model, **hints):
+        # Explícito también fuera de la réplica: si no, un objeto leído de la
+        # réplica haría sus consultas relacionadas en ella
+        return ALIAS if _en_replica.get() else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        escrituras = _escrituras.get()
+        if escrituras is not None:
+            escrituras.append(model._meta.label)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica es una copia de default, incluidas sus migraciones
+        return db != ALIAS
+
+
+def _en_replica_mientras(bloques):
+    # Solo mientras se produce cada bloque: entre uno y otro el servidor sigue en su contexto
+    iterador = iter(bloques)
+    while True:
+        token = _en_replica.set(True)
+        try:
+            bloque = next(iterador)
+        except StopIteration:
+            return
+        finally:
+            _en_replica.reset(token)
+        yield bloque
+
+
+def lectura_replica(view_func):
+    """Hace las lecturas de la vista en la réplica, salvo justo después de que el usuario escribió."""
+
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        if not disponible() or COOKIE in request.COOKIES:
+            return view_func(request, *args, **kwargs)
+        token = _en_replica.set(True)
+        try:
+            response = view_func(request, *args, **kwargs)
+        finally:
+            _en_replica.reset(token)
+        # Los ZIP y exportaciones consultan mientras se entregan; un archivo ya no consulta
+        if response.streaming and not isinstance(response, FileResponse):
+            response.streaming_content = _en_replica_mientras(response.streaming_content)
+        return response
+
+    return _wrapped_view
+
+
+class ReplicaMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        escrituras = []
+        token = _escrituras.set(escrituras)
+        try:
+            response = self.get_response(request)
+        finally:
+            _escrituras.reset(token)
+        if escrituras and disponible():
+            response.set_cookie(COOKIE, "1", max_age=settings.REPLICA_VENTANA_S, httponly=True, samesite="Lax")
+        return response
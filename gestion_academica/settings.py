@@ -22,11 +22,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "gestion_academica.tiempos.TiemposMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "gestion_academica.replica.ReplicaMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -35,7 +37,8 @@ ROOT_URLCONF = "gestion_academica.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # DjangoTemplates que además mide el tiempo de render (Server-Timing)
+        "BACKEND": "gestion_academica.tiempos.PlantillasMedidas",
         "DIRS": [BASE_DIR / "templates"],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -52,18 +55,66 @@ TEMPLATES = [
 WSGI_APPLICATION = "gestion_academica.wsgi.application"
 
 # Database
+# Perfil de producción de SQLite (gestion_academica/sqlite.py): WAL, synchronous=NORMAL,
+# caché y mmap por conexión, espera ante bloqueos y transacciones BEGIN IMMEDIATE
+SQLITE_PERFIL_PRODUCCION = os.environ.get("SQLITE_PERFIL_PRODUCCION", "True") == "True"
+SQLITE_CACHE_MB = int(os.environ.get("SQLITE_CACHE_MB", 64))
+SQLITE_MMAP_MB = int(os.environ.get("SQLITE_MMAP_MB", 256))
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000))
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {"transaction_mode": "IMMEDIATE"} if SQLITE_PERFIL_PRODUCCION else {},
     }
 }
 
+# Réplica de lectura para reportes, exportaciones, paneles y dashboards (gestion_academica/replica.py).
+# REPLICA_SQLITE es la copia local que actualiza "manage.py copiar_replica"; vacía, todo lee de default.
+REPLICA_SQLITE = os.environ.get("REPLICA_SQLITE", "")
+# Tras escribir, el usuario lee de default durante estos segundos
+REPLICA_VENTANA_S = int(os.environ.get("REPLICA_VENTANA_S", 120))
+if REPLICA_SQLITE:
+    DATABASES["replica"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        # Solo lectura: nada que no sea copiar_replica puede modificar la copia
+        "NAME": f"file:{Path(REPLICA_SQLITE).resolve()}?mode=ro",
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_ROUTERS = ["gestion_academica.replica.RouterReplica"]
+
 # Authentication
 AUTH_USER_MODEL = "accounts.User"
 LOGIN_REDIRECT_URL = "dashboard"
 LOGOUT_REDIRECT_URL = "login"
 LOGIN_URL = "login"
+# El usuario de cada petición sale de la caché "sesiones" (accounts/backends.py)
+AUTHENTICATION_BACKENDS = ["accounts.backends.BackendUsuarioEnCache"]
+USUARIOS_CACHE_S = int(os.environ.get("USUARIOS_CACHE_S", 600))
+
+# Caché. "sesiones" guarda las sesiones (cached_db: también en la base) y los usuarios; debe ser compartida
+# entre workers para que cerrar sesión o desactivar un usuario valga en todos. Por defecto en archivos en
+# CACHE_SESIONES_DIR; con Redis: CACHE_SESIONES_BACKEND=django.core.cache.backends.redis.RedisCache y
+# CACHE_SESIONES_LOCATION=redis://host:6379/1
+CACHE_SESIONES_BACKEND = os.environ.get(
+    "CACHE_SESIONES_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"
+)
+CACHE_SESIONES_DIR = Path(os.environ.get("CACHE_SESIONES_DIR", BASE_DIR / "cache" / "sesiones"))
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    # Sesiones y usuarios guardan su propio vencimiento
+    "sesiones": {
+        "BACKEND": CACHE_SESIONES_BACKEND,
+        "LOCATION": os.environ.get("CACHE_SESIONES_LOCATION", str(CACHE_SESIONES_DIR)),
+        "TIMEOUT": None,
+    },
+}
+if CACHE_SESIONES_BACKEND.endswith("FileBasedCache"):
+    # Al pasar el máximo se descarta un tercio: las sesiones siguen en la base y los usuarios se releen
+    CACHES["sesiones"]["OPTIONS"] = {"MAX_ENTRIES": int(os.environ.get("CACHE_SESIONES_MAX_ENTRADAS", 50000))}
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+SESSION_CACHE_ALIAS = "sesiones"
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -100,5 +151,52 @@ EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD", "")
 EMAIL_USE_TLS = os.environ.get("EMAIL_USE_TLS", "True") == "True"
 DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", "no-reply@example.com")
 
+# Tiempos por petición (Server-Timing) y registro de peticiones lentas. Server-Timing va a todos
+# los clientes solo con TIEMPOS_SERVER_TIMING (por defecto, igual que DEBUG); si no, solo a usuarios
+# staff y a los clientes autorizados en /metrics (METRICAS_TOKEN o METRICAS_IPS)
+TIEMPOS_SERVER_TIMING = os.environ.get("TIEMPOS_SERVER_TIMING", str(DEBUG)) == "True"
+TIEMPOS_UMBRAL_LENTO_MS = int(os.environ.get("TIEMPOS_UMBRAL_LENTO_MS", 500))
+TIEMPOS_MUESTREO_LENTAS = float(os.environ.get("TIEMPOS_MUESTREO_LENTAS", 1.0))
+LOGS_DIR = Path(os.environ.get("DJANGO_LOGS_DIR", BASE_DIR / "logs"))
+LOGS_DIR.mkdir(parents=True, exist_ok=True)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {"lentas": {"format": "%(asctime)s %(message)s"}},
+    "handlers": {
+        "lentas": {
+            "class": "logging.handlers.RotatingFileHandler",
+            "filename": LOGS_DIR / "peticiones_lentas.log",
+            "maxBytes": 5 * 1024 * 1024,
+            "backupCount": 5,
+            "encoding": "utf-8",
+            "formatter": "lentas",
+        },
+    },
+    "loggers": {
+        "gestion_academica.lentas": {"handlers": ["lentas"], "level": "WARNING", "propagate": False},
+    },
+}
+
+# /metrics expone nombres de URL, tráfico y errores: exige "Authorization: Bearer <METRICAS_TOKEN>" o una
+# petición desde METRICAS_IPS (REMOTE_ADDR, separadas por comas; detrás de un proxy es la IP del proxy).
+# Sin ninguno de los dos solo responde con DEBUG; en producción da 403.
+METRICAS_TOKEN = os.environ.get("METRICAS_TOKEN", "")
+METRICAS_IPS = [ip.strip() for ip in os.environ.get("METRICAS_IPS", "").split(",") if ip.strip()]
+
+# Caché de boletines y actas PDF en MEDIA_ROOT/pdf_cache
+PDF_CACHE_MAX_MB = int(os.environ.get("PDF_CACHE_MAX_MB", 200))
+# Segundos mínimos entre dos limpiezas de la caché PDF disparadas por descargas
+PDF_CACHE_LIMPIEZA_S = int(os.environ.get("PDF_CACHE_LIMPIEZA_S", 60))
+# Procesos que dibujan los boletines de un ZIP por curso o periodo en procesar_reportes (1 = sin pool)
+BOLETINES_PROCESOS = int(os.environ.get("BOLETINES_PROCESOS", min(4, os.cpu_count() or 1)))
+# Un curso con hasta estos estudiantes se descarga en la misma petición, sin pool; el resto va a la cola
+BOLETINES_ZIP_SINCRONO = int(os.environ.get("BOLETINES_ZIP_SINCRONO", 40))
+
+# Alerta temprana: promedio por debajo de la nota mínima o inasistencia (% de horas) por encima del máximo
+RIESGO_NOTA_MINIMA = float(os.environ.get("RIESGO_NOTA_MINIMA", 3.0))
+RIESGO_INASISTENCIA_MAXIMA = float(os.environ.get("RIESGO_INASISTENCIA_MAXIMA", 20))
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
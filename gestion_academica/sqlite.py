@@ -0,0 +1,53 @@
+"""
+Perfil de SQLite para producción.
+
+Con varios workers de gunicorn sobre el mismo archivo, el modo de diario por
+defecto (DELETE) bloquea a los lectores mientras alguien escribe, y una
+transacción que primero lee y luego escribe falla con "database is locked" sin
+esperar cuando otra ya tomó el candado. Al abrir cada conexión se aplica:
+
+- ``journal_mode=WAL``: lectores y escritor no se bloquean entre sí.
+- ``synchronous=NORMAL``: con WAL solo se pierde la última transacción ante un
+  corte de energía, nunca se corrompe la base.
+- ``cache_size`` y ``mmap_size``: SQLITE_CACHE_MB de caché de páginas por
+  conexión y SQLITE_MMAP_MB del archivo leídos por memoria mapeada.
+- ``busy_timeout``: ante un candado se espera hasta SQLITE_BUSY_TIMEOUT_MS.
+
+Las transacciones empiezan con BEGIN IMMEDIATE (``transaction_mode`` en
+DATABASES): toman el candado de escritura al comenzar, donde ``busy_timeout``
+sí puede esperar. El comando ``mantener_sqlite`` hace el checkpoint del WAL y
+``PRAGMA optimize``; ``verificar_concurrencia`` comprueba el perfil con carga
+mixta.
+"""
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+PRAGMAS_ESCRITURA = ("journal_mode", "synchronous")
+
+
+def pragmas():
+    return [
+        # Primero la espera: cambiar a WAL necesita un candado exclusivo momentáneo
+        ("busy_timeout", settings.SQLITE_BUSY_TIMEOUT_MS),
+        ("journal_mode", "WAL"),
+        ("synchronous", "NORMAL"),
+        # Negativo: en KiB en lugar de páginas
+        ("cache_size", -settings.SQLITE_CACHE_MB * 1024),
+        ("mmap_size", settings.SQLITE_MMAP_MB * 1024 * 1024),
+    ]
+
+
+@receiver(connection_created)
+def aplicar_perfil(sender, connection, **kwargs):
+    if connection.vendor != "sqlite" or not settings.SQLITE_PERFIL_PRODUCCION:
+        return
+    # La réplica se abre con mode=ro: no admite cambiar el diario ni la sincronización
+    solo_lectura = "mode=ro" in str(connection.settings_dict["NAME"])
+    with connection.cursor() as cursor:
+        for nombre, valor in pragmas():
+            if solo_lectura and nombre in PRAGMAS_ESCRITURA:
+                continue
+            cursor.execute(f"PRAGMA {nombre} = {valor}")
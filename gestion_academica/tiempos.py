@@ -0,0 +1,159 @@
+"""
+Medición del tiempo de cada petición.
+
+``TiemposMiddleware`` separa el tiempo en base de datos (y número de
+consultas), en la vista y en el render de plantillas, lo devuelve en el
+encabezado ``Server-Timing`` (con TIEMPOS_SERVER_TIMING a todos; si no, solo a
+usuarios staff y a los clientes autorizados en /metrics) y, por encima de TIEMPOS_UMBRAL_LENTO_MS, escribe
+una muestra de las peticiones lentas con sus sentencias SQL más costosas en el
+logger ``gestion_academica.lentas``. El render se mide con el backend
+``PlantillasMedidas`` configurado en TEMPLATES.
+"""
+
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+from . import metricas
+
+logger = logging.getLogger("gestion_academica.lentas")
+
+_medicion = ContextVar("medicion", default=None)
+SENTENCIAS_EN_LOG = 5
+LARGO_SQL = 500
+
+
+class Medicion:
+    __slots__ = ("inicio", "inicio_vista", "db", "consultas", "plantilla", "sentencias")
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.inicio_vista = None
+        self.db = 0.0
+        self.consultas = 0
+        self.plantilla = 0.0
+        # sql (sin parámetros) -> [veces, segundos]; agrupa los N+1
+        self.sentencias = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = time.perf_counter() - inicio
+            self.db += duracion
+            self.consultas += 1
+            acumulado = self.sentencias.setdefault(sql, [0, 0.0])
+            acumulado[0] += 1
+            acumulado[1] += duracion
+
+    def mas_costosas(self):
+        orden = sorted(self.sentencias.items(), key=lambda item: item[1][1], reverse=True)
+        return [
+            {"sql": sql[:LARGO_SQL], "veces": veces, "ms": round(segundos * 1000, 2)}
+            for sql, (veces, segundos) in orden[:SENTENCIAS_EN_LOG]
+        ]
+
+
+class Plantilla(Template):
+    def render(self, context=None, request=None):
+        medicion = _medicion.get()
+        if medicion is None:
+            return super().render(context, request)
+        inicio = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            medicion.plantilla += time.perf_counter() - inicio
+
+
+class PlantillasMedidas(DjangoTemplates):
+    """Backend de plantillas de Django que suma el tiempo de render a la petición en curso."""
+
+    def from_string(self, template_code):
+        return Plantilla(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return Plantilla(super().get_template(template_name).template, self)
+
+
+class TiemposMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.umbral = settings.TIEMPOS_UMBRAL_LENTO_MS / 1000
+        self.muestreo = settings.TIEMPOS_MUESTREO_LENTAS
+        self.encabezado = settings.TIEMPOS_SERVER_TIMING
+
+    def __call__(self, request):
+        medicion = Medicion()
+        token = _medicion.set(medicion)
+        try:
+            with ExitStack() as pila:
+                for conexion in connections.all():
+                    pila.enter_context(conexion.execute_wrapper(medicion))
+                response = self.get_response(request)
+        finally:
+            _medicion.reset(token)
+        fin = time.perf_counter()
+        total = fin - medicion.inicio
+        # Desde que el middleware cede a la vista; incluye su SQL y plantillas
+        vista = fin - medicion.inicio_vista if medicion.inicio_vista else 0.0
+        if self._con_encabezado(request):
+            response["Server-Timing"] = ", ".join(
+                [
+                    f'db;dur={medicion.db * 1000:.1f};desc="{medicion.consultas} consultas"',
+                    f"plantilla;dur={medicion.plantilla * 1000:.1f}",
+                    f"vista;dur={vista * 1000:.1f}",
+                    f"total;dur={total * 1000:.1f}",
+                ]
+            )
+        match = getattr(request, "resolver_match", None)
+        metricas.observar_peticion(
+            match.view_name if match else "sin_ruta",
+            request.method,
+            response.status_code,
+            total,
+            medicion.consultas,
+            medicion.db,
+        )
+        if total >= self.umbral and random.random() < self.muestreo:
+            self._registrar(request, response, medicion, total, vista)
+        return response
+
+    def _con_encabezado(self, request):
+        # Server-Timing revela cuánto SQL hace cada vista: fuera de desarrollo no va a cualquier cliente
+        if self.encabezado or metricas.autorizado(request):
+            return True
+        usuario = getattr(request, "user", None)
+        return usuario is not None and usuario.is_staff
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        medicion = _medicion.get()
+        if medicion is not None:
+            medicion.inicio_vista = time.perf_counter()
+
+    def _registrar(self, request, response, medicion, total, vista):
+        match = getattr(request, "resolver_match", None)
+        usuario = getattr(request, "user", None)
+        registro = {
+            "metodo": request.method,
+            "ruta": request.path,
+            "vista": match.view_name if match else None,
+            "estado": response.status_code,
+            "usuario": usuario.pk if usuario is not None and usuario.is_authenticated else None,
+            "total_ms": round(total * 1000, 1),
+            "vista_ms": round(vista * 1000, 1),
+            "db_ms": round(medicion.db * 1000, 1),
+            "consultas": medicion.consultas,
+            "plantilla_ms": round(medicion.plantilla * 1000, 1),
+            "sql": medicion.mas_costosas(),
+        }
+        logger.warning(json.dumps(registro, ensure_ascii=False))
+
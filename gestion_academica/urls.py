@@ -3,11 +3,13 @@ from django.urls import include, path
 from django.conf import settings
 from django.conf.urls.static import static
 from accounts.views import redirect_dashboard
+from .metricas import metricas
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", include("accounts.urls")),
     path("academico/", include("academico.urls")),
     path("dashboard/", redirect_dashboard, name="dashboard"),
+    path("metrics", metricas, name="metricas"),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
@@ -0,0 +1,24 @@
+"""
+Configuración de gunicorn (se carga sola desde la raíz del proyecto).
+
+Prepara la carpeta compartida de métricas de Prometheus cuando se define
+PROMETHEUS_MULTIPROC_DIR: se vacía al arrancar y se marcan los workers que
+terminan para que sus valores de tipo gauge no queden vivos.
+"""
+
+import os
+import shutil
+
+
+def on_starting(server):
+    carpeta = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if carpeta:
+        shutil.rmtree(carpeta, ignore_errors=True)
+        os.makedirs(carpeta, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)